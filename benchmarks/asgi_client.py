@@ -0,0 +1,31 @@
+import json
+
+
+# Cliente mínimo para chamar um app ASGI no próprio processo (benchmarks e testes).
+
+
+async def asgi_request(app, method, path, query='', headers=None, body=None):
+    """Executa uma requisição no app ASGI e retorna (status, headers, corpo)."""
+    payload = json.dumps(body).encode() if body is not None else b''
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    if body is not None:
+        raw_headers += [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': raw_headers, 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+    }
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start = sent[0]
+    response_headers = {k.decode(): v.decode() for k, v in start['headers']}
+    return start['status'], response_headers, b''.join(m.get('body', b'') for m in sent[1:])
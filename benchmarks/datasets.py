@@ -0,0 +1,19 @@
+from filmestop.extensions import db
+from seed_data import seed_bulk_data
+
+
+# Tamanhos pré-definidos dos conjuntos de dados sintéticos
+SIZES = {
+    'small': {'users': 1_000, 'movies': 5_000, 'rents': 50_000, 'reviews': 20_000},
+    'medium': {'users': 10_000, 'movies': 100_000, 'rents': 1_000_000, 'reviews': 300_000},
+    'large': {'users': 100_000, 'movies': 100_000, 'rents': 10_000_000, 'reviews': 3_000_000},
+}
+
+
+def build_dataset(users, movies, rents, reviews, seed=42):
+    """
+    Cria as tabelas e popula um banco vazio com a carga em massa determinística
+    de `seed_data.seed_bulk_data`.
+    """
+    db.create_all()
+    return seed_bulk_data(users, movies, rents, reviews, seed=seed)
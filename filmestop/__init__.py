@@ -3,24 +3,45 @@ from flasgger import Swagger
 from flask import jsonify
 
 from filmestop.extensions import db, migrate, cache
+from filmestop.genre_catalogue import genre_catalogue
+from filmestop.leaderboard import leaderboard
+from filmestop.metrics import metrics
+from filmestop.query_budget import query_tracker
+from filmestop.json_provider import select_json_provider
+from filmestop.boot import load_openapi_spec
 from filmestop.routes.case_requirements import main
 from filmestop.routes.users import users_bp
 from filmestop.routes.movies import movies_bp
+from filmestop.routes.exports import exports_bp
 from filmestop.config import Config, TestingConfig
+from filmestop.commands import reviews_cli, export_cli, seed_cli, openapi_cli, leaderboard_cli
 
-def create_app(config_name='default'):
+def create_app(config_name='default', config_overrides=None):
     app = Flask(__name__)
 
     # Carrega a configuração com base no ambiente ('testing' ou produção)
     app.config.from_object(TestingConfig if config_name == 'testing' else Config)
 
+    # Valores pontuais (ex.: banco usado pelos benchmarks) antes de iniciar as extensões
+    if config_overrides:
+        app.config.update(config_overrides)
+
+    # Serializador JSON das respostas (orjson quando disponível)
+    app.json = select_json_provider(app)
+
     # Inicializa as extensões com a aplicação
     db.init_app(app)
     migrate.init_app(app, db)
     cache.init_app(app)
+    genre_catalogue.init_app(app)
+    leaderboard.init_app(app)
+    metrics.init_app(app)
+    query_tracker.init_app(app)
 
-    # Inicializa o Swagger (documentação automática dos endpoints)
-    Swagger(app) 
+    # Inicializa o Swagger (documentação automática dos endpoints); com
+    # OPENAPI_SPEC_FILE a especificação gerada no build é usada sem reler os docstrings
+    swagger = Swagger(app)
+    load_openapi_spec(app, swagger)
     
     # Tratando endpoints inválidos
     @app.errorhandler(404)
@@ -32,5 +53,13 @@ def create_app(config_name='default'):
     app.register_blueprint(main, url_prefix='/case')
     app.register_blueprint(users_bp, url_prefix='/users')
     app.register_blueprint(movies_bp, url_prefix='/movies')
+    app.register_blueprint(exports_bp, url_prefix='/export')
+
+    # Registra os comandos de linha de comando (flask reviews import ...)
+    app.cli.add_command(reviews_cli)
+    app.cli.add_command(export_cli)
+    app.cli.add_command(seed_cli)
+    app.cli.add_command(openapi_cli)
+    app.cli.add_command(leaderboard_cli)
 
     return app
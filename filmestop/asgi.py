@@ -0,0 +1,384 @@
+import asyncio
+import logging
+import random
+import re
+import time
+import uuid
+
+from asgiref.wsgi import WsgiToAsgi
+from cachelib.redis import RedisCache as CachelibRedisCache
+from flask_caching.backends import NullCache
+from sqlalchemy import select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_etags
+from urllib.parse import parse_qsl
+
+from filmestop import create_app
+from filmestop.cache_tags import (
+    TAGGED_VIEW_TIMEOUT, CATALOGUE_TAG, GENRES_TAG, genre_tag, movie_tag, async_tag_versions, etag_for
+)
+from filmestop.db_routing import REPLICA_BIND_PREFIX
+from filmestop.extensions import cache
+from filmestop.genre_catalogue import genre_catalogue
+from filmestop.models import Movie, Catalogue_Genre
+from filmestop.pagination import parse_page_args, page_payload
+from filmestop.serializers import serialize_movies, serialize_movie_detail
+from filmestop.stampede import LOCK_POLL_INTERVAL, LOCK_TIMEOUT, LOCK_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Modo assíncrono (ASGI) das rotas de leitura mais acessadas.
+#
+#     uvicorn --factory filmestop.asgi:create_asgi_app --workers 4
+#
+# GET /case/movies, /case/movies/<id> e /case/users/<id>/rented_movies são
+# atendidas por handlers assíncronos (SQLAlchemy assíncrono + cliente Redis
+# assíncrono), então um processo mantém centenas de requisições em andamento
+# enquanto espera o banco e o Redis. Todas as outras rotas continuam sendo a
+# aplicação Flask, executada em threads pelo adaptador WSGI -> ASGI.
+#
+# As respostas são as mesmas do modo síncrono (corpo, X-Next-Cursor, ETag) e a
+# invalidação é compartilhada: as versões das tags são lidas das mesmas chaves
+# do cache, no mesmo formato do RedisCache do Flask-Caching. Como no modo
+# síncrono, as respostas cacheadas são montadas lendo do primário (uma réplica
+# atrasada ficaria no cache por todo o TTL) e uma falha do cache é registrada
+# e a resposta é servida sem cache.
+#
+# Um miss é calculado uma única vez: as requisições do mesmo processo aguardam
+# a mesma tarefa e as dos outros workers esperam o lock da chave (`add`, como
+# em filmestop/stampede.py). Diferente do modo síncrono, não há
+# stale-while-revalidate, as respostas não são comprimidas e são lidas direto
+# do Redis (sem o L1 em memória de filmestop/tiered_cache.py).
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_url(url):
+    """Troca o driver da URL síncrona pelo equivalente assíncrono."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for database backend {backend}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class AsyncRedisCache:
+    """Cliente Redis assíncrono com as chaves e a serialização do RedisCache síncrono."""
+
+    def __init__(self, backend, url):
+        import redis.asyncio
+
+        self.client = redis.asyncio.from_url(url)
+        self.key_prefix = backend.key_prefix
+        self.serializer = backend.serializer
+
+    async def get_many(self, keys):
+        values = await self.client.mget([self.key_prefix + key for key in keys])
+        return [self.serializer.loads(value) for value in values]
+
+    async def get(self, key):
+        return (await self.get_many([key]))[0]
+
+    async def set_many(self, mapping, timeout=None):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                if timeout:
+                    pipe.setex(self.key_prefix + key, timeout, self.serializer.dumps(value))
+                else:
+                    pipe.set(self.key_prefix + key, self.serializer.dumps(value))
+            await pipe.execute()
+
+    async def set(self, key, value, timeout=None):
+        await self.set_many({key: value}, timeout)
+
+    async def add(self, key, value, timeout=None):
+        return bool(await self.client.set(self.key_prefix + key, self.serializer.dumps(value), nx=True, ex=timeout))
+
+    async def delete(self, key):
+        await self.client.delete(self.key_prefix + key)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class AsyncLocalCache:
+    """Adaptador assíncrono para backends em memória (SimpleCache, NullCache), sem I/O."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def get_many(self, keys):
+        return self.backend.get_many(*keys)
+
+    async def get(self, key):
+        return self.backend.get(key)
+
+    async def set_many(self, mapping, timeout=None):
+        self.backend.set_many(mapping, timeout=timeout)
+
+    async def set(self, key, value, timeout=None):
+        self.backend.set(key, value, timeout=timeout)
+
+    async def add(self, key, value, timeout=None):
+        return self.backend.add(key, value, timeout=timeout)
+
+    async def delete(self, key):
+        self.backend.delete(key)
+
+    async def close(self):
+        pass
+
+
+def async_cache_for(app):
+    backend = app.extensions['cache'][cache]
+    if isinstance(backend, CachelibRedisCache):
+        return AsyncRedisCache(backend, app.config['CACHE_REDIS_URL'])
+    return AsyncLocalCache(backend)
+
+
+class AsyncResponse:
+
+    def __init__(self, status, body=b'', headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or []
+
+
+class AsyncApp:
+    """Aplicação ASGI: handlers assíncronos para as rotas quentes e Flask para o resto."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.cache = async_cache_for(flask_app)
+
+        # Misses em cálculo neste processo: chave do cache -> tarefa
+        self._inflight = {}
+
+        options = {k: v for k, v in flask_app.config['SQLALCHEMY_ENGINE_OPTIONS'].items() if k != 'poolclass'}
+        self.primary = create_async_engine(async_database_url(flask_app.config['SQLALCHEMY_DATABASE_URI']), **options)
+
+        # Leituras não cacheadas vão para as réplicas, se houver (mesma regra da RoutingSession)
+        binds = flask_app.config.get('SQLALCHEMY_BINDS') or {}
+        urls = [url for key, url in binds.items() if key.startswith(REPLICA_BIND_PREFIX)]
+        self.engines = [create_async_engine(async_database_url(url), **options) for url in urls] or [self.primary]
+
+        self.routes = [
+            (re.compile(r'/case/movies'), self.get_movies),
+            (re.compile(r'/case/movies/(\d+)'), self.get_movie),
+            (re.compile(r'/case/users/(\d+)/rented_movies'), self.get_rented_movies),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            for pattern, handler in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    response = await handler(scope, *(int(group) for group in match.groups()))
+                    return await self._send(scope, send, response)
+
+        return await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                async with self.session() as session:
+                    await self._load_genres(session)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def close(self):
+        for engine in {self.primary, *self.engines}:
+            await engine.dispose()
+        await self.cache.close()
+
+    def session(self, primary=False):
+        engine = self.primary if primary else random.choice(self.engines)
+        return AsyncSession(engine, expire_on_commit=False)
+
+    async def _send(self, scope, send, response):
+        headers = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in response.headers]
+        headers.append((b'content-length', str(len(response.body)).encode()))
+        await send({'type': 'http.response.start', 'status': response.status, 'headers': headers})
+        body = b'' if scope['method'] == 'HEAD' else response.body
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _json(self, payload, status, headers=()):
+        body = (self.flask_app.json.dumps(payload) + '\n').encode()
+        return AsyncResponse(status, body, [('Content-Type', 'application/json'), *headers])
+
+    async def _load_genres(self, session, genre_ids=()):
+        # Mesma versão compartilhada (GENRES_TAG) usada pelas rotas síncronas
+        tag_version = None
+        if not isinstance(getattr(self.cache, 'backend', None), NullCache):
+            try:
+                tag_version, = await async_tag_versions(self.cache, [GENRES_TAG])
+            except Exception:
+                # Como no modo síncrono, o mapa atual continua sendo usado
+                logger.exception('Failed to read the genre catalogue version')
+        if genre_ids and genre_catalogue.knows(genre_ids, tag_version):
+            return
+        rows = await session.execute(select(Catalogue_Genre.id, Catalogue_Genre.genre_name))
+        genre_catalogue.replace(rows.all(), tag_version)
+
+    async def _cached(self, scope, tags, build):
+        """Mesmo contrato de conditional_get + cache por tags das rotas síncronas."""
+        path = scope['path']
+        full_path = path + '?' + scope['query_string'].decode('latin-1')
+        try:
+            versions = await async_tag_versions(self.cache, tags)
+        except Exception:
+            logger.exception('Failed to read cache tag versions; skipping ETag')
+            return await build()
+        etag = etag_for(full_path, versions)
+
+        if_none_match = dict(scope['headers']).get(b'if-none-match')
+        if if_none_match and parse_etags(if_none_match.decode('latin-1')).contains(etag):
+            return AsyncResponse(304, headers=[('ETag', f'"{etag}"')])
+
+        key = f'async-view/{full_path}/' + '.'.join(versions)
+        try:
+            response = await self.cache.get(key)
+        except Exception:
+            logger.exception('Exception possibly due to cache backend.')
+            response = await build()
+        if response is None:
+            task = self._inflight.get(key)
+            if task is None:
+                task = self._inflight[key] = asyncio.ensure_future(self._build_once(key, build))
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            # Quem desconectar não cancela o cálculo das outras requisições
+            response = await asyncio.shield(task)
+
+        headers = response.headers
+        if response.status == 200:
+            headers = [*headers, ('ETag', f'"{etag}"')]
+        return AsyncResponse(response.status, response.body, headers)
+
+    async def _build_once(self, key, build):
+        """Calcula e grava a resposta; se outro worker já a está calculando, espera por ela."""
+        lock_key, token = f'lock/{key}', uuid.uuid4().hex
+        try:
+            acquired = await self.cache.add(lock_key, token, timeout=LOCK_TIMEOUT)
+            if not acquired:
+                response = await self._wait_for(key, lock_key)
+                if response is not None:
+                    return response
+        except Exception:
+            logger.exception('Exception possibly due to cache backend.')
+            acquired = False
+
+        try:
+            response = await build()
+            try:
+                await self.cache.set(key, response, timeout=TAGGED_VIEW_TIMEOUT)
+            except Exception:
+                logger.exception('Failed to store %s in cache', key)
+            return response
+        finally:
+            if acquired:
+                try:
+                    # Só remove o lock se ainda for nosso
+                    if await self.cache.get(lock_key) == token:
+                        await self.cache.delete(lock_key)
+                except Exception:
+                    logger.exception('Failed to release cache lock for %s', key)
+
+    async def _wait_for(self, key, lock_key):
+        """Espera a resposta gravada por quem tem o lock; None se o lock sumir ou a espera estourar."""
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            response, lock = await self.cache.get_many([key, lock_key])
+            if response is not None:
+                return response
+            if lock is None:
+                return None
+        return None
+
+    async def get_movies(self, scope):
+        args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        genre_id = args.get('genre_id')
+        tags = [genre_tag(int(genre_id)) if genre_id is not None and genre_id.isdigit() else CATALOGUE_TAG, GENRES_TAG]
+
+        async def build():
+            with self.flask_app.app_context():
+                try:
+                    limit, after = parse_page_args(args)
+                except ValueError as e:
+                    return self._json({'error': str(e)}, 400)
+
+            query = select(Movie)
+            genre = None
+            if genre_id is not None:
+                try:
+                    genre = int(genre_id)
+                except ValueError:
+                    return self._json({'error': 'genre_id must be an integer'}, 400)
+                query = query.where(Movie.genre_id == genre)
+            if after is not None:
+                query = query.where(Movie.id > after)
+
+            async with self.session(primary=True) as session:
+                movies = (await session.scalars(query.order_by(Movie.id).limit(limit + 1))).all()
+                await self._load_genres(session, {movie.genre_id for movie in movies})
+
+            next_cursor = None
+            if len(movies) > limit:
+                movies = movies[:limit]
+                next_cursor = movies[-1].id
+
+            if genre is not None and not movies and after is None:
+                return self._json({'error': f'No movies found for genre id: {genre}'}, 404)
+
+            headers = [('X-Next-Cursor', str(next_cursor))] if next_cursor is not None else []
+            with self.flask_app.app_context():
+                return self._json(page_payload(serialize_movies(movies), next_cursor), 200, headers)
+
+        return await self._cached(scope, tags, build)
+
+    async def get_movie(self, scope, movie_id):
+        async def build():
+            async with self.session(primary=True) as session:
+                movie = await session.get(Movie, movie_id)
+                if not movie:
+                    return self._json({'message': f'There is no movie with the ID: {movie_id}'}, 404)
+                await self._load_genres(session, {movie.genre_id})
+
+            with self.flask_app.app_context():
+                return self._json(serialize_movie_detail(movie), 200)
+
+        return await self._cached(scope, [movie_tag(movie_id), GENRES_TAG], build)
+
+    async def get_rented_movies(self, scope, user_id):
+        query = text("""
+            SELECT
+                m.name AS movie_name,
+                r.start_date AS rent_start_date,
+                r.id AS rent_id,
+                rev.rate AS movie_rating
+            FROM rents r
+            JOIN movies m ON r.movie_id = m.id
+            LEFT JOIN reviews rev ON r.movie_id = rev.movie_id AND r.user_id = rev.user_id
+            WHERE r.user_id = :user_id
+        """)
+        async with self.session() as session:
+            rows = (await session.execute(query, {'user_id': user_id})).all()
+        return self._json(rows, 200)
+
+
+def create_asgi_app(config_name='default', config_overrides=None):
+    """Cria a aplicação ASGI (uso: `uvicorn --factory filmestop.asgi:create_asgi_app`)."""
+    return AsyncApp(create_app(config_name, config_overrides))
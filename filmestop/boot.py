@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from flask import current_app
+from flask_migrate import upgrade
+
+from filmestop.extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+# Inicialização rápida da aplicação.
+#
+# O custo de subir um processo não deve depender do tamanho das tabelas nem da
+# quantidade de rotas:
+# - as migrations só rodam se a revisão do banco for diferente do head do
+#   Alembic (uma leitura de alembic_version);
+# - a carga de dados de demonstração é explícita (`flask seed demo`);
+# - a especificação OpenAPI pode ser gerada no build (`flask openapi build`) e
+#   carregada pronta, sem interpretar os docstrings das rotas.
+
+# Endpoint da especificação gerada pelo Flasgger (/apispec_1.json)
+OPENAPI_SPEC_ENDPOINT = 'apispec_1'
+
+
+def _script_directory():
+    return ScriptDirectory.from_config(current_app.extensions['migrate'].migrate.get_config())
+
+
+def database_is_current():
+    """Compara a revisão gravada em alembic_version com o head das migrations."""
+    with db.engine.connect() as connection:
+        current_heads = set(MigrationContext.configure(connection).get_current_heads())
+    return current_heads == set(_script_directory().get_heads())
+
+
+def upgrade_if_needed():
+    """Aplica as migrations só quando o banco não está no head. Retorna True se aplicou."""
+    if database_is_current():
+        logger.info('Database is at the migration head; skipping upgrade')
+        return False
+
+    upgrade()
+    return True
+
+
+def build_openapi_spec(app):
+    """Gera a especificação OpenAPI a partir dos docstrings das rotas."""
+    with app.test_request_context():
+        return app.swag.get_apispecs(OPENAPI_SPEC_ENDPOINT)
+
+
+def load_openapi_spec(app, swagger):
+    """
+    Usa a especificação pré-gerada em OPENAPI_SPEC_FILE, se o arquivo existir.
+
+    O Flasgger guarda a especificação já montada em `apispecs` e só interpreta
+    os docstrings quando ela não está lá (ou em modo debug).
+    """
+    path = app.config.get('OPENAPI_SPEC_FILE')
+    if not path or not os.path.exists(path):
+        return False
+
+    with open(path, encoding='utf-8') as f:
+        swagger.apispecs[OPENAPI_SPEC_ENDPOINT] = json.load(f)
+    return True
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import uuid
+from functools import wraps
+
+from flask import g, has_request_context, make_response, request
+
+from filmestop.compression import available_encodings, negotiate_encoding
+from filmestop.extensions import cache
+
+logger = logging.getLogger(__name__)
+
+
+# Invalidação do cache de rotas por tags.
+#
+# Cada tag ("catalogue", "genre:<id>", "movie:<id>", "genre-stats", "genres")
+# tem uma versão guardada no próprio cache. A chave de uma resposta em cache
+# inclui a versão atual das tags de que ela depende; invalidar uma tag é só
+# trocar a versão, o que torna as entradas antigas inalcançáveis (elas expiram
+# pelo TTL). Assim os TTLs podem ser longos e as leituras refletem as escritas
+# imediatamente.
+
+# TTL das rotas cacheadas com invalidação por tag
+TAGGED_VIEW_TIMEOUT = 6 * 60 * 60
+
+CATALOGUE_TAG = 'catalogue'
+
+# Estatísticas por gênero: mudam com filmes, aluguéis e avaliações
+GENRE_STATS_TAG = 'genre-stats'
+
+# Nomes dos gêneros: aparecem na serialização de todos os filmes e versionam o
+# mapa em memória de cada processo (ver filmestop/genre_catalogue.py)
+GENRES_TAG = 'genres'
+
+
+def genre_tag(genre_id):
+    return f'genre:{genre_id}'
+
+
+def movie_tag(movie_id):
+    return f'movie:{movie_id}'
+
+
+TAG_KEY_PREFIX = 'tag-version:'
+
+
+def _tag_key(tag):
+    return TAG_KEY_PREFIX + tag
+
+
+def tag_versions(tags):
+    """
+    Retorna a versão atual de cada tag com uma única ida ao cache.
+
+    Tags sem versão (nunca invalidadas ou removidas do cache) recebem uma
+    versão nova, para que entradas gravadas com uma versão anterior não voltem
+    a ser servidas.
+    """
+    # Versões já lidas nesta requisição (a chave do cache e o ETag usam as mesmas)
+    known = g.setdefault('tag_versions', {}) if has_request_context() else {}
+
+    keys = [_tag_key(tag) for tag in tags if tag not in known]
+    if keys:
+        fetched = cache.get_many(*keys)
+
+        missing = {}
+        for key, version in zip(keys, fetched):
+            if version is None:
+                version = missing[key] = uuid.uuid4().hex[:12]
+            known[key[len(TAG_KEY_PREFIX):]] = version
+
+        if missing:
+            cache.set_many(missing, timeout=0)
+
+    return [known[tag] for tag in tags]
+
+
+def invalidate_tags(*tags):
+    """
+    Invalida todas as respostas em cache que dependem de alguma das tags.
+
+    Deve ser chamada depois do commit. Falhas do backend de cache são apenas
+    registradas: a escrita no banco já foi concluída e as entradas antigas
+    expiram pelo TTL.
+    """
+    versions = {tag: uuid.uuid4().hex[:12] for tag in tags}
+    if has_request_context():
+        g.setdefault('tag_versions', {}).update(versions)
+
+    try:
+        cache.set_many({_tag_key(tag): version for tag, version in versions.items()}, timeout=0)
+    except Exception:
+        logger.exception('Failed to invalidate cache tags %s', tags)
+
+
+async def async_tag_versions(async_cache, tags):
+    """Equivalente a `tag_versions` para o modo assíncrono (ver filmestop/asgi.py)."""
+    keys = [_tag_key(tag) for tag in tags]
+    versions = list(await async_cache.get_many(keys))
+
+    missing = {}
+    for i, version in enumerate(versions):
+        if version is None:
+            versions[i] = missing[keys[i]] = uuid.uuid4().hex[:12]
+
+    if missing:
+        await async_cache.set_many(missing, timeout=0)
+    return versions
+
+
+def etag_for(full_path, versions):
+    """ETag de uma URL (caminho + query string) para as versões das tags."""
+    digest = hashlib.sha1(full_path.encode())
+    digest.update('.'.join(versions).encode())
+    return digest.hexdigest()
+
+
+def tagged_key_prefix(tags_for_request):
+    """
+    Cria um `key_prefix` para `cache.cached` que inclui as versões das tags
+    retornadas por `tags_for_request()` (chamada dentro da requisição).
+    """
+    def key_prefix():
+        tags = tags_for_request()
+        return f'view/{request.path}/' + '.'.join(tag_versions(tags)) + '/'
+
+    return key_prefix
+
+
+def conditional_get(tags_for_request):
+    """
+    Suporte a GET condicional com ETag forte derivado das versões das tags.
+
+    O ETag é calculado só com a URL e as versões das tags (uma ida ao cache,
+    nenhuma ao banco). Se o cliente enviar o mesmo valor em If-None-Match, a
+    resposta é 304 sem executar a rota nem montar o JSON. Qualquer escrita que
+    invalide uma das tags muda o ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                versions = tag_versions(tags_for_request())
+            except Exception:
+                logger.exception('Failed to read cache tag versions; skipping ETag')
+                return view(*args, **kwargs)
+
+            etag = etag_for(request.full_path, versions)
+
+            # Cada codificação (br/gzip) é uma representação com ETag próprio
+            candidates = [etag]
+            encoding = negotiate_encoding(available_encodings())
+            if encoding is not None:
+                candidates.append(f'{etag}-{encoding}')
+
+            for candidate in candidates:
+                if candidate in request.if_none_match:
+                    response = make_response('', 304)
+                    response.set_etag(candidate)
+                    response.vary.add('Accept-Encoding')
+                    return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                encoding = response.headers.get('Content-Encoding')
+                response.set_etag(f'{etag}-{encoding}' if encoding else etag)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,129 @@
+import csv
+import json
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from filmestop.boot import build_openapi_spec
+from filmestop.cache_tags import GENRE_STATS_TAG, invalidate_tags, movie_tag
+from filmestop.exports import EXPORTABLE_TABLES, iter_ndjson
+from filmestop.leaderboard import leaderboard
+from filmestop.reviews import bulk_upsert_reviews
+
+
+# Comandos de linha de comando da aplicação (`flask <grupo> <comando>`)
+
+reviews_cli = AppGroup('reviews', help='Operações em lote sobre avaliações.')
+
+
+@reviews_cli.command('import')
+@click.argument('csv_file', type=click.File('r', encoding='utf-8'))
+@click.option('--batch-size', type=int, default=None,
+              help='Avaliações gravadas por transação (padrão: MAX_BATCH_SIZE).')
+def import_reviews(csv_file, batch_size):
+    """
+    Importa avaliações históricas de um CSV com as colunas user_id, movie_id e rate.
+
+    O arquivo é lido em blocos; cada bloco é gravado em uma transação com a
+    mesma ingestão em lote da rota /case/reviews/batch.
+    """
+    batch_size = batch_size or current_app.config['MAX_BATCH_SIZE']
+    saved = failed = 0
+
+    def flush(batch, offset):
+        nonlocal saved, failed
+        results, affected_movie_ids = bulk_upsert_reviews(batch)
+        invalidate_tags(GENRE_STATS_TAG, *[movie_tag(movie_id) for movie_id in affected_movie_ids])
+        leaderboard.refresh(affected_movie_ids)
+
+        for result in results:
+            if result['status'] in (200, 201):
+                saved += 1
+            else:
+                failed += 1
+                # Linha 1 é o cabeçalho do CSV
+                click.echo(f"Line {offset + result['index'] + 2}: {result['error']}", err=True)
+
+    batch, offset = [], 0
+    for row in csv.DictReader(csv_file):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush(batch, offset)
+            offset += len(batch)
+            batch = []
+
+    if batch:
+        flush(batch, offset)
+
+    click.echo(f'{saved} reviews saved, {failed} failed.')
+
+
+export_cli = AppGroup('export', help='Exportação das tabelas em NDJSON.')
+
+
+@export_cli.command('table')
+@click.argument('table_name', type=click.Choice(sorted(EXPORTABLE_TABLES)))
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-',
+              help='Arquivo de saída (padrão: saída padrão).')
+def export_table(table_name, output):
+    """Exporta a tabela informada em NDJSON, em streaming e com memória constante."""
+    for line in iter_ndjson(table_name, current_app.config['EXPORT_CHUNK_SIZE']):
+        output.write(line)
+
+
+seed_cli = AppGroup('seed', help='Carga de dados de demonstração e de capacidade.')
+
+
+@seed_cli.command('bulk')
+@click.option('--users', type=int, default=1_000, show_default=True)
+@click.option('--movies', type=int, default=5_000, show_default=True)
+@click.option('--rents', type=int, default=50_000, show_default=True)
+@click.option('--reviews', type=int, default=20_000, show_default=True)
+@click.option('--seed', type=int, default=42, show_default=True, help='Semente do gerador (mesma semente, mesmos dados).')
+def seed_bulk(users, movies, rents, reviews, seed):
+    """Carga em massa determinística (COPY no PostgreSQL, executemany no SQLite)."""
+    # Importado aqui: seed_data fica na raiz do projeto, fora do pacote
+    from seed_data import seed_bulk_data
+
+    counts = seed_bulk_data(users, movies, rents, reviews, seed=seed)
+    click.echo(', '.join(f'{count} {table}' for table, count in counts.items()) + ' inserted.')
+
+
+@seed_cli.command('genres')
+def seed_genres_command():
+    """Insere os gêneros padrão que ainda não existem."""
+    from seed_data import seed_genres
+
+    seed_genres()
+    click.echo('Genres seeded.')
+
+
+@seed_cli.command('demo')
+def seed_demo():
+    """Insere os gêneros e os dados de demonstração (usuários, filmes, aluguéis e avaliações)."""
+    from seed_data import seed_genres, seed_demo_data
+
+    seed_genres()
+    seed_demo_data()
+
+
+leaderboard_cli = AppGroup('leaderboard', help='Ranking dos filmes mais bem avaliados.')
+
+
+@leaderboard_cli.command('rebuild')
+def rebuild_leaderboard():
+    """Reconstrói o ranking a partir dos agregados dos filmes (ex.: após cargas direto no banco)."""
+    count = leaderboard.rebuild()
+    click.echo(f'Leaderboard rebuilt with {count} movies.')
+
+
+openapi_cli = AppGroup('openapi', help='Especificação OpenAPI pré-gerada.')
+
+
+@openapi_cli.command('build')
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='openapi.json', show_default=True)
+def build_openapi(output):
+    """Gera a especificação OpenAPI para ser carregada via OPENAPI_SPEC_FILE."""
+    json.dump(build_openapi_spec(current_app), output, indent=2, sort_keys=True)
+    output.write('\n')
@@ -0,0 +1,102 @@
+import gzip
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_caching.backends import NullCache
+
+from filmestop.extensions import cache
+from filmestop.stampede import single_flight_cached
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só há gzip
+    brotli = None
+
+
+# Compressão das respostas cacheadas.
+#
+# As variantes comprimidas (br/gzip) são geradas uma única vez, quando a
+# resposta é montada, e guardadas no cache junto com o corpo original. Em um
+# acerto do cache só é preciso escolher a variante pelo Accept-Encoding do
+# cliente: nenhuma compressão é feita por requisição.
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+
+
+def _compressors():
+    # Ordem de preferência do servidor quando o cliente aceita mais de uma
+    compressors = {}
+    if brotli is not None:
+        compressors['br'] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    compressors['gzip'] = lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return compressors
+
+
+def available_encodings():
+    return list(_compressors())
+
+
+def negotiate_encoding(encodings):
+    """
+    Escolhe, entre `encodings`, a codificação preferida pelo cliente.
+
+    Retorna None quando o cliente não aceita nenhuma delas (corpo sem compressão).
+    """
+    if not encodings:
+        return None
+    return request.accept_encodings.best_match(encodings)
+
+
+class PrecompressedResponse:
+    """Resposta pronta para o cache: corpo original e variantes comprimidas."""
+
+    def __init__(self, status, headers, body, variants):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.variants = variants
+
+    @classmethod
+    def from_response(cls, response):
+        body = response.get_data()
+        headers = [(k, v) for k, v in response.headers.items() if k != 'Content-Length']
+
+        # Sem cache (NullCache) as variantes seriam descartadas a cada requisição
+        variants = {}
+        compressible = response.status_code == 200 and len(body) >= current_app.config['COMPRESS_MIN_SIZE']
+        if compressible and not isinstance(cache.cache, NullCache):
+            variants = {encoding: compress(body) for encoding, compress in _compressors().items()}
+
+        return cls(response.status_code, headers, body, variants)
+
+    def to_response(self):
+        encoding = negotiate_encoding(list(self.variants))
+        response = current_app.response_class(
+            self.variants.get(encoding, self.body), status=self.status, headers=self.headers
+        )
+        if self.variants:
+            response.vary.add('Accept-Encoding')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def cached_compressed(**cache_options):
+    """
+    Equivalente a `cache.cached(**cache_options)`, guardando no cache a resposta
+    já comprimida e servindo a variante negociada com o cliente. A recomputação
+    é coalescida e entradas vencidas são servidas enquanto são atualizadas
+    (ver filmestop/stampede.py).
+    """
+    def decorator(view):
+        @single_flight_cached(**cache_options)
+        @wraps(view)
+        def build(*args, **kwargs):
+            return PrecompressedResponse.from_response(make_response(view(*args, **kwargs)))
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return build(*args, **kwargs).to_response()
+        return wrapper
+    return decorator
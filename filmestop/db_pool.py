@@ -0,0 +1,74 @@
+import os
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+# Pool de conexões do banco.
+#
+# As opções da engine (SQLALCHEMY_ENGINE_OPTIONS) vêm de variáveis de ambiente,
+# para dimensionar o pool por worker sem alterar o código:
+#   DB_POOL_SIZE        conexões mantidas abertas (padrão 5)
+#   DB_MAX_OVERFLOW     conexões extras além do pool em picos (padrão 10)
+#   DB_POOL_TIMEOUT     segundos esperando uma conexão livre antes do erro (padrão 30)
+#   DB_POOL_RECYCLE     idade máxima (s) de uma conexão antes de reabrir (padrão 1800)
+#   DB_POOL_PRE_PING    testa a conexão antes de usar, descartando as quebradas (padrão true)
+
+
+def _env_bool(environ, name, default):
+    value = environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_options_from_env(environ=os.environ):
+    """Monta SQLALCHEMY_ENGINE_OPTIONS a partir das variáveis DB_POOL_*."""
+    return {
+        'poolclass': MeteredQueuePool,
+        'pool_size': int(environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': _env_bool(environ, 'DB_POOL_PRE_PING', True),
+    }
+
+
+class MeteredQueuePool(QueuePool):
+    """
+    QueuePool que mede o tempo de cada checkout (espera por uma conexão livre
+    ou abertura de uma nova) e avisa os observadores, inclusive nos timeouts.
+
+    Observadores são funções `observer(seconds, timed_out)`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.observers = []
+
+    def capacity(self):
+        """Máximo de conexões simultâneas (None se o overflow for ilimitado)."""
+        if self._max_overflow < 0:
+            return None
+        return self.size() + self._max_overflow
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self._notify(time.perf_counter() - started, True)
+            raise
+        self._notify(time.perf_counter() - started, False)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() troca o pool; os observadores continuam valendo
+        pool = super().recreate()
+        pool.observers = self.observers
+        return pool
+
+    def _notify(self, seconds, timed_out):
+        for observer in self.observers:
+            observer(seconds, timed_out)
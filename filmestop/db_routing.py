@@ -0,0 +1,72 @@
+import os
+import random
+
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import TextClause
+
+
+# Roteamento de leituras para réplicas.
+#
+# Réplicas são binds extras em SQLALCHEMY_BINDS cuja chave começa com
+# "replica" (ex.: {"replica_1": "postgresql://..."}), configuradas pela
+# variável DATABASE_REPLICA_URLS (URLs separadas por vírgula).
+#
+# Dentro de uma requisição GET/HEAD, os SELECTs vão para uma réplica (sorteada
+# uma vez por sessão). Qualquer escrita (flush, INSERT/UPDATE/DELETE, SELECT ...
+# FOR UPDATE) fixa a sessão no primário, de modo que as leituras seguintes da
+# mesma requisição enxergam o que foi escrito. Fora de requisições (CLI, seeds)
+# e nos demais métodos HTTP tudo vai para o primário.
+#
+# Respostas que vão para o cache também são montadas a partir do primário (ver
+# `pin_to_primary`): uma réplica atrasada gravaria dados anteriores à última
+# escrita sob a versão nova das tags, e eles seriam servidos por horas.
+
+REPLICA_BIND_PREFIX = 'replica'
+
+READ_ONLY_METHODS = ('GET', 'HEAD')
+
+
+def replica_binds_from_env(environ=os.environ):
+    """Monta os binds das réplicas a partir de DATABASE_REPLICA_URLS."""
+    urls = [url.strip() for url in environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    return {f'{REPLICA_BIND_PREFIX}_{i}': url for i, url in enumerate(urls, 1)}
+
+
+def _is_read(clause):
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith(('SELECT', 'WITH'))
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+
+class RoutingSession(Session):
+    """Sessão que envia as leituras das rotas somente leitura para uma réplica."""
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self.pinned_to_primary = False
+        self._replica = None
+
+    def _replica_engine(self):
+        if self._replica is None:
+            replicas = [key for key in self._db.engines if key and key.startswith(REPLICA_BIND_PREFIX)]
+            if not replicas:
+                return None
+            self._replica = random.choice(replicas)
+        return self._db.engines[self._replica]
+
+    def pin_to_primary(self):
+        """Faz as próximas leituras desta sessão irem para o primário."""
+        self.pinned_to_primary = True
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self.pinned_to_primary and has_request_context() \
+                and request.method in READ_ONLY_METHODS:
+            if self._flushing or clause is None or not _is_read(clause):
+                self.pinned_to_primary = True
+            else:
+                replica = self._replica_engine()
+                if replica is not None:
+                    return replica
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
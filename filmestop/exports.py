@@ -0,0 +1,42 @@
+import json
+from datetime import date
+
+from sqlalchemy import select
+
+from filmestop.extensions import db
+from filmestop.models import Movie, Rent, Review
+
+
+# Exportação das tabelas em NDJSON (um objeto JSON por linha).
+#
+# As linhas são lidas de um cursor do lado do servidor (`yield_per`) e
+# serializadas uma a uma, então exportar milhões de linhas usa memória
+# constante e os primeiros bytes saem antes de a consulta terminar.
+
+EXPORTABLE_TABLES = {
+    'movies': Movie,
+    'rents': Rent,
+    'reviews': Review,
+}
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def iter_ndjson(table_name, chunk_size=1000):
+    """
+    Gera as linhas de uma tabela exportável em NDJSON, ordenadas por id.
+
+    Raises:
+        KeyError: se a tabela não for exportável.
+    """
+    table = EXPORTABLE_TABLES[table_name].__table__
+
+    result = db.session.execute(
+        select(table).order_by(table.c.id).execution_options(yield_per=chunk_size)
+    )
+    for row in result.mappings():
+        yield json.dumps(dict(row), default=_json_default, separators=(',', ':')) + '\n'
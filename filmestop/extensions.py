@@ -2,17 +2,18 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_caching import Cache
 
+from filmestop.db_routing import RoutingSession
+
 
 # Este módulo segue o padrão Singleton para garantir que apenas uma instância de cada extensão
 
-# Instancia o objeto SQLAlchemy.
-db = SQLAlchemy()
+# Instancia o objeto SQLAlchemy (leituras das rotas GET podem ir para réplicas).
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Instancia o objeto Migrate.
 migrate = Migrate()
 
-# Instancia o objeto de cache com a configuração para usar Redis.
-cache = Cache(config={
-    'CACHE_TYPE': 'RedisCache',
-    'CACHE_REDIS_URL': 'redis://redis:6379/0'
-})
\ No newline at end of file
+# Instancia o objeto de cache. O backend vem da configuração da aplicação
+# (CACHE_TYPE, CACHE_REDIS_URL): Redis com um L1 em memória por processo na
+# frente (ver filmestop/tiered_cache.py) e, nos testes, NullCache.
+cache = Cache()
@@ -0,0 +1,132 @@
+import logging
+import threading
+
+from flask import g, has_request_context
+from flask_caching.backends import NullCache
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from filmestop.cache_tags import GENRES_TAG, invalidate_tags, tag_versions
+from filmestop.db_routing import RoutingSession
+from filmestop.extensions import cache, db
+from filmestop.models import Catalogue_Genre
+
+logger = logging.getLogger(__name__)
+
+
+class GenreCatalogue:
+    """
+    Mapa em memória de genre_id -> genre_name.
+
+    A tabela catalogue_genre é pequena e quase não muda, então é carregada uma
+    única vez por processo e reaproveitada por todos os serializadores, evitando
+    o lazy-load de `movie.genre` para cada filme listado.
+
+    O mapa é versionado: toda recarga incrementa `version`. Ele é invalidado
+    quando um gênero é inserido, alterado ou removido por esta aplicação e
+    recarregado se um genre_id desconhecido for consultado.
+
+    Entre processos (workers do gunicorn, o mestre que carregou o mapa antes do
+    fork, o modo assíncrono) a coerência vem da tag GENRES_TAG: toda escrita em
+    catalogue_genre troca a versão da tag depois do commit, e o mapa guarda a
+    versão com que foi carregado. Dentro de uma requisição a versão atual é lida
+    uma vez (junto com as tags da rota, quando ela é cacheada) e o mapa é
+    recarregado se ela mudou. Sem cache (NullCache) não há versão compartilhada
+    e vale só a invalidação local.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = None
+        self._tag_version = None
+        self.version = 0
+
+    def init_app(self, app):
+        # Cada aplicação criada (ex.: um app por teste) começa com o mapa vazio
+        self.invalidate()
+        app.extensions['genre_catalogue'] = self
+
+    def invalidate(self):
+        self._names = None
+
+    def current_tag_version(self):
+        """Versão atual de GENRES_TAG; None fora de requisições ou se o cache falhar."""
+        if not has_request_context() or g.get('genre_tag_unavailable') or isinstance(cache.cache, NullCache):
+            return None
+        try:
+            return tag_versions([GENRES_TAG])[0]
+        except Exception:
+            # Uma falha por requisição: o mapa atual continua sendo usado
+            logger.exception('Failed to read the genre catalogue version')
+            g.genre_tag_unavailable = True
+            return None
+
+    def load(self, tag_version=None):
+        """Recarrega o mapa a partir do banco com uma única consulta."""
+        with self._lock:
+            rows = db.session.query(Catalogue_Genre.id, Catalogue_Genre.genre_name).all()
+            return self._replace(rows, tag_version)
+
+    def replace(self, rows, tag_version=None):
+        """Substitui o mapa por linhas (id, nome) já consultadas (ex.: pelo modo assíncrono)."""
+        with self._lock:
+            return self._replace(rows, tag_version)
+
+    def _replace(self, rows, tag_version):
+        self._names = {genre_id: genre_name for genre_id, genre_name in rows}
+        self._tag_version = tag_version
+        self.version += 1
+        return self._names
+
+    def _outdated(self, tag_version):
+        return tag_version is not None and tag_version != self._tag_version
+
+    def knows(self, genre_ids, tag_version=None):
+        """Indica se o mapa está carregado, na versão informada, e contém todos os ids."""
+        names = self._names
+        return names is not None and not self._outdated(tag_version) and all(
+            genre_id in names for genre_id in genre_ids if genre_id is not None
+        )
+
+    def names(self):
+        tag_version = self.current_tag_version()
+        names = self._names
+        if names is None or self._outdated(tag_version):
+            names = self.load(tag_version)
+        return names
+
+    def name_for(self, genre_id):
+        """Retorna o nome do gênero ou None se o id não existir."""
+        if genre_id is None:
+            return None
+
+        names = self.names()
+        if genre_id not in names:
+            names = self.load(self._tag_version)
+        return names.get(genre_id)
+
+
+genre_catalogue = GenreCatalogue()
+
+
+@event.listens_for(Catalogue_Genre, 'after_insert')
+@event.listens_for(Catalogue_Genre, 'after_update')
+@event.listens_for(Catalogue_Genre, 'after_delete')
+def _invalidate_genre_catalogue(mapper, connection, target):
+    genre_catalogue.invalidate()
+    session = object_session(target)
+    if session is not None:
+        session.info['genres_changed'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _publish_genre_changes(session):
+    # Os outros processos só devem recarregar o mapa depois do commit
+    if session.info.pop('genres_changed', False):
+        genre_catalogue.invalidate()
+        invalidate_tags(GENRES_TAG)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_genre_changes(session):
+    session.info.pop('genres_changed', None)
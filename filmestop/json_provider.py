@@ -0,0 +1,81 @@
+import decimal
+import uuid
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele é usado o json da biblioteca padrão
+    orjson = None
+
+
+# Serialização JSON das respostas.
+#
+# O provider padrão do Flask usa o `json` da biblioteca padrão, que aparece no
+# perfil das listagens grandes. Quando o orjson está instalado ele é usado no
+# lugar; os dois providers produzem JSON equivalente (o orjson grava UTF-8 em
+# vez de escapar caracteres não ASCII):
+# - datas e horários em ISO 8601 ("2025-01-01"), como documentado no Swagger;
+# - linhas do SQLAlchemy (`Row`, ex.: resultado de `text()`) como objetos;
+# - Decimal como string (mesmo comportamento do Flask).
+
+
+def _default(value):
+    """Conversão dos tipos que o encoder não conhece."""
+    if isinstance(value, Row):
+        return dict(value._mapping)
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+
+    def _options(self, indent=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        # Argumentos específicos do `json.dumps` (cls, separators...) usam o encoder padrão
+        if set(kwargs) - {'indent'}:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._options(bool(kwargs.get('indent')))).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+
+        body = orjson.dumps(obj, default=_default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def select_json_provider(app):
+    """Provider configurado em JSON_PROVIDER ('orjson' ou 'stdlib'), se disponível."""
+    if app.config['JSON_PROVIDER'] == 'orjson' and orjson is not None:
+        provider = OrjsonProvider(app)
+    else:
+        provider = StdlibJSONProvider(app)
+
+    provider.sort_keys = app.json.sort_keys
+    provider.ensure_ascii = app.json.ensure_ascii
+    provider.compact = app.json.compact
+    return provider
@@ -0,0 +1,297 @@
+import bisect
+import logging
+import threading
+
+from flask import current_app
+from sqlalchemy import select
+
+from filmestop.extensions import db
+from filmestop.models import Movie
+
+logger = logging.getLogger(__name__)
+
+
+# Ranking dos filmes mais bem avaliados, mantido incrementalmente.
+#
+# Cada filme avaliado tem uma nota bayesiana:
+#
+#     score = (PRIOR_WEIGHT * PRIOR_MEAN + soma das notas) / (PRIOR_WEIGHT + avaliações)
+#
+# que puxa para a média a priori os filmes com poucas avaliações (um único 100
+# não passa na frente de cem notas 95). Como a priori é fixa (configuração), a
+# nota de um filme só depende dos seus próprios agregados: cada avaliação
+# atualiza um único membro do ranking.
+#
+# Há um ranking geral e um por gênero, repetidos para cada limiar de
+# avaliações (LEADERBOARD_REVIEW_THRESHOLDS): um filme com 12 avaliações está
+# nos rankings de 1, 5 e 10. Assim `min_reviews` escolhe um ranking já
+# filtrado e a consulta continua O(log n + N). No Redis são sorted sets (ZADD
+# e ZREVRANGE); sem Redis (LEADERBOARD_BACKEND = 'memory') são listas
+# ordenadas em memória, por processo.
+#
+# As rotas de escrita atualizam o ranking depois do commit, então duas
+# atualizações do mesmo filme podem chegar fora de ordem. Cada uma carrega a
+# `rating_version` do filme (incrementada no mesmo UPDATE dos agregados) e só é
+# aplicada se não for mais antiga que a já registrada. O ranking é montado a
+# partir do banco na primeira consulta (ou com `flask leaderboard rebuild`).
+
+LEADERBOARD_KEY_PREFIX = 'leaderboard:'
+
+DEFAULT_REVIEW_THRESHOLDS = (1, 5, 10, 25, 50, 100)
+
+
+def bayesian_score(sum_rate, count_review, prior_mean, prior_weight):
+    return (prior_weight * prior_mean + (sum_rate or 0)) / (prior_weight + (count_review or 0))
+
+
+class RedisRanking:
+    """Ranking em sorted sets do Redis, compartilhado por todos os workers."""
+
+    def __init__(self, client, thresholds=DEFAULT_REVIEW_THRESHOLDS, prefix=LEADERBOARD_KEY_PREFIX):
+        self.client = client
+        self.thresholds = sorted({1, *thresholds})
+        self.prefix = prefix
+        self.built_key = prefix + 'built'
+
+    def _ranking_key(self, genre_id=None, min_reviews=1):
+        key = self.prefix + ('all' if genre_id is None else f'genre:{genre_id}')
+        return key if min_reviews == 1 else f'{key}:min:{min_reviews}'
+
+    def _member_key(self, movie_id):
+        # "genre_id:count_review:rating_version" do filme no ranking
+        return self.prefix + f'member:{movie_id}'
+
+    def _ranking_keys(self, genre_id, count_review):
+        return [
+            self._ranking_key(key_genre_id, threshold)
+            for key_genre_id in (None, genre_id)
+            for threshold in self.thresholds if count_review >= threshold
+        ]
+
+    @staticmethod
+    def _parse_member(member):
+        genre_id, count_review, version = member.split(b':')
+        return int(genre_id), int(count_review), int(version)
+
+    def is_built(self):
+        return bool(self.client.exists(self.built_key))
+
+    def _add(self, pipe, movie_id, genre_id, score, count_review, version):
+        for key in self._ranking_keys(genre_id, count_review):
+            pipe.zadd(key, {movie_id: score})
+        pipe.set(self._member_key(movie_id), f'{genre_id}:{count_review}:{version}')
+
+    def _apply(self, movie_id, version, add=None):
+        """
+        Troca a posição do filme em uma transação otimista (WATCH na chave do
+        filme). Retorna False, sem alterar nada, se o ranking já tiver uma
+        versão mais nova do filme.
+        """
+        import redis
+
+        member_key = self._member_key(movie_id)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(member_key)
+                    member = pipe.get(member_key)
+                    previous = self._parse_member(member) if member is not None else None
+                    if previous is not None and version is not None and previous[2] > version:
+                        return False
+
+                    pipe.multi()
+                    if previous is not None:
+                        for key in self._ranking_keys(previous[0], previous[1]):
+                            pipe.zrem(key, movie_id)
+                        pipe.delete(member_key)
+                    if add is not None:
+                        self._add(pipe, movie_id, *add, version)
+                    pipe.execute()
+                    return True
+                except redis.WatchError:
+                    continue
+
+    def update(self, movie_id, genre_id, score, count_review, version):
+        return self._apply(movie_id, version, (genre_id, score, count_review))
+
+    def remove(self, movie_id):
+        self._apply(movie_id, None)
+
+    def replace(self, rows):
+        """Troca o ranking inteiro por (movie_id, genre_id, score, count_review, version) em uma transação."""
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        with self.client.pipeline() as pipe:
+            if keys:
+                pipe.delete(*keys)
+            for row in rows:
+                self._add(pipe, *row)
+            pipe.set(self.built_key, 1)
+            pipe.execute()
+
+    def top(self, limit, genre_id=None, min_reviews=1):
+        """Retorna [(movie_id, score, count_review)] do maior para o menor score."""
+        entries = self.client.zrevrange(self._ranking_key(genre_id, min_reviews), 0, limit - 1, withscores=True)
+        if not entries:
+            return []
+        members = self.client.mget([self._member_key(int(movie_id)) for movie_id, _ in entries])
+        return [
+            (int(movie_id), score, self._parse_member(member)[1] if member is not None else 0)
+            for (movie_id, score), member in zip(entries, members)
+        ]
+
+
+class LocalRanking:
+    """Ranking em memória (um por processo), para ambientes sem Redis."""
+
+    def __init__(self, thresholds=DEFAULT_REVIEW_THRESHOLDS):
+        self.thresholds = sorted({1, *thresholds})
+        self._lock = threading.Lock()
+        self._members = {}   # movie_id -> (score, genre_id, count_review, version)
+        self._rankings = {}  # (genre_id ou None, limiar) -> lista ordenada de (-score, movie_id)
+        self._built = False
+
+    def is_built(self):
+        return self._built
+
+    def _ranking_keys(self, genre_id, count_review):
+        return [
+            (key_genre_id, threshold)
+            for key_genre_id in (None, genre_id)
+            for threshold in self.thresholds if count_review >= threshold
+        ]
+
+    def _discard(self, movie_id):
+        member = self._members.pop(movie_id, None)
+        if member is None:
+            return
+        score, genre_id, count_review, _ = member
+        for key in self._ranking_keys(genre_id, count_review):
+            ranking = self._rankings[key]
+            index = bisect.bisect_left(ranking, (-score, movie_id))
+            if index < len(ranking) and ranking[index] == (-score, movie_id):
+                del ranking[index]
+
+    def _add(self, movie_id, genre_id, score, count_review, version):
+        self._members[movie_id] = (score, genre_id, count_review, version)
+        for key in self._ranking_keys(genre_id, count_review):
+            bisect.insort(self._rankings.setdefault(key, []), (-score, movie_id))
+
+    def update(self, movie_id, genre_id, score, count_review, version):
+        with self._lock:
+            member = self._members.get(movie_id)
+            if member is not None and member[3] > version:
+                return False
+            self._discard(movie_id)
+            self._add(movie_id, genre_id, score, count_review, version)
+            return True
+
+    def remove(self, movie_id):
+        with self._lock:
+            self._discard(movie_id)
+
+    def replace(self, rows):
+        with self._lock:
+            self._members, self._rankings = {}, {}
+            for row in rows:
+                self._add(*row)
+            self._built = True
+
+    def top(self, limit, genre_id=None, min_reviews=1):
+        with self._lock:
+            return [
+                (movie_id, -negative_score, self._members[movie_id][2])
+                for negative_score, movie_id in self._rankings.get((genre_id, min_reviews), [])[:limit]
+            ]
+
+
+class Leaderboard:
+
+    def init_app(self, app):
+        app.config.setdefault('LEADERBOARD_BACKEND', 'redis')
+        app.config.setdefault('LEADERBOARD_PRIOR_MEAN', 50)
+        app.config.setdefault('LEADERBOARD_PRIOR_WEIGHT', 10)
+        app.config.setdefault('LEADERBOARD_REVIEW_THRESHOLDS', DEFAULT_REVIEW_THRESHOLDS)
+        thresholds = app.config['LEADERBOARD_REVIEW_THRESHOLDS']
+
+        if app.config['LEADERBOARD_BACKEND'] == 'redis':
+            import redis
+
+            ranking = RedisRanking(redis.from_url(app.config['CACHE_REDIS_URL']), thresholds)
+        elif app.config['LEADERBOARD_BACKEND'] == 'memory':
+            ranking = LocalRanking(thresholds)
+        else:
+            raise ValueError(f"Unknown LEADERBOARD_BACKEND: {app.config['LEADERBOARD_BACKEND']}")
+        app.extensions['leaderboard'] = ranking
+
+    @property
+    def ranking(self):
+        return current_app.extensions['leaderboard']
+
+    def score(self, sum_rate, count_review):
+        config = current_app.config
+        return bayesian_score(sum_rate, count_review, config['LEADERBOARD_PRIOR_MEAN'], config['LEADERBOARD_PRIOR_WEIGHT'])
+
+    def record(self, movie_id, genre_id, sum_rate, count_review, rating_version):
+        """
+        Atualiza a posição de um filme a partir dos seus agregados.
+
+        Deve ser chamada depois do commit, com a `rating_version` gravada junto
+        com os agregados: uma atualização mais antiga que a já registrada é
+        ignorada. Falhas são apenas registradas (como em `invalidate_tags`);
+        `flask leaderboard rebuild` reconstrói o ranking.
+        """
+        try:
+            if count_review:
+                self.ranking.update(
+                    movie_id, genre_id, self.score(sum_rate, count_review), count_review, rating_version
+                )
+            else:
+                self.ranking.remove(movie_id)
+        except Exception:
+            logger.exception('Failed to update leaderboard for movie %s', movie_id)
+
+    def refresh(self, movie_ids):
+        """Relê os agregados dos filmes informados (uma consulta) e atualiza o ranking."""
+        if not movie_ids:
+            return
+        rows = db.session.execute(
+            select(Movie.id, Movie.genre_id, Movie.sum_rate, Movie.count_review, Movie.rating_version)
+            .where(Movie.id.in_(movie_ids))
+        ).all()
+        for row in rows:
+            self.record(*row)
+
+    def remove(self, movie_id):
+        try:
+            self.ranking.remove(movie_id)
+        except Exception:
+            logger.exception('Failed to remove movie %s from leaderboard', movie_id)
+
+    def rebuild(self):
+        """Monta o ranking a partir dos filmes avaliados. Retorna a quantidade de filmes."""
+        rows = db.session.execute(
+            select(Movie.id, Movie.genre_id, Movie.sum_rate, Movie.count_review, Movie.rating_version)
+            .where(Movie.count_review > 0)
+        ).all()
+        self.ranking.replace(
+            (movie_id, genre_id, self.score(sum_rate, count_review), count_review, rating_version)
+            for movie_id, genre_id, sum_rate, count_review, rating_version in rows
+        )
+        return len(rows)
+
+    def top(self, limit, genre_id=None, min_reviews=1):
+        """
+        Retorna [(movie_id, score, count_review)], montando o ranking se ainda não existir.
+
+        Raises:
+            ValueError: se `min_reviews` não for um dos limiares configurados.
+        """
+        thresholds = self.ranking.thresholds
+        if min_reviews not in thresholds:
+            raise ValueError(f"min_reviews must be one of {', '.join(map(str, thresholds))}")
+        if not self.ranking.is_built():
+            self.rebuild()
+        return self.ranking.top(limit, genre_id, min_reviews)
+
+
+leaderboard = Leaderboard()
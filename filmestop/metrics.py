@@ -0,0 +1,177 @@
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from flask_caching.signals import cache_view_hit, cache_view_miss
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from filmestop.db_pool import MeteredQueuePool
+from filmestop.extensions import db
+
+
+# Métricas por endpoint expostas em /metrics no formato texto do Prometheus:
+# - latência (histograma) e quantidade de respostas por status;
+# - consultas SQL e tempo gasto no banco;
+# - acertos e falhas do cache das rotas com `cache.cached`;
+# - pool de conexões (por bind): tempo de checkout, timeouts, conexões em uso
+#   e saturação (em uso / capacidade), para identificar falta de conexões.
+#
+# Cada aplicação tem o seu próprio registro de métricas (permite criar várias
+# aplicações no mesmo processo, como nos testes).
+
+# Requisições fora de qualquer rota (404) são agrupadas em um único rótulo
+UNMATCHED_ENDPOINT = 'unmatched'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# Rótulo do bind padrão (chave None em db.engines)
+DEFAULT_BIND = 'default'
+
+
+def _endpoint_labels():
+    return request.blueprint or '', request.endpoint or UNMATCHED_ENDPOINT
+
+
+class _AppMetrics:
+    """Registro e métricas de uma aplicação."""
+
+    def __init__(self):
+        self.registry = registry = CollectorRegistry()
+        labels = ['blueprint', 'endpoint']
+
+        self.request_latency = Histogram(
+            'filmestop_request_duration_seconds', 'Latência das requisições por endpoint.',
+            labels + ['method'], registry=registry, buckets=LATENCY_BUCKETS
+        )
+        self.responses = Counter(
+            'filmestop_responses_total', 'Respostas por endpoint e status HTTP.',
+            labels + ['method', 'status'], registry=registry
+        )
+        self.db_queries = Counter(
+            'filmestop_db_queries_total', 'Comandos SQL executados por endpoint.',
+            labels, registry=registry
+        )
+        self.db_time = Counter(
+            'filmestop_db_duration_seconds_total', 'Tempo gasto no banco por endpoint.',
+            labels, registry=registry
+        )
+        self.cache_requests = Counter(
+            'filmestop_cache_requests_total', 'Consultas ao cache das rotas por resultado (hit/miss).',
+            labels + ['result'], registry=registry
+        )
+        self.pool_checkout = Histogram(
+            'filmestop_db_pool_checkout_seconds', 'Tempo para obter uma conexão do pool.',
+            ['bind'], registry=registry, buckets=POOL_WAIT_BUCKETS
+        )
+        self.pool_timeouts = Counter(
+            'filmestop_db_pool_timeouts_total', 'Checkouts que estouraram o pool_timeout.',
+            ['bind'], registry=registry
+        )
+        self.pool_in_use = Gauge(
+            'filmestop_db_pool_connections_in_use', 'Conexões do pool em uso.',
+            ['bind'], registry=registry
+        )
+        self.pool_saturation = Gauge(
+            'filmestop_db_pool_saturation', 'Conexões em uso / capacidade do pool (pool_size + max_overflow).',
+            ['bind'], registry=registry
+        )
+
+    def watch_pool(self, bind, engine):
+        """Liga as métricas do pool da engine (apenas MeteredQueuePool)."""
+        if not isinstance(engine.pool, MeteredQueuePool):
+            return
+
+        def observe(seconds, timed_out):
+            self.pool_checkout.labels(bind).observe(seconds)
+            if timed_out:
+                self.pool_timeouts.labels(bind).inc()
+
+        def saturation():
+            capacity = engine.pool.capacity()
+            return engine.pool.checkedout() / capacity if capacity else 0.0
+
+        # engine.pool é lido na coleta: após engine.dispose() o pool é outro
+        engine.pool.observers.append(observe)
+        self.pool_in_use.labels(bind).set_function(lambda: engine.pool.checkedout())
+        self.pool_saturation.labels(bind).set_function(saturation)
+
+
+class Metrics:
+
+    def init_app(self, app):
+        app.extensions['metrics'] = current = _AppMetrics()
+        with app.app_context():
+            for bind, engine in db.engines.items():
+                current.watch_pool(bind or DEFAULT_BIND, engine)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+
+        cache_view_hit.connect(self._cache_hit, weak=False)
+        cache_view_miss.connect(self._cache_miss, weak=False)
+
+    @property
+    def current(self):
+        """Métricas da aplicação ativa."""
+        return current_app.extensions['metrics']
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.db_queries = 0
+        g.db_time = 0.0
+
+    def _finish_request(self, response):
+        if 'metrics_started' not in g or request.endpoint == 'metrics':
+            return response
+
+        current = self.current
+        blueprint, endpoint = _endpoint_labels()
+        elapsed = time.perf_counter() - g.metrics_started
+
+        current.request_latency.labels(blueprint, endpoint, request.method).observe(elapsed)
+        current.responses.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+        if g.db_queries:
+            current.db_queries.labels(blueprint, endpoint).inc(g.db_queries)
+            current.db_time.labels(blueprint, endpoint).inc(g.db_time)
+        return response
+
+    def _cache_result(self, result):
+        if has_request_context() and 'metrics' in current_app.extensions:
+            self.current.cache_requests.labels(*_endpoint_labels(), result).inc()
+
+    def _cache_hit(self, sender, **kwargs):
+        self._cache_result('hit')
+
+    def _cache_miss(self, sender, **kwargs):
+        self._cache_result('miss')
+
+    def _metrics_view(self):
+        return Response(generate_latest(self.current.registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+metrics = Metrics()
+
+
+# Os eventos são registrados em Engine (todas as engines, inclusive binds extras)
+# e só contabilizam comandos executados dentro de uma requisição.
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+
+    started = starts.pop()
+    if has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+        g.db_time += time.perf_counter() - started
@@ -24,6 +24,10 @@ class User(db.Model):
 # Define o modelo de filme
 class Movie(db.Model):
     __tablename__ = 'movies'
+    __table_args__ = (
+        # Atende a listagem por gênero paginada por cursor (genre_id = ? AND id > ?)
+        db.Index('ix_movies_genre_id_id', 'genre_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -45,6 +49,9 @@ class Movie(db.Model):
     # Informações agregadas de avaliação
     avg_rate = db.Column(db.Float)            # Média das notas atribuídas ao filme
     count_review = db.Column(db.Integer)      # Total de avaliações recebidas
+    sum_rate = db.Column(db.Integer)          # Soma das notas, base da média incremental
+    # Incrementada a cada alteração dos agregados; ordena as atualizações do ranking
+    rating_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
 
 # Define o catálogo de gêneros
@@ -59,6 +66,10 @@ class Catalogue_Genre(db.Model):
 # Define o modelo de aluguel de filme
 class Rent(db.Model):
     __tablename__ = 'rents'
+    __table_args__ = (
+        # Aluguéis de um usuário e verificação "usuário alugou o filme?"
+        db.Index('ix_rents_user_id_movie_id', 'user_id', 'movie_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -74,6 +85,12 @@ class Rent(db.Model):
 # Define o modelo de avaliação (review) de filme
 class Review(db.Model):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        # Uma avaliação por usuário e filme; também atende o LEFT JOIN de rented_movies
+        db.UniqueConstraint('user_id', 'movie_id', name='uq_reviews_user_id_movie_id'),
+        # Reviews de um filme (recalculo dos agregados)
+        db.Index('ix_reviews_movie_id', 'movie_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
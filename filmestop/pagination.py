@@ -0,0 +1,79 @@
+from flask import current_app, jsonify
+
+
+# Paginação por cursor (keyset): em vez de OFFSET, cada página começa logo após
+# o último id retornado, usando o índice da chave de ordenação. O custo de
+# qualquer página é o mesmo, independentemente do tamanho da tabela.
+#
+# Toda listagem é limitada: sem `limit`, a página tem DEFAULT_PAGE_SIZE itens.
+# O corpo é {"items": [...], "next_cursor": <id ou null>}, então um cliente
+# nunca recebe uma lista truncada sem saber que existe uma próxima página.
+
+
+def parse_page_args(args):
+    """
+    Lê e valida os parâmetros `limit` e `after` da query string.
+
+    Returns:
+        Tupla (limit, after), onde `after` é None na primeira página.
+
+    Raises:
+        ValueError: com a mensagem de erro a ser devolvida ao cliente.
+    """
+    max_size = current_app.config['MAX_PAGE_SIZE']
+    limit = args.get('limit', current_app.config['DEFAULT_PAGE_SIZE'])
+    after = args.get('after')
+
+    try:
+        limit = int(limit)
+        if not 1 <= limit <= max_size:
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError(f'limit must be an integer between 1 and {max_size}')
+
+    if after is not None:
+        try:
+            after = int(after)
+        except ValueError:
+            raise ValueError('after must be an integer cursor')
+
+    return limit, after
+
+
+def keyset_page(query, key_column, limit, after=None):
+    """
+    Aplica a paginação por cursor a uma query ordenada por `key_column`.
+
+    Busca `limit + 1` linhas para saber se existe uma próxima página sem
+    precisar de um COUNT.
+
+    Returns:
+        Tupla (items, next_cursor); next_cursor é None na última página.
+    """
+    if after is not None:
+        query = query.filter(key_column > after)
+
+    items = query.order_by(key_column).limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    return items, getattr(items[-1], key_column.key)
+
+
+def page_payload(items, next_cursor):
+    """Corpo de uma página: os itens e o cursor da próxima (None na última)."""
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def paginated_response(items, next_cursor):
+    """
+    Monta a resposta de uma página.
+
+    O cursor da próxima página vem no corpo (`next_cursor`) e também no
+    cabeçalho `X-Next-Cursor` (ausente na última página).
+    """
+    response = jsonify(page_payload(items, next_cursor))
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
@@ -0,0 +1,91 @@
+import logging
+import re
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+# Detector de N+1 e orçamento de consultas por rota.
+#
+# Quando QUERY_TRACKING está ligado (testes e homologação), cada comando SQL
+# executado durante a requisição é registrado. Ao final da requisição:
+# - se a rota declarou um orçamento com @query_budget(n) e executou mais de n
+#   comandos, há violação;
+# - se o mesmo SELECT (mesmo texto, parâmetros diferentes) se repetiu
+#   QUERY_REPEAT_THRESHOLD vezes ou mais, há suspeita de N+1.
+# Em QUERY_BUDGET_MODE = 'raise' a violação levanta QueryBudgetExceeded (faz o
+# teste falhar); em 'warn' ela é apenas registrada no log.
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries):
+    """Declara a quantidade máxima de comandos SQL que a rota pode executar."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def _statement_shape(statement):
+    return re.sub(r'\s+', ' ', statement).strip()
+
+
+class QueryTracker:
+
+    def init_app(self, app):
+        app.config.setdefault('QUERY_TRACKING', False)
+        app.config.setdefault('QUERY_BUDGET_MODE', 'warn')
+        app.config.setdefault('QUERY_REPEAT_THRESHOLD', 5)
+
+        if app.config['QUERY_TRACKING']:
+            app.before_request(self._start_request)
+            app.after_request(self._check_request)
+
+    def _start_request(self):
+        g.query_log = []
+
+    def _violations(self, statements):
+        violations = []
+
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None and len(statements) > budget:
+            violations.append(f'{len(statements)} queries exceed the budget of {budget}')
+
+        threshold = current_app.config['QUERY_REPEAT_THRESHOLD']
+        selects = Counter(s for s in statements if s.upper().startswith('SELECT'))
+        for shape, count in selects.items():
+            if count >= threshold:
+                violations.append(f'possible N+1: statement repeated {count} times: {shape[:200]}')
+
+        return violations
+
+    def _check_request(self, response):
+        statements = g.pop('query_log', None)
+        if statements is None:
+            return response
+
+        violations = self._violations(statements)
+        if violations:
+            message = f'{request.method} {request.path} ({request.endpoint}): ' + '; '.join(violations)
+            if current_app.config['QUERY_BUDGET_MODE'] == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+
+query_tracker = QueryTracker()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_log' in g:
+        g.query_log.append(_statement_shape(statement))
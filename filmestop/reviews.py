@@ -0,0 +1,159 @@
+from sqlalchemy import select, update, func, cast, tuple_, and_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from filmestop.extensions import db
+from filmestop.models import Movie, Rent, Review
+
+
+# Ingestão de avaliações em lote, usada pela rota /case/reviews/batch e pelo
+# comando `flask reviews import`. Em vez de uma sequência de consultas e um
+# commit por avaliação, o lote inteiro custa:
+# - uma consulta (rents LEFT JOIN reviews) para validar os aluguéis e achar as
+#   avaliações existentes;
+# - um único INSERT ... ON CONFLICT DO UPDATE em lote;
+# - um único UPDATE com GROUP BY recalculando os agregados dos filmes afetados.
+
+
+# INSERT com suporte a ON CONFLICT para cada banco suportado
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def upsert_reviews_statement():
+    """
+    INSERT ... ON CONFLICT (user_id, movie_id) DO UPDATE SET rate = excluded.rate.
+
+    Cria a avaliação ou troca a nota de uma existente em um único comando,
+    apoiado na restrição única de reviews: avaliações concorrentes do mesmo
+    usuário para o mesmo filme nunca geram duplicatas.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        raise NotImplementedError(f'Review upsert is not supported on {dialect}')
+
+    stmt = _UPSERT_INSERTS[dialect](Review)
+    return stmt.on_conflict_do_update(
+        index_elements=[Review.user_id, Review.movie_id],
+        set_={'rate': stmt.excluded.rate}
+    )
+
+
+def parse_review_item(item):
+    """
+    Valida um item do lote.
+
+    Returns:
+        Tupla (user_id, movie_id, rate).
+
+    Raises:
+        ValueError: com a mensagem de erro a ser devolvida ao cliente.
+    """
+    if not isinstance(item, dict) or any(item.get(field) is None for field in ('user_id', 'movie_id', 'rate')):
+        raise ValueError('Missing review information')
+
+    try:
+        user_id, movie_id = int(item['user_id']), int(item['movie_id'])
+    except (ValueError, TypeError):
+        raise ValueError('user_id and movie_id must be integers')
+
+    try:
+        rate = int(item['rate'])
+        if not 0 <= rate <= 100:
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError('Rate must be an integer between 0 and 100')
+
+    return user_id, movie_id, rate
+
+
+def recompute_movie_ratings(movie_ids=None):
+    """
+    Recalcula soma, contador e média dos filmes informados (ou de todos os
+    filmes avaliados, se `movie_ids` for None) com um único
+    UPDATE ... FROM (SELECT ... GROUP BY movie_id). Não faz commit.
+    """
+    if movie_ids is not None and not movie_ids:
+        return
+
+    totals = select(
+        Review.movie_id.label('movie_id'),
+        func.sum(Review.rate).label('sum_rate'),
+        func.count(Review.id).label('count_review')
+    )
+    if movie_ids is not None:
+        totals = totals.where(Review.movie_id.in_(movie_ids))
+    totals = totals.group_by(Review.movie_id).subquery()
+
+    db.session.execute(
+        update(Movie)
+        .where(Movie.id == totals.c.movie_id)
+        .values(
+            sum_rate=totals.c.sum_rate,
+            count_review=totals.c.count_review,
+            avg_rate=func.round(cast(cast(totals.c.sum_rate, db.Float) / totals.c.count_review, db.Numeric), 2),
+            rating_version=Movie.rating_version + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bulk_upsert_reviews(items):
+    """
+    Grava um lote de avaliações em uma única transação.
+
+    Itens repetidos para o mesmo par (usuário, filme) prevalecem na ordem do
+    envio: vale a última nota.
+
+    Returns:
+        Tupla (results, affected_movie_ids). `results` tem um dicionário por
+        item, na ordem do envio, com `index`, `status` (201 criada, 200
+        atualizada, 400 inválida, 403 filme não alugado) e `error` quando houver.
+    """
+    results = [None] * len(items)
+    latest = {}
+
+    for index, item in enumerate(items):
+        try:
+            user_id, movie_id, rate = parse_review_item(item)
+        except ValueError as e:
+            results[index] = {'index': index, 'status': 400, 'error': str(e)}
+        else:
+            latest.setdefault((user_id, movie_id), []).append((index, rate))
+
+    if not latest:
+        return results, set()
+
+    # Uma única consulta valida os aluguéis e traz a avaliação existente de cada par
+    rows = db.session.execute(
+        select(Rent.user_id, Rent.movie_id, Review.id)
+        .outerjoin(Review, and_(Review.user_id == Rent.user_id, Review.movie_id == Rent.movie_id))
+        .where(tuple_(Rent.user_id, Rent.movie_id).in_(list(latest)))
+        .distinct()
+    ).all()
+    review_ids = {(row.user_id, row.movie_id): row.id for row in rows}
+
+    to_upsert = []
+    for pair, entries in latest.items():
+        if pair not in review_ids:
+            for index, _ in entries:
+                results[index] = {'index': index, 'status': 403, 'error': 'You can only rate movies you have rented'}
+            continue
+
+        user_id, movie_id = pair
+        to_upsert.append({'user_id': user_id, 'movie_id': movie_id, 'rate': entries[-1][1]})
+
+        status = 201 if review_ids[pair] is None else 200
+        for index, item_rate in entries:
+            results[index] = {'index': index, 'status': status, 'user_id': user_id, 'movie_id': movie_id, 'rate': item_rate}
+
+    if to_upsert:
+        # Upsert em lote (executemany): cria ou atualiza cada avaliação
+        db.session.execute(upsert_reviews_statement(), to_upsert)
+
+    affected_movie_ids = {pair[1] for pair in latest if pair in review_ids}
+    recompute_movie_ratings(affected_movie_ids)
+    db.session.commit()
+
+    return results, affected_movie_ids
@@ -1,54 +1,197 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from ..models import User, Movie, Catalogue_Genre, Rent , Review
 from datetime import datetime
-from sqlalchemy import text
+from sqlalchemy import text, func, case, cast, update, insert, select
 from filmestop.extensions import db, cache
+from filmestop.pagination import parse_page_args, keyset_page, paginated_response
+from filmestop.serializers import serialize_movies, serialize_movie_detail
+from filmestop.reviews import bulk_upsert_reviews, upsert_reviews_statement
+from filmestop.query_budget import query_budget
+from filmestop.compression import cached_compressed
+from filmestop.leaderboard import leaderboard
+from filmestop.cache_tags import (
+    TAGGED_VIEW_TIMEOUT, CATALOGUE_TAG, GENRE_STATS_TAG, GENRES_TAG, genre_tag, movie_tag, invalidate_tags,
+    tagged_key_prefix, conditional_get
+)
 import time
 
 main = Blueprint('main', __name__)
 
 
+def parse_rent_data(rent_data):
+    """
+    Valida os campos de um aluguel.
+
+    Returns:
+        Tupla (start_date, rent_days).
+
+    Raises:
+        ValueError: com a mensagem de erro a ser devolvida ao cliente.
+    """
+    start_date = rent_data.get('start_date')
+    rent_days = rent_data.get('rent_days')
+
+    if not start_date or rent_days is None:
+        raise ValueError('Missing rent information')
+
+    try:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        raise ValueError('Invalid start_date format. Use YYYY-MM-DD')
+
+    # Aceita inteiros (ou texto com um inteiro, como a nota das avaliações);
+    # booleanos e números fracionários são recusados em vez de truncados
+    try:
+        if isinstance(rent_days, bool) or not isinstance(rent_days, (int, str)):
+            raise ValueError
+        rent_days = int(rent_days)
+        if rent_days <= 0:
+            raise ValueError
+    except ValueError:
+        raise ValueError('rent_days must be a positive integer')
+
+    return start_date, rent_days
+
+
+def parse_rent_ids(item):
+    """
+    Valida os ids de um item do lote de aluguéis.
+
+    Returns:
+        Tupla (user_id, movie_id).
+
+    Raises:
+        ValueError: com a mensagem de erro a ser devolvida ao cliente.
+    """
+    ids = (item.get('user_id'), item.get('movie_id'))
+    if None in ids:
+        raise ValueError('Missing rent information')
+
+    # Como em rent_days: 1.9 ou true não viram o usuário 1
+    try:
+        if any(isinstance(value, bool) or not isinstance(value, (int, str)) for value in ids):
+            raise ValueError
+        return tuple(int(value) for value in ids)
+    except ValueError:
+        raise ValueError('user_id and movie_id must be integers')
+
+
+def serialize_rent(rent):
+    return {
+        'id': rent.id,
+        'user_id': rent.user_id,
+        'movie_id': rent.movie_id,
+        'start_date': rent.start_date.isoformat(),
+        'rent_days': rent.rent_days
+    }
+
+
 def recalculate_movie_rating(movie_id):
     
     """
-    Recalcula os campos de média de avaliação de filme e incrementa o contador de avaliações
-    Função que garante a feature opcional h
+    Recalcula do zero os campos agregados de avaliação de um filme
+    (soma, contador e média) a partir da tabela de reviews.
+
+    Usado para reconciliar os agregados; o fluxo normal de avaliação aplica
+    apenas a variação com `apply_movie_rating_delta`.
 
     Returns:
         Response 200 com mensagem de sucesso.
     """
-    reviews = Review.query.filter_by(movie_id=movie_id).all()
+    total, count_review = db.session.query(
+        func.coalesce(func.sum(Review.rate), 0),
+        func.count(Review.id)
+    ).filter(Review.movie_id == movie_id).one()
 
-    if not reviews:
-        avg_rate = 0
-        count_review = 0
-    else:
-        total = sum([review.rate for review in reviews])
-        count_review = len(reviews)
-        avg_rate = total / count_review
+    avg_rate = total / count_review if count_review else 0
 
     # Atualiza o filme
     movie = db.session.get(Movie, movie_id)
+    movie.sum_rate = total
     movie.avg_rate = round(avg_rate, 2)
     movie.count_review = count_review
+    movie.rating_version = Movie.rating_version + 1
+    db.session.flush()
 
+    genre_id, rating_version = movie.genre_id, movie.rating_version
     db.session.commit()
+    leaderboard.record(movie_id, genre_id, total, count_review, rating_version)
     return {'message': 'Movie rating recalculated', 'new_avg_rate': avg_rate}, 200
 
 
+def apply_movie_rating_delta(movie_id, rate_delta, count_delta):
+    """
+    Aplica a variação de uma avaliação aos agregados do filme em um único
+    UPDATE atômico, sem reler as reviews do filme.
+
+    - Nova avaliação: rate_delta = nota, count_delta = 1
+    - Avaliação editada: rate_delta = nota nova - nota antiga, count_delta = 0
+
+    Os deltas podem ser valores ou expressões SQL avaliadas no próprio UPDATE.
+
+    A expressão usa os valores atuais da linha no próprio banco, então
+    avaliações concorrentes do mesmo filme não sobrescrevem umas às outras.
+    Não faz commit: participa da transação de quem chamou.
+
+    Returns:
+        Dicionário com a mensagem, a nova média, os novos soma e contador e a
+        nova `rating_version` do filme.
+    """
+    sum_rate = func.coalesce(Movie.sum_rate, 0) + rate_delta
+    count_review = func.coalesce(Movie.count_review, 0) + count_delta
+    avg_rate = case(
+        (count_review > 0, func.round(cast(cast(sum_rate, db.Float) / count_review, db.Numeric), 2)),
+        else_=0
+    )
+
+    updated = db.session.execute(
+        update(Movie)
+        .where(Movie.id == movie_id)
+        .values(sum_rate=sum_rate, count_review=count_review, avg_rate=avg_rate,
+                rating_version=Movie.rating_version + 1)
+        .returning(Movie.avg_rate, Movie.sum_rate, Movie.count_review, Movie.rating_version)
+        .execution_options(synchronize_session=False)
+    ).one()
+
+    return {
+        'message': 'Movie rating updated',
+        'new_avg_rate': float(updated.avg_rate),
+        'sum_rate': updated.sum_rate,
+        'count_review': updated.count_review,
+        'rating_version': updated.rating_version
+    }
+
+
+
+def _movie_list_tags():
+    # Listagem filtrada depende só do gênero; a completa, do catálogo inteiro.
+    # Ambas mostram o nome dos gêneros (GENRES_TAG)
+    genre_id = request.args.get('genre_id')
+    if genre_id is not None and genre_id.isdigit():
+        return [genre_tag(int(genre_id)), GENRES_TAG]
+    return [CATALOGUE_TAG, GENRES_TAG]
+
+
+def _movie_detail_tags():
+    return [movie_tag(request.view_args['movie_id']), GENRES_TAG]
+
 
 #feature 1 - O usuário deve ser capaz de visualizar a lista de filmes disponíveis por gênero;
 
 @main.route('/movies', methods=['GET'])
-@cache.cached(timeout=60, query_string=True)
+@query_budget(2)
+@conditional_get(_movie_list_tags)
+@cached_compressed(timeout=TAGGED_VIEW_TIMEOUT, query_string=True, key_prefix=tagged_key_prefix(_movie_list_tags))
 def get_movies_by_genre_id():
     """
     Lista todos os filmes ou filtra por gênero
 
     Este endpoint atende ao requisito 1 do Case.
 
-    - Se nenhum parâmetro for informado, retorna todos os filmes cadastrados.
+    - Se nenhum parâmetro for informado, lista todos os filmes cadastrados.
     - Se `genre_id` for fornecido, retorna apenas os filmes desse gênero.
+    - A listagem é paginada por cursor: use `limit` e `after`; o cursor da
+      próxima página vem em `next_cursor` (e no cabeçalho `X-Next-Cursor`).
 
     ---
     tags:
@@ -59,31 +202,51 @@ def get_movies_by_genre_id():
         type: integer
         required: false
         description: ID do gênero para filtrar filmes
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de filmes na página (padrão 100)
+      - name: after
+        in: query
+        type: integer
+        required: false
+        description: Cursor `next_cursor` retornado pela página anterior
     responses:
       200:
         description: Lista de filmes retornada com sucesso
+        headers:
+          X-Next-Cursor:
+            type: integer
+            description: Cursor da próxima página (ausente na última)
         schema:
-          type: array
-          items:
-            type: object
-            properties:
-              id:
-                type: integer
-                example: 1
-              name:
-                type: string
-                example: "Titanic"
-              director:
-                type: string
-                example: "Leonardo"
-              year:
-                type: integer
-                example: 1999
-              genre:
-                type: string
-                example: "Drama"
+          type: object
+          properties:
+            items:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 1
+                  name:
+                    type: string
+                    example: "Titanic"
+                  director:
+                    type: string
+                    example: "Leonardo"
+                  year:
+                    type: integer
+                    example: 1999
+                  genre:
+                    type: string
+                    example: "Drama"
+            next_cursor:
+              type: integer
+              description: Cursor da próxima página (null na última)
       400:
-        description: O parâmetro genre_id não é um número válido
+        description: O parâmetro genre_id, limit ou after não é válido
         schema:
           type: object
           properties:
@@ -101,38 +264,33 @@ def get_movies_by_genre_id():
     """
     genre_id = request.args.get('genre_id')
 
-    if genre_id is None:
-        # Lista completa de filmes
-        movies = Movie.query.all()
-        return jsonify([{
-            'id': m.id,
-            'name': m.name,
-            'director': m.director,
-            'year': m.year,
-            'genre': m.genre.genre_name if m.genre else None
-        } for m in movies]), 200
-
     try:
-        genre_id = int(genre_id)
-    except ValueError:
-        return jsonify({'error': 'genre_id must be an integer'}), 400
+        limit, after = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = Movie.query
+
+    if genre_id is not None:
+        try:
+            genre_id = int(genre_id)
+        except ValueError:
+            return jsonify({'error': 'genre_id must be an integer'}), 400
+
+        query = query.filter_by(genre_id=genre_id)
 
-    movies = Movie.query.filter_by(genre_id=genre_id).all()
-    if not movies:
+    movies, next_cursor = keyset_page(query, Movie.id, limit, after)
+    if genre_id is not None and not movies and after is None:
         return jsonify({'error': f'No movies found for genre id: {genre_id}'}), 404
 
-    return jsonify([{
-        'id': m.id,
-        'name': m.name,
-        'director': m.director,
-        'year': m.year,
-        'genre': m.genre.genre_name if m.genre else None
-    } for m in movies]), 200
+    return paginated_response(serialize_movies(movies), next_cursor), 200
 
 
 #feature 2 - o usuário deve ser capaz de listar todas as informações sobre um determinado filme;
 @main.route('/movies/<int:movie_id>', methods=['GET'])
-@cache.cached(timeout=60)
+@query_budget(2)
+@conditional_get(_movie_detail_tags)
+@cached_compressed(timeout=TAGGED_VIEW_TIMEOUT, key_prefix=tagged_key_prefix(_movie_detail_tags))
 def get_movie_by_id(movie_id):
     """
     Retorna os detalhes de um filme específico
@@ -159,20 +317,187 @@ def get_movie_by_id(movie_id):
     if not movie:
         return jsonify({'message': f'There is no movie with the ID: {movie_id}'}), 404
 
-    return jsonify({
-        'id': movie.id,
-        'name': movie.name,
-        'director': movie.director,
-        'year': movie.year,
-        'avg_rate': movie.avg_rate,
-        'count_review': movie.count_review,
-        'genre': movie.genre.genre_name if movie.genre else None
-    }), 200
+    return jsonify(serialize_movie_detail(movie)), 200
+
+
+@main.route('/movies/top', methods=['GET'])
+@query_budget(3)
+def get_top_rated_movies():
+    """
+    Ranking dos filmes mais bem avaliados
+
+    Ordena pela nota bayesiana (média puxada para LEADERBOARD_PRIOR_MEAN
+    quando há poucas avaliações). O ranking é mantido incrementalmente a cada
+    avaliação, então a consulta não percorre a tabela de filmes.
+
+    ---
+    tags:
+      - CASE-Filmes
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade de filmes (padrão 10)
+      - name: genre_id
+        in: query
+        type: integer
+        required: false
+        description: Restringe o ranking a um gênero
+      - name: min_reviews
+        in: query
+        type: integer
+        required: false
+        enum: [1, 5, 10, 25, 50, 100]
+        description: Mínimo de avaliações para entrar no ranking (padrão 1; um dos limiares de LEADERBOARD_REVIEW_THRESHOLDS)
+    responses:
+      200:
+        description: Filmes do maior para o menor score
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                example: 1
+              name:
+                type: string
+                example: "Titanic"
+              genre:
+                type: string
+                example: "Drama"
+              avg_rate:
+                type: number
+                example: 87.5
+              count_review:
+                type: integer
+                example: 12
+              score:
+                type: number
+                example: 70.68
+      400:
+        description: Parâmetro inválido
+    """
+    max_size = current_app.config['MAX_PAGE_SIZE']
+    try:
+        limit = int(request.args.get('limit', 10))
+        if not 1 <= limit <= max_size:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': f'limit must be an integer between 1 and {max_size}'}), 400
+
+    try:
+        genre_id = request.args.get('genre_id')
+        genre_id = int(genre_id) if genre_id is not None else None
+        min_reviews = int(request.args.get('min_reviews', 1))
+    except ValueError:
+        return jsonify({'error': 'genre_id and min_reviews must be integers'}), 400
+
+    try:
+        ranking = leaderboard.top(limit, genre_id, min_reviews)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Só os filmes do ranking, pela chave primária
+    movies = {movie.id: movie for movie in db.session.scalars(
+        select(Movie).where(Movie.id.in_([movie_id for movie_id, _, _ in ranking]))
+    )}
+
+    result = []
+    for movie_id, score, _ in ranking:
+        if movie_id in movies:
+            data = serialize_movie_detail(movies[movie_id])
+            data['score'] = round(score, 2)
+            result.append(data)
+
+    return jsonify(result), 200
+
+
+def _genre_stats_tags():
+    # A resposta também traz o nome de cada gênero (GENRES_TAG)
+    return [GENRE_STATS_TAG, GENRES_TAG]
+
+
+@main.route('/genres/stats', methods=['GET'])
+@query_budget(1)
+@conditional_get(_genre_stats_tags)
+@cached_compressed(timeout=TAGGED_VIEW_TIMEOUT, key_prefix=tagged_key_prefix(_genre_stats_tags))
+def get_genre_stats():
+    """
+    Estatísticas agregadas por gênero
+
+    Quantidade de filmes, total de aluguéis, quantidade de avaliações e nota
+    média (ponderada por avaliação) de cada gênero, calculadas com um único
+    GROUP BY. As avaliações vêm dos agregados mantidos em `movies` (soma e
+    contador), sem reler a tabela de reviews. A resposta fica em cache e é
+    invalidada por qualquer escrita em filmes, aluguéis ou avaliações.
+
+    ---
+    tags:
+      - CASE-Filmes
+    responses:
+      200:
+        description: Uma linha por gênero
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              genre_id:
+                type: integer
+                example: 1
+              genre:
+                type: string
+                example: "Drama"
+              movie_count:
+                type: integer
+                example: 120
+              total_rentals:
+                type: integer
+                example: 3400
+              review_count:
+                type: integer
+                example: 910
+              mean_rating:
+                type: number
+                example: 71.35
+    """
+    rentals = (
+        select(Rent.movie_id, func.count().label('rentals'))
+        .group_by(Rent.movie_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(
+            Catalogue_Genre.id,
+            Catalogue_Genre.genre_name,
+            func.count(Movie.id).label('movie_count'),
+            func.coalesce(func.sum(rentals.c.rentals), 0).label('total_rentals'),
+            func.coalesce(func.sum(Movie.count_review), 0).label('review_count'),
+            func.coalesce(func.sum(Movie.sum_rate), 0).label('sum_rate')
+        )
+        .select_from(Catalogue_Genre)
+        .outerjoin(Movie, Movie.genre_id == Catalogue_Genre.id)
+        .outerjoin(rentals, rentals.c.movie_id == Movie.id)
+        .group_by(Catalogue_Genre.id, Catalogue_Genre.genre_name)
+        .order_by(Catalogue_Genre.id)
+    ).all()
+
+    return jsonify([{
+        'genre_id': row.id,
+        'genre': row.genre_name,
+        'movie_count': row.movie_count,
+        'total_rentals': int(row.total_rentals),
+        'review_count': int(row.review_count),
+        'mean_rating': round(row.sum_rate / row.review_count, 2) if row.review_count else None
+    } for row in rows]), 200
 
 
 #feature 3  O usuário deve ser capaz de alugar um filme - New migration for Rent table 
 
 @main.route('/users/<int:user_id>/movies/<int:movie_id>/rent', methods=['POST'])
+@query_budget(3)
 def rent_movie(user_id, movie_id):
     """
     Realiza o aluguel de um filme
@@ -209,6 +534,7 @@ def rent_movie(user_id, movie_id):
               example: "2025-01-01"
             rent_days:
               type: integer
+              minimum: 1
               example: 3
     responses:
       201:
@@ -236,17 +562,10 @@ def rent_movie(user_id, movie_id):
       404:
         description: Usuário ou filme não encontrado
     """
-    rent_data = request.get_json()
-    start_date = rent_data.get('start_date')
-    rent_days = rent_data.get('rent_days')
-
-    if not all([start_date, rent_days]):
-        return jsonify({'error': 'Missing rent information'}), 400
-
     try:
-        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-    except ValueError:
-        return jsonify({'error': 'Invalid start_date format. Use YYYY-MM-DD'}), 400
+        start_date, rent_days = parse_rent_data(request.get_json())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     user = db.session.get(User, user_id)
     movie = db.session.get(Movie, movie_id)
@@ -263,21 +582,144 @@ def rent_movie(user_id, movie_id):
         rent_days=rent_days
     )
     db.session.add(new_rent)
+    db.session.flush()
+    # Serializa antes do commit: depois dele o objeto expira e seria recarregado do banco
+    rent = serialize_rent(new_rent)
     db.session.commit()
 
+    invalidate_tags(GENRE_STATS_TAG)
+
     return jsonify({
         'message': 'Successfully created new movie rent',
-        'rent': {
-            'id': new_rent.id,
-            'user_id': new_rent.user_id,
-            'movie_id': new_rent.movie_id,
-            'start_date': new_rent.start_date.isoformat(),
-            'rent_days': new_rent.rent_days
-        }
+        'rent': rent
     }), 201
 
+
+@main.route('/rents/batch', methods=['POST'])
+def rent_movies_batch():
+    """
+    Realiza vários aluguéis em uma única requisição
+
+    Recebe uma lista de aluguéis, valida usuários e filmes com uma consulta
+    `IN` para cada tabela e grava todos os aluguéis válidos em uma única
+    transação. Cada item recebe seu próprio resultado, na mesma ordem do envio.
+
+    ---
+    tags:
+      - CASE-Aluguéis
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            required:
+              - user_id
+              - movie_id
+              - start_date
+              - rent_days
+            properties:
+              user_id:
+                type: integer
+                example: 1
+              movie_id:
+                type: integer
+                example: 2
+              start_date:
+                type: string
+                format: date
+                example: "2025-01-01"
+              rent_days:
+                type: integer
+                minimum: 1
+                example: 3
+    responses:
+      200:
+        description: Lote processado; cada item traz status 201, 400 ou 404
+        schema:
+          type: object
+          properties:
+            created:
+              type: integer
+            failed:
+              type: integer
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  index:
+                    type: integer
+                  status:
+                    type: integer
+                  rent:
+                    type: object
+                  error:
+                    type: string
+      400:
+        description: Corpo não é uma lista ou excede o tamanho máximo do lote
+    """
+    items = request.get_json()
+    max_size = current_app.config['MAX_BATCH_SIZE']
+
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Rent batch must be a non-empty list'}), 400
+    if len(items) > max_size:
+        return jsonify({'error': f'Rent batch cannot exceed {max_size} items'}), 400
+
+    results = [None] * len(items)
+    parsed = {}
+
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError('Missing rent information')
+            user_id, movie_id = parse_rent_ids(item)
+            start_date, rent_days = parse_rent_data(item)
+        except ValueError as e:
+            results[index] = {'index': index, 'status': 400, 'error': str(e)}
+        else:
+            parsed[index] = {'user_id': user_id, 'movie_id': movie_id, 'start_date': start_date, 'rent_days': rent_days}
+
+    # Uma consulta por tabela para validar a existência de todos os ids do lote
+    user_ids = {row['user_id'] for row in parsed.values()}
+    movie_ids = {row['movie_id'] for row in parsed.values()}
+    existing_users = set(db.session.scalars(select(User.id).where(User.id.in_(user_ids)))) if user_ids else set()
+    existing_movies = set(db.session.scalars(select(Movie.id).where(Movie.id.in_(movie_ids)))) if movie_ids else set()
+
+    to_insert = []
+    for index, row in parsed.items():
+        if row['user_id'] not in existing_users:
+            results[index] = {'index': index, 'status': 404, 'error': 'User id not found'}
+        elif row['movie_id'] not in existing_movies:
+            results[index] = {'index': index, 'status': 404, 'error': 'Movie id not found'}
+        else:
+            to_insert.append((index, row))
+
+    if to_insert:
+        # INSERT em lote (executemany) com RETURNING na ordem dos parâmetros
+        rent_ids = db.session.scalars(
+            insert(Rent).returning(Rent.id, sort_by_parameter_order=True),
+            [row for _, row in to_insert]
+        ).all()
+        db.session.commit()
+        invalidate_tags(GENRE_STATS_TAG)
+
+        for (index, row), rent_id in zip(to_insert, rent_ids):
+            rent = dict(row, id=rent_id, start_date=row['start_date'].isoformat())
+            results[index] = {'index': index, 'status': 201, 'rent': rent}
+
+    return jsonify({
+        'created': len(to_insert),
+        'failed': len(items) - len(to_insert),
+        'results': results
+    }), 200
+
 #feature 4 - o usuário deve ser capaz de associar uma nota a cada filme já alugado;
 @main.route('/users/<int:user_id>/movies/<int:movie_id>/review', methods=['POST'])
+@query_budget(5)
 def set_review_rate(user_id, movie_id):
     """
     Avalia um filme alugado
@@ -336,7 +778,10 @@ def set_review_rate(user_id, movie_id):
         return jsonify({'error': 'Rate must be an integer between 0 and 100'}), 400
 
     user = db.session.get(User, user_id)
-    movie = db.session.get(Movie, movie_id)
+    # A linha do filme fica travada (SELECT ... FOR UPDATE) até o commit: duas
+    # avaliações concorrentes do mesmo filme passam a ser aplicadas uma depois
+    # da outra, e a segunda já enxerga a review gravada pela primeira.
+    movie = db.session.get(Movie, movie_id, with_for_update=True)
 
     if not user or not movie:
         return jsonify({'error': 'User or movie not found'}), 404
@@ -345,23 +790,98 @@ def set_review_rate(user_id, movie_id):
     if not rented:
         return jsonify({'error': 'You can only rate movies you have rented'}), 403
 
-    existing_review = Review.query.filter_by(user_id=user_id, movie_id=movie_id).first()
-    if existing_review:
-        existing_review.rate = rate
-    else:
-        new_review = Review(user_id=user_id, movie_id=movie_id, rate=rate)
-        db.session.add(new_review)
-
+    # A variação dos agregados é calculada no próprio UPDATE a partir da nota
+    # anterior (se houver, lida já com o filme travado), e por isso é aplicada
+    # antes do upsert da avaliação. Os dois comandos são gravados na mesma
+    # transação.
+    previous_rate = (
+        select(Review.rate)
+        .where(Review.user_id == user_id, Review.movie_id == movie_id)
+        .scalar_subquery()
+    )
+    rating_info = apply_movie_rating_delta(
+        movie_id,
+        rate - func.coalesce(previous_rate, 0),
+        case((previous_rate.is_(None), 1), else_=0)
+    )
+    db.session.execute(upsert_reviews_statement().values(user_id=user_id, movie_id=movie_id, rate=rate))
+    genre_id = movie.genre_id  # lido antes do commit, que expira o objeto
     db.session.commit()
 
-    response, status = recalculate_movie_rating(movie_id)
+    # A nota só aparece no detalhe do filme (e nas estatísticas); as listagens não mudam
+    invalidate_tags(movie_tag(movie_id), GENRE_STATS_TAG)
+    leaderboard.record(movie_id, genre_id, rating_info['sum_rate'], rating_info['count_review'],
+                       rating_info.pop('rating_version'))
+
     return jsonify({
         'message': 'Review saved and movie rating updated',
-        'rating_info': response
-    }), status
+        'rating_info': rating_info
+    }), 200
+
+@main.route('/reviews/batch', methods=['POST'])
+def set_review_rates_batch():
+    """
+    Avalia vários filmes alugados em uma única requisição
+
+    Valida todos os aluguéis com uma única consulta, grava as avaliações em lote
+    (criando ou atualizando) e recalcula a média uma única vez por filme afetado.
+    Cada item recebe seu próprio resultado, na mesma ordem do envio.
+
+    ---
+    tags:
+      - CASE-Avaliações
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            required:
+              - user_id
+              - movie_id
+              - rate
+            properties:
+              user_id:
+                type: integer
+                example: 1
+              movie_id:
+                type: integer
+                example: 2
+              rate:
+                type: integer
+                minimum: 0
+                maximum: 100
+                example: 80
+    responses:
+      200:
+        description: Lote processado; cada item traz status 201, 200, 400 ou 403
+      400:
+        description: Corpo não é uma lista ou excede o tamanho máximo do lote
+    """
+    items = request.get_json()
+    max_size = current_app.config['MAX_BATCH_SIZE']
+
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Review batch must be a non-empty list'}), 400
+    if len(items) > max_size:
+        return jsonify({'error': f'Review batch cannot exceed {max_size} items'}), 400
+
+    results, affected_movie_ids = bulk_upsert_reviews(items)
+    invalidate_tags(GENRE_STATS_TAG, *[movie_tag(movie_id) for movie_id in affected_movie_ids])
+    leaderboard.refresh(affected_movie_ids)
+
+    saved = sum(1 for result in results if result['status'] in (200, 201))
+    return jsonify({
+        'saved': saved,
+        'failed': len(items) - saved,
+        'results': results
+    }), 200
 
 # feature 5 -  usuário deve ser capaz de visualizar todos os filmes que ele já alugou com as notas que ele atribuiu para cada filme e a data de locação.
 @main.route('/users/<int:user_id>/rented_movies', methods=['GET'])
+@query_budget(1)
 def get_rented_movies(user_id):
     """
     Lista os filmes alugados por um usuário
@@ -425,15 +945,7 @@ def get_rented_movies(user_id):
             r.user_id = :user_id
     """)
 
-    result = db.session.execute(query, {'user_id': user_id})
-    movies = [
-        {
-            'rent_id': row.rent_id,
-            'movie_name': row.movie_name,
-            'rent_start_date': row.rent_start_date,
-            'movie_rating': row.movie_rating
-        }
-        for row in result
-    ]
+    # As linhas (Row) são serializadas diretamente pelo provider JSON da aplicação
+    movies = db.session.execute(query, {'user_id': user_id}).all()
 
     return jsonify(movies), 200
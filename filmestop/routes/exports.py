@@ -0,0 +1,38 @@
+from flask import Blueprint, Response, jsonify, current_app, stream_with_context
+from filmestop.exports import EXPORTABLE_TABLES, iter_ndjson
+
+exports_bp = Blueprint('exports', __name__)
+
+
+@exports_bp.route('/<table_name>', methods=['GET'])
+def export_table(table_name):
+    """
+    Exporta uma tabela completa em NDJSON
+
+    Envia as linhas de `movies`, `rents` ou `reviews` como JSON delimitado por
+    quebra de linha, em streaming a partir de um cursor do lado do servidor.
+    O uso de memória não depende do tamanho da tabela.
+
+    ---
+    tags:
+      - Exportação
+    produces:
+      - application/x-ndjson
+    parameters:
+      - name: table_name
+        in: path
+        type: string
+        required: true
+        enum: [movies, rents, reviews]
+        description: Tabela a ser exportada
+    responses:
+      200:
+        description: Uma linha JSON por registro, ordenadas por id
+      404:
+        description: Tabela não exportável
+    """
+    if table_name not in EXPORTABLE_TABLES:
+        return jsonify({'error': f'Table {table_name} cannot be exported'}), 404
+
+    rows = iter_ndjson(table_name, current_app.config['EXPORT_CHUNK_SIZE'])
+    return Response(stream_with_context(rows), mimetype='application/x-ndjson')
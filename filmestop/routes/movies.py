@@ -1,5 +1,10 @@
 from flask import Blueprint, jsonify, request
 from filmestop.models import db, Movie, Catalogue_Genre
+from filmestop.pagination import parse_page_args, keyset_page, paginated_response
+from filmestop.serializers import serialize_movie, serialize_movies
+from filmestop.cache_tags import CATALOGUE_TAG, GENRE_STATS_TAG, genre_tag, movie_tag, invalidate_tags
+from filmestop.leaderboard import leaderboard
+from filmestop.query_budget import query_budget
 
 movies_bp = Blueprint('movies', __name__)
 
@@ -66,52 +71,77 @@ def create_movie():
     db.session.add(new_movie)
     db.session.commit()
 
+    invalidate_tags(CATALOGUE_TAG, GENRE_STATS_TAG, genre_tag(new_movie.genre_id))
+
     return jsonify({'message': 'Movie created', 'movie_id': new_movie.id}), 201
 
 
 @movies_bp.route('', methods=['GET'])
+@query_budget(2)
 def get_movies():
     """
     Lista todos os filmes
 
     Retorna todos os filmes cadastrados com seus respectivos dados e nome do gênero.
+    A listagem é paginada por cursor; o cursor da próxima página vem em `next_cursor`
+    (e no cabeçalho `X-Next-Cursor`).
 
     ---
     tags:
       - CRUD-Filmes
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de filmes na página (padrão 100)
+      - name: after
+        in: query
+        type: integer
+        required: false
+        description: Cursor `next_cursor` retornado pela página anterior
     responses:
       200:
         description: Lista de filmes retornada com sucesso
+        headers:
+          X-Next-Cursor:
+            type: integer
+            description: Cursor da próxima página (ausente na última)
         schema:
-          type: array
-          items:
-            type: object
-            properties:
-              id:
-                type: integer
-              name:
-                type: string
-              director:
-                type: string
-              year:
-                type: integer
-              genre:
-                type: string
+          type: object
+          properties:
+            items:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                  name:
+                    type: string
+                  director:
+                    type: string
+                  year:
+                    type: integer
+                  genre:
+                    type: string
+            next_cursor:
+              type: integer
+              description: Cursor da próxima página (null na última)
+      400:
+        description: Parâmetros de paginação inválidos
     """
-    movies = Movie.query.all()
-    return jsonify([
-        {
-            'id': movie.id,
-            'name': movie.name,
-            'director': movie.director,
-            'year': movie.year,
-            'genre': movie.genre.genre_name if movie.genre else None
-        }
-        for movie in movies
-    ])
+    try:
+        limit, after = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    movies, next_cursor = keyset_page(Movie.query, Movie.id, limit, after)
+    return paginated_response(serialize_movies(movies), next_cursor)
 
 
 @movies_bp.route('/<int:movie_id>', methods=['GET'])
+@query_budget(2)
 def get_movie(movie_id):
     """
     Busca um filme por ID
@@ -137,13 +167,7 @@ def get_movie(movie_id):
     if not movie:
         return jsonify({'error': 'Movie not found'}), 404
 
-    return jsonify({
-        'id': movie.id,
-        'name': movie.name,
-        'director': movie.director,
-        'year': movie.year,
-        'genre': movie.genre.genre_name if movie.genre else None
-    })
+    return jsonify(serialize_movie(movie))
 
 
 @movies_bp.route('/<int:movie_id>', methods=['PUT'])
@@ -202,9 +226,14 @@ def update_movie(movie_id):
     if not genre:
         return jsonify({'error': 'Invalid genre_id'}), 400
 
+    previous_genre_id = movie.genre_id
     movie.genre_id = genre_id
     db.session.commit()
 
+    invalidate_tags(CATALOGUE_TAG, GENRE_STATS_TAG, movie_tag(movie_id), genre_tag(previous_genre_id), genre_tag(genre_id))
+    if genre_id != previous_genre_id:
+        leaderboard.record(movie_id, genre_id, movie.sum_rate, movie.count_review, movie.rating_version)
+
     return jsonify({'message': 'Movie updated'})
 
 
@@ -234,6 +263,10 @@ def delete_movie(movie_id):
     if not movie:
         return jsonify({'error': 'Movie not found'}), 404
 
+    genre_id = movie.genre_id
     db.session.delete(movie)
     db.session.commit()
+
+    invalidate_tags(CATALOGUE_TAG, GENRE_STATS_TAG, movie_tag(movie_id), genre_tag(genre_id))
+    leaderboard.remove(movie_id)
     return jsonify({'message': 'Movie deleted'})
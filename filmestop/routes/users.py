@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request
 from filmestop.models import db, User
+from filmestop.pagination import parse_page_args, keyset_page, paginated_response
+from filmestop.query_budget import query_budget
 import re
 
 users_bp = Blueprint('users', __name__)
@@ -67,42 +69,74 @@ def create_user():
 
 
 @users_bp.route('', methods=['GET'])
+@query_budget(1)
 def get_users():
     """
     Lista todos os usuários
 
     Retorna todos os usuários cadastrados no sistema.
+    A listagem é paginada por cursor; o cursor da próxima página vem em `next_cursor`
+    (e no cabeçalho `X-Next-Cursor`).
 
     ---
     tags:
       - CRUD-Usuários
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de usuários na página (padrão 100)
+      - name: after
+        in: query
+        type: integer
+        required: false
+        description: Cursor `next_cursor` retornado pela página anterior
     responses:
       200:
         description: Lista de usuários
+        headers:
+          X-Next-Cursor:
+            type: integer
+            description: Cursor da próxima página (ausente na última)
         schema:
-          type: array
-          items:
-            type: object
-            properties:
-              id:
-                type: integer
-              name:
-                type: string
-              email:
-                type: string
-              phone:
-                type: string
+          type: object
+          properties:
+            items:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                  name:
+                    type: string
+                  email:
+                    type: string
+                  phone:
+                    type: string
+            next_cursor:
+              type: integer
+              description: Cursor da próxima página (null na última)
+      400:
+        description: Parâmetros de paginação inválidos
     """
-    users = User.query.all()
-    return jsonify([{
+    try:
+        limit, after = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    users, next_cursor = keyset_page(User.query, User.id, limit, after)
+    return paginated_response([{
         'id': user.id,
         'name': user.name,
         'email': user.email,
         'phone': user.phone
-    } for user in users])
+    } for user in users], next_cursor)
 
 
 @users_bp.route('/<int:user_id>', methods=['GET'])
+@query_budget(1)
 def get_user(user_id):
     """
     Busca um usuário por ID
@@ -0,0 +1,29 @@
+from filmestop.genre_catalogue import genre_catalogue
+
+
+# Camada única de serialização de filmes usada pelas rotas. O nome do gênero é
+# resolvido pelo catálogo em memória a partir de `genre_id`, sem tocar no
+# relacionamento `movie.genre` (que dispararia uma consulta por filme).
+
+
+def serialize_movie(movie):
+    """Campos básicos de um filme, usados nas listagens."""
+    return {
+        'id': movie.id,
+        'name': movie.name,
+        'director': movie.director,
+        'year': movie.year,
+        'genre': genre_catalogue.name_for(movie.genre_id)
+    }
+
+
+def serialize_movie_detail(movie):
+    """Campos básicos mais as informações agregadas de avaliação."""
+    data = serialize_movie(movie)
+    data['avg_rate'] = movie.avg_rate
+    data['count_review'] = movie.count_review
+    return data
+
+
+def serialize_movies(movies):
+    return [serialize_movie(movie) for movie in movies]
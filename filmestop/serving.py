@@ -0,0 +1,70 @@
+import gc
+import logging
+
+from filmestop.cache_tags import GENRES_TAG, tag_versions
+from filmestop.extensions import cache, db
+from filmestop.genre_catalogue import genre_catalogue
+from filmestop.tiered_cache import TieredRedisCache
+
+logger = logging.getLogger(__name__)
+
+
+# Preparação da aplicação para o servidor pre-fork (ver gunicorn.conf.py).
+#
+# A aplicação é criada uma única vez no processo mestre. Antes do fork o mestre
+# carrega o mapa de gêneros e aquece o cache das rotas mais acessadas; depois
+# congela os objetos no GC para que as páginas de memória continuem
+# compartilhadas (copy-on-write) entre os workers. Conexões de banco nunca são
+# herdadas: o mestre fecha as suas e cada worker descarta o pool recebido. O
+# mesmo vale para a thread de invalidação do L1 (ver filmestop/tiered_cache.py),
+# que é encerrada no mestre antes do fork.
+
+# Rotas chamadas no aquecimento (cache compartilhado no Redis)
+WARMUP_PATHS = ('/case/movies',)
+
+
+def warmup(app, paths=WARMUP_PATHS):
+    """Carrega o mapa de gêneros e aquece o cache das rotas `paths`."""
+    with app.app_context():
+        # Carregado com a versão compartilhada, o mapa não precisa ser recarregado nos workers
+        try:
+            tag_version = tag_versions([GENRES_TAG])[0]
+        except Exception:
+            logger.exception('Warmup failed to read the genre catalogue version')
+            tag_version = None
+        try:
+            genre_catalogue.load(tag_version)
+        except Exception:
+            logger.exception('Warmup failed to load the genre catalogue')
+
+        client = app.test_client()
+        for path in paths:
+            response = client.get(path)
+            if response.status_code >= 500:
+                logger.warning('Warmup request %s returned %s', path, response.status_code)
+
+        db.session.remove()
+
+        if isinstance(cache.cache, TieredRedisCache):
+            cache.cache.prepare_for_fork()
+
+    dispose_engines(app)
+
+
+def dispose_engines(app, close=True):
+    """
+    Descarta os pools de conexão de todas as engines.
+
+    No mestre usa `close=True` (fecha as conexões). No worker, após o fork,
+    usa `close=False`: o pool herdado é trocado por um novo sem fechar as
+    conexões, que ainda pertencem ao processo pai.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
+
+
+def freeze_for_fork():
+    """Move os objetos atuais para a geração permanente do GC antes do fork."""
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,195 @@
+import logging
+import threading
+import time
+import uuid
+from functools import wraps
+
+from flask import copy_current_request_context, current_app, has_request_context
+from flask_caching.signals import cache_view_hit, cache_view_miss
+
+from filmestop.extensions import cache, db
+
+logger = logging.getLogger(__name__)
+
+
+# Proteção contra "cache stampede" nas rotas cacheadas.
+#
+# - Single-flight: quando uma chave não está no cache (TTL vencido ou tags
+#   invalidadas), só quem obtém o lock da chave (`cache.add`, atômico no Redis)
+#   executa a rota; as requisições concorrentes, de qualquer worker, esperam o
+#   resultado ser gravado em vez de irem todas ao banco.
+# - Stale-while-revalidate: cada entrada fica no cache STALE_GRACE segundos
+#   além do TTL. Nesse intervalo ela ainda é servida e uma única atualização em
+#   segundo plano a recalcula.
+#
+# Uma entrada de versões antigas das tags nunca é servida: depois de uma
+# escrita a chave muda, então a primeira leitura é sempre um miss (coalescido).
+# Para que esse miss não guarde dados anteriores à escrita, a rota é executada
+# lendo do primário, e não de uma réplica (ver filmestop/db_routing.py).
+
+# Tempo (s) em que uma entrada vencida ainda pode ser servida enquanto é recalculada
+STALE_GRACE = 5 * 60
+
+# Validade do lock de recomputação (se quem o obteve morrer, ele expira)
+LOCK_TIMEOUT = 30
+
+# Espera máxima (s) pelo resultado de quem está recalculando; depois disso a
+# requisição executa a rota por conta própria
+LOCK_WAIT = 5.0
+LOCK_POLL_INTERVAL = 0.02
+
+
+class CacheEntry:
+    """Valor guardado no cache com o instante (epoch) até o qual é considerado atual."""
+
+    def __init__(self, value, fresh_until):
+        self.value = value
+        self.fresh_until = fresh_until
+
+    @property
+    def is_stale(self):
+        return self.fresh_until <= time.time()
+
+
+def _lock_key(key):
+    return f'lock/{key}'
+
+
+def _acquire(key):
+    token = uuid.uuid4().hex
+    return token if cache.add(_lock_key(key), token, timeout=LOCK_TIMEOUT) else None
+
+
+def _release(key, token):
+    # Só remove o lock se ainda for nosso (ele pode ter expirado e sido obtido por outro)
+    try:
+        if cache.get(_lock_key(key)) == token:
+            cache.delete(_lock_key(key))
+    except Exception:
+        logger.exception('Failed to release cache lock for %s', key)
+
+
+def _store(key, value, timeout):
+    if timeout is None:
+        timeout = cache.cache.default_timeout
+    if timeout:
+        entry, hard_timeout = CacheEntry(value, time.time() + timeout), timeout + STALE_GRACE
+    else:
+        entry, hard_timeout = CacheEntry(value, float('inf')), 0
+    try:
+        cache.set(key, entry, timeout=hard_timeout)
+    except Exception:
+        logger.exception('Failed to store %s in cache', key)
+    return value
+
+
+def _wait_for(key):
+    """Espera a entrada gravada por quem tem o lock; None se o lock sumir ou a espera estourar."""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry, lock = cache.get_many(key, _lock_key(key))
+        if entry is not None:
+            return entry
+        if lock is None:
+            return None
+    return None
+
+
+def refresh_in_background(refresh):
+    """Executa a atualização de uma entrada vencida fora da requisição."""
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def _in_context(fn):
+    """Leva o contexto atual (requisição ou aplicação) para outra thread."""
+    if has_request_context():
+        return copy_current_request_context(fn)
+
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            return fn()
+    return run
+
+
+def get_or_compute(key, compute, timeout):
+    """
+    Retorna o valor da chave, executando `compute()` no máximo uma vez por vez
+    em todo o cluster.
+
+    Falhas do backend de cache são registradas e a requisição segue sem cache
+    (e sem lock), como no `cache.cached` do Flask-Caching.
+
+    Returns:
+        Tupla (valor, acerto do cache).
+    """
+    try:
+        entry = cache.get(key)
+    except Exception:
+        logger.exception('Exception possibly due to cache backend.')
+        return compute(), False
+
+    if entry is not None:
+        if entry.is_stale:
+            try:
+                token = _acquire(key)
+            except Exception:
+                logger.exception('Exception possibly due to cache backend.')
+                token = None
+            if token is not None:
+                def refresh():
+                    try:
+                        _store(key, compute(), timeout)
+                    finally:
+                        _release(key, token)
+
+                refresh_in_background(_in_context(refresh))
+        return entry.value, True
+
+    try:
+        token = _acquire(key)
+        entry = _wait_for(key) if token is None else None
+    except Exception:
+        logger.exception('Exception possibly due to cache backend.')
+        token = entry = None
+    if entry is not None:
+        return entry.value, True
+
+    try:
+        return _store(key, compute(), timeout), False
+    finally:
+        if token is not None:
+            _release(key, token)
+
+
+def single_flight_cached(timeout=None, **cache_options):
+    """
+    Equivalente a `cache.cached(timeout, **cache_options)` (mesmas chaves e
+    sinais de hit/miss) com single-flight e stale-while-revalidate.
+    """
+    def decorator(view):
+        # Usado apenas para montar a chave exatamente como o Flask-Caching
+        keyed = cache.cached(timeout=timeout, **cache_options)(view)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                key = keyed.make_cache_key(*args, use_request=True, **kwargs)
+            except Exception:
+                logger.exception('Exception possibly due to cache backend.')
+                return view(*args, **kwargs)
+
+            def compute():
+                db.session().pin_to_primary()
+                return view(*args, **kwargs)
+
+            value, hit = get_or_compute(key, compute, timeout)
+
+            if cache.enable_signals:
+                signal = cache_view_hit if hit else cache_view_miss
+                signal.send(cache=cache, cache_key=key, args=args, kwargs=kwargs)
+            return value
+        return wrapper
+    return decorator
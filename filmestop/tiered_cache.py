@@ -0,0 +1,316 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask_caching.backends.rediscache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+
+# Cache em dois níveis: LRU em memória (L1) na frente do Redis (L2).
+#
+# Leituras consultam primeiro o L1 do processo, que guarda os objetos já
+# desserializados; só as chaves ausentes vão ao Redis. O L1 é limitado em
+# quantidade de entradas (CACHE_L1_MAX_ENTRIES) e em tempo de vida
+# (CACHE_L1_TIMEOUT, nunca maior que o TTL da própria entrada).
+#
+# Toda escrita (set, delete, invalidação de tags...) grava no Redis, atualiza o
+# L1 local e publica as chaves alteradas no canal CACHE_INVALIDATION_CHANNEL.
+# Cada processo mantém uma thread inscrita nesse canal que remove as chaves do
+# seu L1, então os outros workers e nós deixam de servir o valor antigo assim
+# que a mensagem chega. Se a inscrição cair, o L1 é esvaziado (mensagens podem
+# ter sido perdidas) e, enquanto não houver inscrição, o L1 não é usado.
+
+DEFAULT_L1_MAX_ENTRIES = 1024
+DEFAULT_L1_TIMEOUT = 10
+DEFAULT_INVALIDATION_CHANNEL = 'filmestop:cache-invalidation'
+
+# Intervalo entre tentativas de (re)inscrição no canal quando o Redis está fora
+LISTEN_RETRY_INTERVAL = 5.0
+
+
+class LRUCache:
+    """LRU thread-safe limitado em entradas, com expiração por entrada."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Retorna (encontrado, valor)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TieredRedisCache(RedisCache):
+    """
+    RedisCache do Flask-Caching com um L1 em memória e invalidação por pub/sub.
+
+    Uso: CACHE_TYPE = 'filmestop.tiered_cache.TieredRedisCache'. Como o
+    RedisCache, `host` aceita um cliente Redis já criado (ex.: fakeredis nos
+    testes).
+    """
+
+    def __init__(self, host='localhost', l1_max_entries=DEFAULT_L1_MAX_ENTRIES,
+                 l1_timeout=DEFAULT_L1_TIMEOUT, channel=DEFAULT_INVALIDATION_CHANNEL, **kwargs):
+        super().__init__(host, **kwargs)
+        self.l1 = LRUCache(l1_max_entries)
+        self.l1_timeout = l1_timeout
+        self.channel = channel
+        # Identifica as mensagens deste processo (não precisam ser reaplicadas)
+        self.origin = uuid.uuid4().hex
+
+        # Incrementado a cada invalidação: uma leitura do Redis iniciada antes
+        # dela não pode preencher o L1 com o valor antigo
+        self._generations = itertools.count(1)
+        self._generation = 0
+        self._listener_lock = threading.Lock()
+        self._listener = None
+        self._listener_pid = None
+        self._listening = False
+        self._retry_at = 0.0
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(
+            l1_max_entries=config.get('CACHE_L1_MAX_ENTRIES', DEFAULT_L1_MAX_ENTRIES),
+            l1_timeout=config.get('CACHE_L1_TIMEOUT', DEFAULT_L1_TIMEOUT),
+            channel=config.get('CACHE_INVALIDATION_CHANNEL', DEFAULT_INVALIDATION_CHANNEL),
+        )
+        return super().factory(app, config, args, kwargs)
+
+    # Inscrição no canal de invalidação
+
+    def _l1_enabled(self):
+        """Garante a thread de inscrição deste processo; False se o L1 não pode ser usado."""
+        if self._listener_pid == os.getpid() and self._listening:
+            return True
+
+        with self._listener_lock:
+            if self._listener_pid != os.getpid():
+                # Processo novo (fork do gunicorn): a thread e as mensagens do pai não vieram junto
+                self._listener = None
+                self._listener_pid = os.getpid()
+                self._listening = False
+                self._retry_at = 0.0
+                # L1 novo em vez de clear(): o lock herdado pode ter sido copiado
+                # travado por uma thread que não existe neste processo
+                self.l1 = LRUCache(self.l1.max_entries)
+
+            if not self._listening and time.monotonic() >= self._retry_at:
+                self._start_listener()
+            return self._listening
+
+    def _start_listener(self):
+        try:
+            pubsub = self._read_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_message})
+        except Exception:
+            logger.warning('Cannot subscribe to cache invalidation channel %s; L1 cache disabled',
+                           self.channel, exc_info=True)
+            self._retry_at = time.monotonic() + LISTEN_RETRY_INTERVAL
+            return
+
+        # Nada gravado antes da inscrição é confiável
+        self.l1.clear()
+        self._listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True,
+                                              exception_handler=self._on_listener_error)
+        self._listening = True
+
+    def _on_listener_error(self, error, pubsub, thread):
+        # O redis-py reinscreve na próxima leitura; mensagens do intervalo se perderam
+        logger.warning('Cache invalidation channel failed: %s; clearing L1 cache', error)
+        self._generation = next(self._generations)
+        self.l1.clear()
+        time.sleep(1.0)
+
+    def _on_message(self, message):
+        payload = json.loads(message['data'])
+        if payload['origin'] == self.origin:
+            return
+        self._generation = next(self._generations)
+        if payload.get('clear'):
+            self.l1.clear()
+        else:
+            self.l1.delete(*payload['keys'])
+
+    def stop_listener(self, wait=False):
+        """Encerra a thread de inscrição; com `wait`, espera ela terminar."""
+        with self._listener_lock:
+            listener = self._listener
+            if listener is not None:
+                # A thread encerra (e fecha a conexão) no próximo ciclo de leitura
+                listener.stop()
+            self._listener = None
+            self._listening = False
+
+        if wait and listener is not None:
+            listener.join()
+
+    def prepare_for_fork(self):
+        """
+        Deixa o processo mestre sem a thread de inscrição e com o L1 vazio.
+
+        Uma thread viva no fork pode estar em `_on_message` com o lock do L1;
+        o worker herdaria o lock travado. Cada worker abre a sua inscrição na
+        primeira leitura.
+        """
+        self.stop_listener(wait=True)
+        self.l1.clear()
+
+    def _publish(self, keys=(), clear=False):
+        payload = {'origin': self.origin, 'keys': list(keys)}
+        if clear:
+            payload['clear'] = True
+        try:
+            self._write_client.publish(self.channel, json.dumps(payload))
+        except Exception:
+            logger.exception('Failed to publish cache invalidation for %s', keys)
+
+    def _l1_ttl(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return min(self.l1_timeout, timeout) if timeout > 0 else self.l1_timeout
+
+    def _written(self, mapping, timeout):
+        """Atualiza o L1 e avisa os outros processos das chaves gravadas."""
+        self._generation = next(self._generations)
+        if self._l1_enabled():
+            ttl = self._l1_ttl(timeout)
+            for key, value in mapping.items():
+                self.l1.set(key, value, ttl)
+        self._publish(mapping)
+
+    def _removed(self, keys):
+        self._generation = next(self._generations)
+        self.l1.delete(*keys)
+        self._publish(keys)
+
+    # API do cache
+
+    def get(self, key):
+        return self.get_many(key)[0]
+
+    def get_many(self, *keys):
+        if not self._l1_enabled():
+            return super().get_many(*keys)
+
+        values = {}
+        missing = []
+        for key in keys:
+            found, value = self.l1.get(key)
+            if found:
+                values[key] = value
+            else:
+                missing.append(key)
+
+        if missing:
+            generation = self._generation
+            fetched, remaining = self._get_many_with_ttl(missing)
+            fill = generation == self._generation
+            for key, value, ttl in zip(missing, fetched, remaining):
+                values[key] = value
+                if fill and value is not None and ttl is not None:
+                    self.l1.set(key, value, ttl)
+
+        return [values[key] for key in keys]
+
+    def _get_many_with_ttl(self, keys):
+        """
+        Lê as chaves (MGET) e o tempo restante de cada uma (PTTL) em uma única
+        ida ao Redis. Retorna (valores, TTLs do L1): a cópia em memória nunca
+        vive mais que a entrada no Redis; None indica que a chave expirou entre
+        os dois comandos e não deve ir para o L1.
+        """
+        prefixed_keys = [f'{self._get_prefix()}{key}' for key in keys] if self.key_prefix else list(keys)
+        with self._read_client.pipeline(transaction=False) as pipe:
+            pipe.mget(prefixed_keys)
+            for key in prefixed_keys:
+                pipe.pttl(key)
+            fetched, *pttls = pipe.execute()
+
+        ttls = []
+        for pttl in pttls:
+            if pttl == -1:  # sem expiração no Redis
+                ttls.append(self.l1_timeout)
+            elif pttl > 0:
+                ttls.append(min(self.l1_timeout, pttl / 1000))
+            else:
+                ttls.append(None)
+        return [self.serializer.loads(value) for value in fetched], ttls
+
+    def set(self, key, value, timeout=None):
+        result = super().set(key, value, timeout)
+        if result:
+            self._written({key: value}, timeout)
+        return result
+
+    def set_many(self, mapping, timeout=None):
+        stored = super().set_many(mapping, timeout)
+        self._written({key: mapping[key] for key in stored}, timeout)
+        return stored
+
+    def add(self, key, value, timeout=None):
+        added = super().add(key, value, timeout)
+        if added:
+            self._written({key: value}, timeout)
+        return added
+
+    def delete(self, key):
+        result = super().delete(key)
+        self._removed([key])
+        return result
+
+    def delete_many(self, *keys):
+        result = super().delete_many(*keys)
+        self._removed(keys)
+        return result
+
+    def inc(self, key, delta=1):
+        result = super().inc(key, delta)
+        self._removed([key])
+        return result
+
+    def dec(self, key, delta=1):
+        result = super().dec(key, delta)
+        self._removed([key])
+        return result
+
+    def clear(self):
+        result = super().clear()
+        self._generation = next(self._generations)
+        self.l1.clear()
+        self._publish(clear=True)
+        return result
@@ -0,0 +1,5 @@
+from filmestop import create_app
+
+# Ponto de entrada WSGI de produção (ver gunicorn.conf.py). Com preload_app a
+# aplicação é criada uma única vez, no processo mestre.
+app = create_app()
@@ -0,0 +1,47 @@
+import multiprocessing
+import os
+
+# Servidor de produção (pre-fork):
+#
+#     gunicorn -c gunicorn.conf.py filmestop.wsgi:app
+#
+# Variáveis de ambiente:
+#   WEB_CONCURRENCY         quantidade de workers (padrão: 2 x CPUs + 1)
+#   WEB_THREADS             threads por worker (padrão 1)
+#   MAX_REQUESTS            requisições até o worker ser reciclado (padrão 5000)
+#   MAX_REQUESTS_JITTER     variação aleatória para os workers não reciclarem juntos (padrão 500)
+#   GRACEFUL_TIMEOUT        segundos para o worker terminar as requisições em andamento (padrão 30)
+#
+# Dimensione o pool de conexões por worker: WEB_CONCURRENCY x (DB_POOL_SIZE +
+# DB_MAX_OVERFLOW) deve caber no max_connections do banco.
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 1))
+
+# A aplicação é criada uma vez no mestre e compartilhada (copy-on-write)
+preload_app = True
+
+# Reciclagem gradual dos workers (limita vazamentos de memória sem derrubar o serviço)
+max_requests = int(os.environ.get('MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', 500))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('WORKER_TIMEOUT', 60))
+keepalive = 5
+
+accesslog = '-'
+
+
+def when_ready(server):
+    # Executado no mestre depois de carregar a aplicação e antes do primeiro fork
+    from filmestop.serving import warmup, freeze_for_fork
+
+    warmup(server.app.wsgi())
+    freeze_for_fork()
+
+
+def post_fork(server, worker):
+    # Cada worker abre as suas próprias conexões
+    from filmestop.serving import dispose_engines
+
+    dispose_engines(server.app.wsgi(), close=False)
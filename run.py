@@ -1,14 +1,17 @@
+import os
+
 from filmestop import create_app
+from filmestop.boot import upgrade_if_needed
 from seed_data import seed_genres, seed_demo_data
-from flask_migrate import upgrade
-import time
 
 app = create_app()
 print(">>> Iniciando run.py")
 
 if __name__ == '__main__':
     with app.app_context():
-        upgrade()          # Aplica as migrations (cria as tabelas)
-        seed_genres()  # Apenas popula se as tabelas já existem 
-        seed_demo_data() #Cria entradas para as tabelas users,movies,rents e reviews
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+        upgrade_if_needed()  # Aplica as migrations só se o banco não estiver no head
+        # Dados iniciais só quando pedidos explicitamente (ou `flask seed demo`)
+        if os.environ.get('SEED_DEMO_DATA', '').lower() in ('1', 'true', 'yes'):
+            seed_genres()
+            seed_demo_data()  # Cria entradas para as tabelas users,movies,rents e reviews
+    app.run(host="0.0.0.0", port=5000, debug=True)
@@ -1,7 +1,10 @@
 from filmestop.extensions import db
 from filmestop.models import db, User, Movie, Rent, Review, Catalogue_Genre
-from filmestop.routes.case_requirements import recalculate_movie_rating
-from datetime import date
+from filmestop.reviews import recompute_movie_ratings
+from sqlalchemy import select, insert, func
+from datetime import date, timedelta
+import csv
+import io
 import random
 
 
@@ -11,8 +14,12 @@ def seed_genres():
         'Fantasy', 'Thriller', 'Documentary', 'Animation'
     ]
 
+    # Uma única consulta para saber quais gêneros já existem
+    existing = set(db.session.scalars(
+        select(Catalogue_Genre.genre_name).where(Catalogue_Genre.genre_name.in_(genres))
+    ))
     for genre_name in genres:
-        if not Catalogue_Genre.query.filter_by(genre_name=genre_name).first():
+        if genre_name not in existing:
             genre = Catalogue_Genre(genre_name=genre_name)
             db.session.add(genre)
 
@@ -21,7 +28,6 @@ def seed_genres():
 
 def seed_demo_data():
     print("Verificando usuários existentes...")
-    existing_emails = {u.email for u in User.query.all()}
     users_data = [
         {"name": "Bruno Silva", "email": "bruno@email.com", "phone": "99999-0001"},
         {"name": "Jack Antônio", "email": "jack@email.com", "phone": "99999-0002"},
@@ -30,6 +36,11 @@ def seed_demo_data():
         {"name": "Francisco Ferreira", "email": "francisco@email.com", "phone": "99999-0005"},
     ]
 
+    # Só os registros de demonstração são consultados (nada de varrer a tabela inteira)
+    existing_emails = set(db.session.scalars(
+        select(User.email).where(User.email.in_([user["email"] for user in users_data]))
+    ))
+
     users = []
     for user_data in users_data:
         if user_data["email"] not in existing_emails:
@@ -44,7 +55,6 @@ def seed_demo_data():
     print("Gêneros encontrados:", genres)
 
     print("Verificando filmes existentes...")
-    existing_movies = {m.name for m in Movie.query.all()}
     filmes_data = [
         ("Matrix", "Wachowski", 1999, "Action"),
         ("Titanic", "James Cameron", 1997, "Romance"),
@@ -58,6 +68,9 @@ def seed_demo_data():
         ("Parasita", "Bong Joon-ho", 2019, "Thriller"),
     ]
 
+    demo_names = [name for name, _, _, _ in filmes_data]
+    existing_movies = set(db.session.scalars(select(Movie.name).where(Movie.name.in_(demo_names))))
+
     for name, director, year, genre in filmes_data:
         if name not in existing_movies:
             genre_id = genres.get(genre, 1)
@@ -68,15 +81,24 @@ def seed_demo_data():
     print("Filmes atualizados.")
 
     # Aluguéis
-    all_users = User.query.limit(3).all()
-    all_movies = Movie.query.all()
+    all_users = User.query.order_by(User.id).limit(3).all()
+    all_movies = Movie.query.filter(Movie.name.in_(demo_names)).all()
+    user_ids = [user.id for user in all_users]
     rents = []
     user_rented_movies = {user.id: [] for user in all_users}
 
+    # Pares já existentes carregados de uma vez, em vez de uma consulta por candidato
+    rented_pairs = set(db.session.execute(
+        select(Rent.user_id, Rent.movie_id).where(Rent.user_id.in_(user_ids))
+    ).tuples())
+    reviewed_pairs = set(db.session.execute(
+        select(Review.user_id, Review.movie_id).where(Review.user_id.in_(user_ids))
+    ).tuples())
+
     for user in all_users:
         rented_movies = random.sample(all_movies, k=5)
         for movie in rented_movies:
-            if not Rent.query.filter_by(user_id=user.id, movie_id=movie.id).first():
+            if (user.id, movie.id) not in rented_pairs:
                 start = date(2025, 1, random.randint(1, 20))
                 rent = Rent(user_id=user.id, movie_id=movie.id, start_date=start, rent_days=random.randint(1, 7))
                 rents.append(rent)
@@ -91,14 +113,135 @@ def seed_demo_data():
     for user in all_users:
         for movie_id in user_rented_movies[user.id]:
             if random.random() < 0.7:
-                if not Review.query.filter_by(user_id=user.id, movie_id=movie_id).first():
+                if (user.id, movie_id) not in reviewed_pairs:
                     review = Review(user_id=user.id, movie_id=movie_id, rate=random.randint(50, 100))
                     db.session.add(review)
                     affected_movies.add(movie_id)
 
+    # Médias recalculadas com um único UPDATE agrupado
+    recompute_movie_ratings(affected_movies)
     db.session.commit()
 
-    for movie_id in affected_movies:
-        recalculate_movie_rating(movie_id)
-
     print("Avaliações inseridas e médias recalculadas.")
+
+
+# Tamanho dos lotes enviados ao banco pela carga em massa
+BULK_CHUNK_SIZE = 10_000
+
+
+def _copy_rows(table, columns, rows):
+    """Envia as linhas com COPY ... FROM STDIN (PostgreSQL), em blocos de CSV."""
+    cursor = db.session.connection().connection.cursor()
+    copy_sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+
+    def flush(buffer):
+        buffer.seek(0)
+        cursor.copy_expert(copy_sql, buffer)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+    for row in rows:
+        writer.writerow([row[column] for column in columns])
+        pending += 1
+        if pending >= BULK_CHUNK_SIZE:
+            flush(buffer)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            pending = 0
+    if pending:
+        flush(buffer)
+
+
+def bulk_insert(model, columns, rows):
+    """
+    Insere um iterável de dicionários na tabela do modelo e faz commit.
+
+    Usa COPY no PostgreSQL e INSERT em lote (executemany) nos demais bancos,
+    sem criar objetos do ORM nem materializar todas as linhas na memória.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        _copy_rows(model.__table__, columns, rows)
+    else:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                db.session.execute(insert(model), chunk)
+                chunk = []
+        if chunk:
+            db.session.execute(insert(model), chunk)
+
+    db.session.commit()
+
+
+def _new_ids(model, previous_max_id):
+    return db.session.scalars(select(model.id).where(model.id > previous_max_id).order_by(model.id)).all()
+
+
+def _max_id(model):
+    return db.session.scalar(select(func.coalesce(func.max(model.id), 0)))
+
+
+def seed_bulk_data(users, movies, rents, reviews, seed=42):
+    """
+    Carga em massa determinística para testes de capacidade.
+
+    Para a mesma semente e os mesmos tamanhos, gera sempre os mesmos dados:
+    - a popularidade dos filmes e a atividade dos usuários seguem uma
+      distribuição log-uniforme (poucos concentram muitos aluguéis);
+    - as avaliações são feitas apenas sobre pares (usuário, filme) alugados,
+      um por par;
+    - as médias dos filmes são calculadas no final com um único UPDATE agrupado.
+
+    Returns:
+        Dicionário com a quantidade de linhas inseridas em cada tabela.
+    """
+    rng = random.Random(seed)
+    seed_genres()
+    genre_ids = db.session.scalars(select(Catalogue_Genre.id).order_by(Catalogue_Genre.id)).all()
+
+    max_user_id = _max_id(User)
+    bulk_insert(User, ['name', 'email', 'phone'], (
+        {'name': f'User {i}', 'email': f'user{max_user_id + i}@example.com', 'phone': f'{i:011d}'}
+        for i in range(1, users + 1)
+    ))
+    user_ids = _new_ids(User, max_user_id)
+
+    max_movie_id = _max_id(Movie)
+    bulk_insert(Movie, ['name', 'director', 'year', 'genre_id'], (
+        {'name': f'Movie {i}', 'director': f'Director {i % 997}', 'year': 1950 + i % 75,
+         'genre_id': genre_ids[i % len(genre_ids)]}
+        for i in range(1, movies + 1)
+    ))
+    movie_ids = _new_ids(Movie, max_movie_id)
+
+    def skewed(ids):
+        # Índice log-uniforme em [0, len(ids)): os primeiros ids são os mais populares
+        return ids[int((len(ids) + 1) ** rng.random()) - 1]
+
+    first_day = date(2020, 1, 1)
+    review_probability = min(1.0, 2 * reviews / rents) if rents else 0
+    review_pairs = {}
+
+    def rent_rows():
+        for _ in range(rents):
+            user_id, movie_id = skewed(user_ids), skewed(movie_ids)
+            if len(review_pairs) < reviews and rng.random() < review_probability:
+                review_pairs.setdefault((user_id, movie_id), rng.randint(0, 100))
+            yield {'user_id': user_id, 'movie_id': movie_id,
+                   'start_date': first_day + timedelta(days=rng.randint(0, 1800)),
+                   'rent_days': rng.randint(1, 7)}
+
+    bulk_insert(Rent, ['user_id', 'movie_id', 'start_date', 'rent_days'], rent_rows())
+
+    bulk_insert(Review, ['user_id', 'movie_id', 'rate'], (
+        {'user_id': user_id, 'movie_id': movie_id, 'rate': rate}
+        for (user_id, movie_id), rate in review_pairs.items()
+    ))
+
+    # Um único UPDATE agrupado sobre todos os filmes avaliados
+    recompute_movie_ratings()
+    db.session.commit()
+
+    return {'users': len(user_ids), 'movies': len(movie_ids), 'rents': rents, 'reviews': len(review_pairs)}
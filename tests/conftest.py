@@ -1,13 +1,18 @@
 import pytest
 import sys
 import os
+from collections import namedtuple
+from contextlib import contextmanager
 from datetime import date
 
+from sqlalchemy import event
+
 # Garante que o diretório raiz esteja no PYTHONPATH
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
 
 from filmestop import create_app
-from filmestop.extensions import db
+from filmestop.extensions import db, cache
 
 from filmestop.models import User, Movie, Rent, Review, Catalogue_Genre
 from seed_data import seed_genres
@@ -36,6 +41,21 @@ def app():
         db.drop_all()
 
 
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """
+    Aplicação de testes com banco SQLite em arquivo e sem tabelas criadas,
+    para os testes que aplicam as migrations do Alembic.
+    """
+    # O Flask-Migrate procura o diretório migrations/ a partir do diretório atual
+    monkeypatch.chdir(ROOT)
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}"})
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
 @pytest.fixture
 def client(app):
     """
@@ -45,6 +65,62 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture
+def cached_client(app):
+    """
+    Client de testes com cache em memória (SimpleCache) no lugar do Redis,
+    usado para validar o comportamento das rotas cacheadas.
+    """
+    cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+    return app.test_client()
+
+
+CapturedStatement = namedtuple('CapturedStatement', 'statement parameters executemany')
+
+
+@pytest.fixture
+def capture_sql():
+    """
+    Captura o SQL enviado ao banco pela engine da aplicação ativa (ou pela
+    engine informada, ex.: a `sync_engine` de uma engine assíncrona).
+
+    Uso: `with capture_sql() as statements: ...`; cada item é um
+    CapturedStatement(statement, parameters, executemany).
+    """
+    @contextmanager
+    def capture(engine=None):
+        statements = []
+        engine = engine if engine is not None else db.engine
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(CapturedStatement(statement, parameters, executemany))
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return capture
+
+
+@pytest.fixture
+def metric_value():
+    """
+    Lê uma amostra do texto do /metrics (formato Prometheus).
+
+    Uso: `metric_value(text, 'nome{labels}')`; retorna o valor da primeira
+    linha que começa com o prefixo, ou None.
+    """
+    def value(text, prefix):
+        for line in text.splitlines():
+            if line.startswith(prefix):
+                return float(line.rsplit(' ', 1)[1])
+        return None
+
+    return value
+
+
 @pytest.fixture
 def setup_sample_data(app):
     """
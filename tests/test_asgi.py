@@ -0,0 +1,192 @@
+import asyncio
+import json
+from datetime import date
+
+import pytest
+
+from benchmarks.asgi_client import asgi_request
+from filmestop import create_app, db
+from filmestop.asgi import AsyncApp, async_database_url
+from filmestop.cache_tags import GENRES_TAG, async_tag_versions, movie_tag
+from filmestop.extensions import cache
+from filmestop.models import User, Movie, Rent, Catalogue_Genre
+from seed_data import seed_genres
+
+"""
+Testes do modo assíncrono (ASGI) das rotas de leitura.
+
+Cenários testados:
+- As rotas assíncronas respondem igual às síncronas (corpo, status, X-Next-Cursor, ETag)
+- If-None-Match com o ETag atual responde 304
+- Escritas feitas pelas rotas Flask (montadas no mesmo app ASGI) invalidam as respostas
+- Várias requisições simultâneas são atendidas pelo mesmo processo
+- Misses simultâneos da mesma chave consultam o banco uma única vez
+- Com o lock da chave em outro worker, a requisição espera a resposta gravada por ele
+- Com o cache fora do ar as rotas respondem sem cache, como no modo síncrono
+- As URLs do banco são convertidas para os drivers assíncronos
+"""
+
+
+@pytest.fixture
+def apps(tmp_path):
+    flask_app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'asgi.db'}"})
+    cache.init_app(flask_app, config={'CACHE_TYPE': 'SimpleCache'})
+
+    with flask_app.app_context():
+        db.create_all()
+        seed_genres()
+        genre = Catalogue_Genre.query.filter_by(genre_name='Action').first()
+        db.session.add(User(id=1, name='User', email='user@example.com', phone='9888888888'))
+        db.session.add_all([Movie(id=i, name=f'Movie {i}', director='Dir', year=2000, genre_id=genre.id)
+                            for i in range(1, 4)])
+        db.session.add(Rent(user_id=1, movie_id=1, start_date=date(2025, 1, 1), rent_days=3))
+        db.session.commit()
+        db.session.remove()
+
+    yield flask_app, AsyncApp(flask_app)
+
+    with flask_app.app_context():
+        db.engine.dispose()
+
+
+def _run(async_app, coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await async_app.close()
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize('path, query', [
+    ('/case/movies', ''),
+    ('/case/movies', 'limit=2'),
+    ('/case/movies', 'after=1'),
+    ('/case/movies', 'genre_id=1'),
+    ('/case/movies', 'genre_id=999'),
+    ('/case/movies', 'limit=abc'),
+    ('/case/movies/1', ''),
+    ('/case/movies/999', ''),
+    ('/case/users/1/rented_movies', ''),
+])
+def test_async_routes_match_sync_routes(apps, path, query):
+    flask_app, async_app = apps
+    status, headers, body = _run(async_app, asgi_request(async_app, 'GET', path, query))
+
+    expected = flask_app.test_client().get(f'{path}?{query}')
+    assert status == expected.status_code
+    assert json.loads(body) == expected.get_json()
+    assert headers.get('x-next-cursor') == expected.headers.get('X-Next-Cursor')
+    assert headers.get('etag') == expected.headers.get('ETag')
+
+
+def test_conditional_get_and_invalidation(apps):
+    _, async_app = apps
+
+    async def scenario():
+        _, headers, _ = await asgi_request(async_app, 'GET', '/case/movies/1')
+        etag = headers['etag']
+        status, _, _ = await asgi_request(async_app, 'GET', '/case/movies/1', headers={'If-None-Match': etag})
+        assert status == 304
+
+        # Escrita pela rota Flask, atendida pelo mesmo app ASGI
+        status, _, _ = await asgi_request(async_app, 'POST', '/case/users/1/movies/1/review', body={'rate': 90})
+        assert status == 200
+
+        status, headers, body = await asgi_request(async_app, 'GET', '/case/movies/1', headers={'If-None-Match': etag})
+        assert status == 200
+        assert headers['etag'] != etag
+        assert json.loads(body)['avg_rate'] == 90
+
+    _run(async_app, scenario())
+
+
+def test_concurrent_requests(apps):
+    _, async_app = apps
+
+    async def scenario():
+        return await asyncio.gather(*(
+            asgi_request(async_app, 'GET', f'/case/movies/{i % 3 + 1}') for i in range(100)
+        ))
+
+    assert {status for status, _, _ in _run(async_app, scenario())} == {200}
+
+
+def _movie_queries(statements):
+    return [s for s in statements if 'FROM movies' in s.statement]
+
+
+def test_concurrent_misses_build_once(apps, capture_sql):
+    _, async_app = apps
+
+    async def scenario():
+        return await asyncio.gather(*(asgi_request(async_app, 'GET', '/case/movies/1') for _ in range(20)))
+
+    with capture_sql(async_app.engines[0].sync_engine) as statements:
+        responses = _run(async_app, scenario())
+
+    assert {status for status, _, _ in responses} == {200}
+    assert len({headers['etag'] for _, headers, _ in responses}) == 1
+    assert len(_movie_queries(statements)) == 1
+
+
+def test_waits_for_lock_held_by_other_worker(apps, capture_sql):
+    flask_app, async_app = apps
+    expected = flask_app.test_client().get('/case/movies/2').get_json()
+
+    async def scenario():
+        # Outro worker obteve o lock e grava a resposta logo em seguida
+        key = 'async-view//case/movies/2?/' + '.'.join(
+            await async_tag_versions(async_app.cache, [movie_tag(2), GENRES_TAG])
+        )
+        await async_app.cache.add(f'lock/{key}', 'other-worker', timeout=30)
+
+        async def other_worker():
+            await asyncio.sleep(0.1)
+            await async_app.cache.set(key, async_app._json(expected, 200))
+
+        _, (status, _, body) = await asyncio.gather(
+            other_worker(), asgi_request(async_app, 'GET', '/case/movies/2')
+        )
+        return status, body
+
+    with capture_sql(async_app.engines[0].sync_engine) as statements:
+        status, body = _run(async_app, scenario())
+
+    assert status == 200
+    assert json.loads(body) == expected
+    assert _movie_queries(statements) == []
+
+
+@pytest.mark.parametrize('failing, has_etag', [
+    (('get_many', 'get', 'set_many', 'set', 'add', 'delete'), False),
+    (('get', 'set'), True),
+])
+def test_cache_outage_serves_uncached(apps, monkeypatch, failing, has_etag):
+    _, async_app = apps
+
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError('cache is down')
+
+    for method in failing:
+        monkeypatch.setattr(async_app.cache, method, unavailable)
+
+    async def scenario():
+        return await asyncio.gather(
+            asgi_request(async_app, 'GET', '/case/movies/1'),
+            asgi_request(async_app, 'GET', '/case/movies', 'genre_id=1'),
+        )
+
+    (detail_status, _, detail), (listing_status, headers, listing) = _run(async_app, scenario())
+
+    assert detail_status == listing_status == 200
+    assert json.loads(detail)['name'] == 'Movie 1'
+    assert [movie['id'] for movie in json.loads(listing)['items']] == [1, 2, 3]
+    assert ('etag' in headers) == has_etag
+
+
+def test_async_database_url():
+    assert async_database_url('postgresql://u:p@db:5432/app').drivername == 'postgresql+asyncpg'
+    assert async_database_url('sqlite:///data.db').drivername == 'sqlite+aiosqlite'
+    with pytest.raises(ValueError):
+        async_database_url('mysql://u:p@db/app')
@@ -0,0 +1,48 @@
+import json
+
+from benchmarks import run
+
+"""
+Teste de fumaça do suite de benchmarks: roda todas as rotas sobre um conjunto
+mínimo de dados e valida a gravação e a comparação com o baseline.
+"""
+
+
+def test_benchmark_suite_runs_and_compares_baseline(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    args = [
+        '--users', '20', '--movies', '50', '--rents', '200', '--reviews', '50',
+        '--database-url', f"sqlite:///{tmp_path / 'bench.db'}",
+        '--iterations', '5', '--warmup', '1', '--baseline', str(baseline),
+    ]
+
+    assert run.main(args + ['--update-baseline']) == 0
+    routes = json.loads(baseline.read_text())['small']['routes']
+    assert routes['case_movies']['queries'] == 1
+
+    # Baseline com menos consultas do que o atual é sinalizado como regressão
+    routes['case_movies']['queries'] = 0
+    baseline.write_text(json.dumps({'small': {'routes': routes}}))
+    assert run.main(args + ['--reuse']) == 1
+
+
+def test_compare_flags_latency_regressions():
+    baseline = {'movies': {'p95_ms': 10.0, 'queries': 1}}
+
+    assert run.compare({'movies': {'p95_ms': 12.0, 'queries': 1}}, baseline, 0.25) == []
+    assert run.compare({'movies': {'p95_ms': 13.0, 'queries': 1}}, baseline, 0.25) == [
+        'movies: p95 10.0ms -> 13.0ms'
+    ]
+
+
+def test_benchmark_suite_runs_in_async_mode(tmp_path):
+    args = [
+        '--users', '20', '--movies', '50', '--rents', '200', '--reviews', '50',
+        '--database-url', f"sqlite:///{tmp_path / 'bench.db'}",
+        '--iterations', '6', '--warmup', '1', '--baseline', str(tmp_path / 'baseline.json'),
+        '--mode', 'async', '--concurrency', '3', '--update-baseline',
+    ]
+
+    assert run.main(args) == 0
+    routes = json.loads((tmp_path / 'baseline.json').read_text())['small:async']['routes']
+    assert routes['case_movies']['queries'] == 1
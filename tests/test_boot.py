@@ -0,0 +1,55 @@
+import json
+
+import flasgger.base
+import pytest
+from sqlalchemy import text
+
+from filmestop import create_app, db
+from filmestop.boot import database_is_current, upgrade_if_needed
+from filmestop.models import User, Catalogue_Genre
+
+"""
+Testes da inicialização rápida.
+
+Cenários testados:
+- As migrations só são aplicadas quando o banco não está no head do Alembic
+- A especificação OpenAPI gerada no build é servida sem reler os docstrings
+- A carga de dados de demonstração é explícita (`flask seed demo`)
+"""
+
+
+def test_upgrade_only_when_behind_head(file_app):
+    assert not database_is_current()
+    assert upgrade_if_needed() is True
+    assert database_is_current()
+
+    assert upgrade_if_needed() is False
+    assert db.session.execute(text('SELECT count(*) FROM alembic_version')).scalar() == 1
+
+
+def test_prebuilt_openapi_spec_is_served(tmp_path, monkeypatch):
+    spec_file = tmp_path / 'openapi.json'
+    builder = create_app('testing')
+    result = builder.test_cli_runner().invoke(args=['openapi', 'build', '-o', str(spec_file)])
+    assert result.exit_code == 0, result.output
+    spec = json.loads(spec_file.read_text())
+    assert '/case/movies' in spec['paths']
+
+    app = create_app('testing', {'OPENAPI_SPEC_FILE': str(spec_file)})
+    # Se o Flasgger tentasse montar a especificação a partir das rotas, o teste falharia
+    monkeypatch.setattr(flasgger.base, 'get_specs', lambda *a, **kw: pytest.fail('docstrings parsed'))
+    response = app.test_client().get('/apispec_1.json')
+    assert response.status_code == 200
+    assert response.get_json() == spec
+
+
+def test_missing_spec_file_falls_back_to_docstrings(tmp_path):
+    app = create_app('testing', {'OPENAPI_SPEC_FILE': str(tmp_path / 'missing.json')})
+    assert '/case/movies' in app.test_client().get('/apispec_1.json').get_json()['paths']
+
+
+def test_seed_demo_command(app):
+    result = app.test_cli_runner().invoke(args=['seed', 'demo'])
+    assert result.exit_code == 0, result.output
+    assert User.query.count() == 5
+    assert Catalogue_Genre.query.count() == 10
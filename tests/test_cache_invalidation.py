@@ -0,0 +1,66 @@
+from filmestop import db
+from filmestop.models import Movie, Catalogue_Genre
+
+"""
+Testes da invalidação por tags do cache das rotas /case/movies.
+
+Cenários testados:
+- Criar, atualizar e remover filmes invalidam as listagens e o detalhe
+- Avaliar um filme invalida o detalhe com a nova média
+"""
+
+
+def test_create_movie_invalidates_listings(cached_client, setup_sample_data):
+    _, _, genre, _ = setup_sample_data
+    assert len(cached_client.get('/case/movies').get_json()['items']) == 1
+    assert len(cached_client.get(f'/case/movies?genre_id={genre.id}').get_json()['items']) == 1
+
+    cached_client.post('/movies', json={'name': 'New', 'director': 'Dir', 'year': 2020, 'genre_id': genre.id})
+
+    assert len(cached_client.get('/case/movies').get_json()['items']) == 2
+    assert len(cached_client.get(f'/case/movies?genre_id={genre.id}').get_json()['items']) == 2
+
+
+def test_update_movie_invalidates_detail_and_genres(cached_client, setup_sample_data):
+    _, movie, genre, _ = setup_sample_data
+    drama = Catalogue_Genre.query.filter_by(genre_name='Drama').first()
+    assert cached_client.get(f'/case/movies/{movie.id}').get_json()['name'] == 'Test Movie'
+    assert cached_client.get(f'/case/movies?genre_id={drama.id}').status_code == 404
+
+    cached_client.put(f'/movies/{movie.id}', json={'name': 'Renamed', 'genre_id': drama.id})
+
+    assert cached_client.get(f'/case/movies/{movie.id}').get_json()['name'] == 'Renamed'
+    assert cached_client.get(f'/case/movies?genre_id={drama.id}').status_code == 200
+    assert cached_client.get(f'/case/movies?genre_id={genre.id}').status_code == 404
+
+
+def test_review_invalidates_movie_detail(cached_client, setup_sample_data):
+    user, movie, _, _ = setup_sample_data
+    assert cached_client.get(f'/case/movies/{movie.id}').get_json()['avg_rate'] is None
+
+    cached_client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 80})
+
+    assert cached_client.get(f'/case/movies/{movie.id}').get_json()['avg_rate'] == 80
+
+
+def test_delete_movie_invalidates_detail(cached_client, setup_sample_data):
+    _, _, genre, _ = setup_sample_data
+    movie = Movie(name='Temp', director='Dir', year=2000, genre_id=genre.id)
+    db.session.add(movie)
+    db.session.commit()
+    assert cached_client.get(f'/case/movies/{movie.id}').status_code == 200
+
+    cached_client.delete(f'/movies/{movie.id}')
+
+    assert cached_client.get(f'/case/movies/{movie.id}').status_code == 404
+
+
+def test_detail_is_served_from_cache_until_invalidated(cached_client, setup_sample_data):
+    _, movie, _, _ = setup_sample_data
+    cached_client.get(f'/case/movies/{movie.id}')
+
+    # Escrita direta no banco, sem passar pelas rotas: o cache não é invalidado
+    movie.name = 'Changed outside the API'
+    db.session.commit()
+
+    assert cached_client.get(f'/case/movies/{movie.id}').get_json()['name'] == 'Test Movie'
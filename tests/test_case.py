@@ -1,6 +1,12 @@
+import threading
 from datetime import date
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
 from filmestop import create_app, db
 from filmestop.models import User, Movie, Rent, Review, Catalogue_Genre
+from seed_data import seed_genres
 
 """
 Testes para a Feature 1: listagem de filmes por gênero.
@@ -17,8 +23,8 @@ def test_get_movies_by_valid_genre(client, setup_sample_data):
 
     assert response.status_code == 200
     data = response.get_json()
-    assert isinstance(data, list)
-    assert any(f['id'] == movie.id for f in data)
+    assert data['next_cursor'] is None
+    assert any(f['id'] == movie.id for f in data['items'])
 
 def test_get_movies_by_invalid_genre_id(client):
     response = client.get('/case/movies?genre_id=999')
@@ -72,6 +78,7 @@ Testes da Feature 3: Aluguel de filmes
 Cenários testados:
 - Criação bem-sucedida de aluguel com dados válidos
 - Falha ao omitir informações obrigatórias
+- Falha quando rent_days não é um inteiro positivo (também por item no lote)
 - Falha ao fornecer movie_id inexistente
 - Falha ao fornecer user_id inexistente
 - Falha ao fornecer data em formato inválido
@@ -110,6 +117,21 @@ def test_post_miss_info_rent(client, setup_sample_data):
     assert data['error'] == 'Missing rent information'
 
 
+@pytest.mark.parametrize('rent_days', [0, -3, 2.5, 'abc', True, [3]])
+def test_post_invalid_rent_days(client, setup_sample_data, rent_days):
+    """Retorna erro 400 quando rent_days não é um inteiro positivo"""
+    user, movie, _, _ = setup_sample_data
+
+    response = client.post(f'/case/users/{user.id}/movies/{movie.id}/rent', json={
+        'start_date': '2025-01-10',
+        'rent_days': rent_days
+    })
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'rent_days must be a positive integer'
+    assert Rent.query.count() == 1
+
+
 def test_post_invalid_movie_id_rent(client, setup_sample_data):
     """Retorna erro 404 ao tentar alugar um filme com movie_id inexistente"""
     user, _, _, _ = setup_sample_data
@@ -261,4 +283,243 @@ def test_get_rented_movies_nonexistent_user(client):
     assert response.status_code == 200
     data = response.get_json()
     assert isinstance(data, list)
-    assert data == []  # sem aluguéis registrados
\ No newline at end of file
+    assert data == []  # sem aluguéis registrados
+
+"""
+Testes da agregação incremental das avaliações
+
+Cenários testados:
+- Novas avaliações somam ao total e ao contador do filme
+- Editar uma avaliação aplica apenas a diferença entre as notas
+"""
+def test_review_updates_running_aggregates(client, setup_sample_data):
+    """Duas avaliações de usuários diferentes atualizam soma, contador e média"""
+    user, movie, _, _ = setup_sample_data
+    other = User(name='Other User', email='other@example.com', phone='9777777777')
+    db.session.add(other)
+    db.session.commit()
+    db.session.add(Rent(user_id=other.id, movie_id=movie.id, start_date=date(2025, 1, 2), rent_days=2))
+    db.session.commit()
+
+    client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 90})
+    response = client.post(f'/case/users/{other.id}/movies/{movie.id}/review', json={'rate': 75})
+
+    assert response.get_json()['rating_info']['new_avg_rate'] == 82.5
+    movie = db.session.get(Movie, movie.id)
+    assert movie.sum_rate == 165
+    assert movie.count_review == 2
+    assert movie.avg_rate == 82.5
+
+
+def test_review_edit_applies_rate_delta(client, setup_sample_data):
+    """Reavaliar o mesmo filme não incrementa o contador"""
+    user, movie, _, _ = setup_sample_data
+
+    client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 40})
+    client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 70})
+
+    movie = db.session.get(Movie, movie.id)
+    assert movie.sum_rate == 70
+    assert movie.count_review == 1
+    assert movie.avg_rate == 70
+    assert Review.query.filter_by(movie_id=movie.id).count() == 1
+
+
+"""
+Testes do aluguel em lote
+
+Cenários testados:
+- Lote com itens válidos e inválidos retorna o resultado de cada item
+- Corpo que não é uma lista é rejeitado
+- Ids que não são inteiros (texto, fração, booleano) são recusados com mensagem fixa
+"""
+def test_post_rent_batch_with_partial_failures(client, setup_sample_data):
+    """Grava os itens válidos e informa o erro dos inválidos, na ordem do envio"""
+    user, movie, _, _ = setup_sample_data
+
+    response = client.post('/case/rents/batch', json=[
+        {'user_id': user.id, 'movie_id': movie.id, 'start_date': '2025-02-01', 'rent_days': 2},
+        {'user_id': 9999, 'movie_id': movie.id, 'start_date': '2025-02-01', 'rent_days': 2},
+        {'user_id': user.id, 'movie_id': 9999, 'start_date': '2025-02-01', 'rent_days': 2},
+        {'user_id': user.id, 'movie_id': movie.id, 'start_date': '01/02/2025', 'rent_days': 2},
+        {'user_id': user.id, 'movie_id': movie.id, 'start_date': '2025-02-03', 'rent_days': 4},
+        {'user_id': user.id, 'movie_id': movie.id, 'start_date': '2025-02-04', 'rent_days': 'abc'},
+        {'user_id': user.id, 'movie_id': movie.id, 'start_date': '2025-02-04', 'rent_days': 0},
+    ])
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['created'] == 2
+    assert data['failed'] == 5
+    assert [r['status'] for r in data['results']] == [201, 404, 404, 400, 201, 400, 400]
+    assert data['results'][1]['error'] == 'User id not found'
+    assert data['results'][2]['error'] == 'Movie id not found'
+    assert data['results'][3]['error'] == 'Invalid start_date format. Use YYYY-MM-DD'
+    assert data['results'][5]['error'] == 'rent_days must be a positive integer'
+    assert data['results'][6]['error'] == 'rent_days must be a positive integer'
+
+    created = data['results'][4]['rent']
+    rent = db.session.get(Rent, created['id'])
+    assert rent.start_date == date(2025, 2, 3)
+    assert rent.rent_days == 4
+    assert Rent.query.filter_by(user_id=user.id).count() == 3
+
+
+@pytest.mark.parametrize('ids', [
+    {'user_id': 'abc'},
+    {'user_id': 1.9},
+    {'movie_id': True},
+    {'movie_id': [1]},
+    {'user_id': None},
+])
+def test_post_rent_batch_rejects_invalid_ids(client, setup_sample_data, ids):
+    """Ids inválidos não são truncados nem expõem a mensagem da exceção do Python"""
+    user, movie, _, _ = setup_sample_data
+    item = dict({'user_id': user.id, 'movie_id': movie.id, 'start_date': '2025-02-01', 'rent_days': 2}, **ids)
+
+    response = client.post('/case/rents/batch', json=[item])
+
+    result, = response.get_json()['results']
+    assert result['status'] == 400
+    expected = 'Missing rent information' if None in ids.values() else 'user_id and movie_id must be integers'
+    assert result['error'] == expected
+    assert Rent.query.filter_by(start_date=date(2025, 2, 1)).count() == 0
+
+
+def test_post_rent_batch_requires_list(client):
+    """Retorna erro 400 quando o corpo não é uma lista"""
+    response = client.post('/case/rents/batch', json={'user_id': 1})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Rent batch must be a non-empty list'
+
+
+"""
+Testes da avaliação em lote
+
+Cenários testados:
+- Lote cria e atualiza avaliações e recalcula a média uma vez por filme
+- Itens de filmes não alugados ou com nota inválida são rejeitados individualmente
+- Importação pelo comando `flask reviews import`
+"""
+def test_post_review_batch(client, setup_sample_data):
+    """Cria, atualiza e rejeita avaliações no mesmo lote"""
+    user, movie, genre, _ = setup_sample_data
+    other = User(name='Other User', email='other@example.com', phone='9777777777')
+    unrented = Movie(name='Unrented', director='Dir', year=2001, genre_id=genre.id)
+    db.session.add_all([other, unrented])
+    db.session.commit()
+    db.session.add(Rent(user_id=other.id, movie_id=movie.id, start_date=date(2025, 1, 2), rent_days=2))
+    db.session.add(Review(user_id=user.id, movie_id=movie.id, rate=10))
+    db.session.commit()
+
+    response = client.post('/case/reviews/batch', json=[
+        {'user_id': user.id, 'movie_id': movie.id, 'rate': 90},
+        {'user_id': other.id, 'movie_id': movie.id, 'rate': 70},
+        {'user_id': user.id, 'movie_id': unrented.id, 'rate': 50},
+        {'user_id': user.id, 'movie_id': movie.id, 'rate': 101},
+    ])
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['saved'] == 2
+    assert data['failed'] == 2
+    assert [r['status'] for r in data['results']] == [200, 201, 403, 400]
+
+    movie = db.session.get(Movie, movie.id)
+    assert movie.count_review == 2
+    assert movie.sum_rate == 160
+    assert movie.avg_rate == 80
+    assert Review.query.filter_by(movie_id=movie.id).count() == 2
+
+
+def test_import_reviews_command(app, setup_sample_data, tmp_path):
+    """Importa avaliações de um CSV pela linha de comando"""
+    user, movie, _, _ = setup_sample_data
+    csv_file = tmp_path / 'reviews.csv'
+    csv_file.write_text(f'user_id,movie_id,rate\n{user.id},{movie.id},65\n{user.id},9999,80\n')
+
+    result = app.test_cli_runner().invoke(args=['reviews', 'import', str(csv_file)])
+
+    assert result.exit_code == 0
+    assert '1 reviews saved, 1 failed.' in result.output
+    assert db.session.get(Movie, movie.id).avg_rate == 65
+
+
+def test_review_write_is_a_single_upsert(client, setup_sample_data, capture_sql):
+    """A avaliação é gravada com um único INSERT ... ON CONFLICT, sem SELECT prévio na tabela reviews"""
+    user, movie, _, _ = setup_sample_data
+    with capture_sql() as captured:
+        client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 60})
+        client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 30})
+    statements = [' '.join(s.statement.split()) for s in captured]
+
+    review_writes = [s for s in statements if s.startswith('INSERT INTO reviews')]
+    assert len(review_writes) == 2
+    assert all('ON CONFLICT (user_id, movie_id) DO UPDATE' in s for s in review_writes)
+    assert not [s for s in statements if s.startswith('SELECT') and 'FROM reviews' in s]
+    assert Review.query.filter_by(user_id=user.id, movie_id=movie.id).one().rate == 30
+    assert db.session.get(Movie, movie.id).count_review == 1
+
+
+def test_review_locks_movie_row(client, setup_sample_data):
+    """O filme é lido com SELECT ... FOR UPDATE (no PostgreSQL) antes de aplicar a variação da nota"""
+    user, movie, _, _ = setup_sample_data
+    statements = []
+
+    def do_orm_execute(orm_execute_state):
+        if orm_execute_state.is_select or orm_execute_state.is_update:
+            statements.append(str(orm_execute_state.statement.compile(dialect=postgresql.dialect())))
+
+    event.listen(db.session, 'do_orm_execute', do_orm_execute)
+    try:
+        client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 60})
+    finally:
+        event.remove(db.session, 'do_orm_execute', do_orm_execute)
+
+    movie_lock = next(i for i, s in enumerate(statements) if 'FROM movies' in s and s.endswith('FOR UPDATE'))
+    rating_update = next(i for i, s in enumerate(statements) if s.startswith('UPDATE movies'))
+    assert movie_lock < rating_update
+
+
+def test_concurrent_first_reviews_count_once(tmp_path):
+    """Duas primeiras avaliações simultâneas do mesmo usuário contam uma única review"""
+    # Banco em arquivo: cada thread usa a sua própria conexão
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'reviews.db'}"})
+    with app.app_context():
+        db.create_all()
+        seed_genres()
+        genre = Catalogue_Genre.query.filter_by(genre_name='Action').first()
+        user = User(name='Test User', email='test@example.com', phone='9888888888')
+        movie = Movie(name='Test Movie', director='Test Director', year=2010, genre_id=genre.id)
+        db.session.add_all([user, movie])
+        db.session.flush()
+        db.session.add(Rent(user_id=user.id, movie_id=movie.id, start_date=date(2025, 1, 1), rent_days=3))
+        db.session.commit()
+        user_id, movie_id = user.id, movie.id
+
+    # As duas requisições só começam juntas
+    barrier = threading.Barrier(2, timeout=5)
+
+    @app.before_request
+    def start_together():
+        barrier.wait()
+
+    statuses = []
+
+    def review(rate):
+        response = app.test_client().post(f'/case/users/{user_id}/movies/{movie_id}/review', json={'rate': rate})
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=review, args=(rate,)) for rate in (40, 60)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        stored_rate = Review.query.filter_by(user_id=user_id, movie_id=movie_id).one().rate
+        movie = db.session.get(Movie, movie_id)
+        assert statuses == [200, 200]
+        assert (movie.count_review, movie.sum_rate, movie.avg_rate) == (1, stored_rate, stored_rate)
+        db.drop_all()
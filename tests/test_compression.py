@@ -0,0 +1,72 @@
+import gzip
+import json
+
+import brotli
+import pytest
+
+from filmestop import db
+from filmestop.models import Movie
+
+"""
+Testes da compressão negociada das respostas cacheadas de /case/movies.
+
+Cenários testados:
+- gzip e br são servidos conforme o Accept-Encoding, com o mesmo conteúdo
+- Sem Accept-Encoding a resposta vai sem compressão
+- Respostas pequenas não são comprimidas
+- Um acerto do cache não comprime de novo
+- Cada codificação tem o seu próprio ETag
+"""
+
+
+@pytest.fixture
+def catalogue(app, setup_sample_data):
+    _, _, genre, _ = setup_sample_data
+    db.session.add_all([
+        Movie(name=f'Movie {i}', director=f'Director {i}', year=2000 + i % 20, genre_id=genre.id)
+        for i in range(50)
+    ])
+    db.session.commit()
+
+
+def test_gzip_and_brotli_are_negotiated(cached_client, catalogue):
+    plain = cached_client.get('/case/movies')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    gzipped = cached_client.get('/case/movies', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(gzipped.data)) == plain.get_json()
+    assert len(gzipped.data) < len(plain.data)
+
+    preferred = cached_client.get('/case/movies', headers={'Accept-Encoding': 'gzip, br'})
+    assert preferred.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(preferred.data)) == plain.get_json()
+
+
+def test_small_responses_are_not_compressed(cached_client, setup_sample_data):
+    _, movie, _, _ = setup_sample_data
+    response = cached_client.get(f'/case/movies/{movie.id}', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['name'] == 'Test Movie'
+
+
+def test_cache_hit_does_not_compress_again(cached_client, catalogue, monkeypatch):
+    calls = []
+    compress = gzip.compress
+    monkeypatch.setattr(gzip, 'compress', lambda *a, **kw: calls.append(1) or compress(*a, **kw))
+
+    for _ in range(3):
+        response = cached_client.get('/case/movies', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+
+    assert len(calls) == 1
+
+
+def test_etag_depends_on_encoding(cached_client, catalogue):
+    plain = cached_client.get('/case/movies').headers['ETag']
+    gzipped = cached_client.get('/case/movies', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    assert plain != gzipped
+
+    response = cached_client.get('/case/movies', headers={'Accept-Encoding': 'gzip', 'If-None-Match': gzipped})
+    assert response.status_code == 304
@@ -0,0 +1,55 @@
+"""
+Testes do GET condicional (ETag / If-None-Match) das rotas /case/movies.
+
+Cenários testados:
+- Listagem e detalhe retornam ETag e respondem 304 para o mesmo ETag
+- O 304 não executa nenhuma consulta no banco
+- Escritas (avaliação e alteração de filme) mudam o ETag
+- Query strings diferentes têm ETags diferentes
+"""
+
+
+def test_detail_returns_304_without_queries(cached_client, setup_sample_data, capture_sql):
+    _, movie, _, _ = setup_sample_data
+    first = cached_client.get(f'/case/movies/{movie.id}')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    with capture_sql() as statements:
+        second = cached_client.get(f'/case/movies/{movie.id}', headers={'If-None-Match': etag})
+
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == etag
+    assert statements == []
+
+
+def test_listing_etag_changes_after_movie_update(cached_client, setup_sample_data):
+    _, movie, genre, _ = setup_sample_data
+    etag = cached_client.get('/case/movies').headers['ETag']
+    assert cached_client.get('/case/movies', headers={'If-None-Match': etag}).status_code == 304
+
+    cached_client.put(f'/movies/{movie.id}', json={'name': 'Renamed'})
+
+    response = cached_client.get('/case/movies', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['items'][0]['name'] == 'Renamed'
+
+
+def test_review_changes_detail_etag(cached_client, setup_sample_data):
+    user, movie, _, _ = setup_sample_data
+    etag = cached_client.get(f'/case/movies/{movie.id}').headers['ETag']
+
+    cached_client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 80})
+
+    response = cached_client.get(f'/case/movies/{movie.id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['avg_rate'] == 80
+
+
+def test_query_string_is_part_of_etag(cached_client, setup_sample_data):
+    _, _, genre, _ = setup_sample_data
+    all_movies = cached_client.get('/case/movies').headers['ETag']
+    by_genre = cached_client.get(f'/case/movies?genre_id={genre.id}').headers['ETag']
+    assert all_movies != by_genre
@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import exc
+
+from filmestop import create_app, db
+from filmestop.db_pool import MeteredQueuePool, engine_options_from_env
+
+"""
+Testes da configuração e das métricas do pool de conexões.
+
+Cenários testados:
+- As opções da engine vêm das variáveis DB_POOL_* (com valores padrão)
+- Checkouts, timeouts e saturação do pool aparecem em /metrics
+- As métricas continuam valendo depois de engine.dispose()
+"""
+
+
+def test_engine_options_from_env():
+    assert engine_options_from_env({}) == {
+        'poolclass': MeteredQueuePool,
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 30.0,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    }
+
+    options = engine_options_from_env({
+        'DB_POOL_SIZE': '20', 'DB_MAX_OVERFLOW': '0', 'DB_POOL_TIMEOUT': '2.5',
+        'DB_POOL_RECYCLE': '300', 'DB_POOL_PRE_PING': 'false',
+    })
+    assert options['pool_size'] == 20
+    assert options['max_overflow'] == 0
+    assert options['pool_timeout'] == 2.5
+    assert options['pool_recycle'] == 300
+    assert options['pool_pre_ping'] is False
+
+
+@pytest.fixture
+def pooled_app(tmp_path):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'pool.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options_from_env({'DB_POOL_SIZE': '1', 'DB_MAX_OVERFLOW': '1',
+                                                              'DB_POOL_TIMEOUT': '0.05'}),
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_pool_metrics(pooled_app, metric_value):
+    client = pooled_app.test_client()
+    client.get('/movies')
+    db.session.remove()  # devolve a conexão da sessão (o contexto da app é o do fixture)
+
+    held = [db.engine.connect(), db.engine.connect()]
+    text = client.get('/metrics').get_data(as_text=True)
+    assert metric_value(text, 'filmestop_db_pool_checkout_seconds_count{bind="default"}') >= 3
+    assert metric_value(text, 'filmestop_db_pool_connections_in_use{bind="default"}') == 2
+    assert metric_value(text, 'filmestop_db_pool_saturation{bind="default"}') == 1.0
+
+    with pytest.raises(exc.TimeoutError):
+        db.engine.connect()
+    for connection in held:
+        connection.close()
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert metric_value(text, 'filmestop_db_pool_timeouts_total{bind="default"}') == 1
+    assert metric_value(text, 'filmestop_db_pool_saturation{bind="default"}') == 0.0
+
+
+def test_pool_metrics_survive_dispose(pooled_app, metric_value):
+    client = pooled_app.test_client()
+    db.engine.dispose()
+    client.get('/movies')
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert metric_value(text, 'filmestop_db_pool_checkout_seconds_count{bind="default"}') >= 1
@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from benchmarks.asgi_client import asgi_request
+from filmestop import create_app, db
+from filmestop.asgi import AsyncApp
+from filmestop.extensions import cache
+from filmestop.db_routing import replica_binds_from_env
+from filmestop.models import User, Movie, Rent, Catalogue_Genre
+
+"""
+Testes do roteamento de leituras para réplicas.
+
+Usa dois arquivos SQLite: o primário e uma "réplica" com dados propositalmente
+diferentes, para saber de qual banco veio cada leitura.
+
+Cenários testados:
+- Rotas GET leem da réplica
+- Respostas montadas para o cache leem do primário (também no modo assíncrono)
+- Rotas de escrita leem e escrevem no primário
+- Depois de uma escrita, as leituras da mesma requisição ficam no primário
+- Sem réplicas configuradas, tudo vai para o primário
+- DATABASE_REPLICA_URLS gera os binds das réplicas
+"""
+
+
+@pytest.fixture
+def routed_app(tmp_path):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_BINDS': {'replica_1': f"sqlite:///{tmp_path / 'replica.db'}"},
+    })
+
+    with app.app_context():
+        for bind_key, name in ((None, 'Primary'), ('replica_1', 'Replica')):
+            engine = db.engines[bind_key]
+            db.metadata.create_all(engine)
+            with db.Session(bind=engine) as session:
+                _add_genres(session)
+                genre = session.scalars(select(Catalogue_Genre).filter_by(genre_name='Action')).one()
+                session.add(User(id=1, name='User', email='user@example.com', phone='9888888888'))
+                session.add(Movie(id=1, name=name, director='Dir', year=2000, genre_id=genre.id))
+                session.commit()
+        yield app
+        db.session.remove()
+        # O Flask-SQLAlchemy registra um MetaData por bind no singleton `db`;
+        # remove o da réplica para não afetar o db.create_all() dos outros testes
+        db.metadatas.pop('replica_1', None)
+
+
+def _add_genres(session):
+    for name in ('Action', 'Drama'):
+        session.add(Catalogue_Genre(genre_name=name))
+    session.flush()
+
+
+def test_get_routes_read_from_replica(routed_app):
+    client = routed_app.test_client()
+    assert client.get('/movies/1').get_json()['name'] == 'Replica'
+    db.session.remove()
+    assert client.get('/movies').get_json()['items'][0]['name'] == 'Replica'
+
+
+def test_cached_routes_are_built_from_primary(routed_app):
+    # A réplica pode estar atrasada em relação à versão das tags da chave
+    cache.init_app(routed_app, config={'CACHE_TYPE': 'SimpleCache'})
+    client = routed_app.test_client()
+    assert client.get('/case/movies/1').get_json()['name'] == 'Primary'
+    db.session.remove()
+    assert client.get('/case/movies').get_json()['items'][0]['name'] == 'Primary'
+
+
+def test_async_cached_routes_are_built_from_primary(routed_app):
+    cache.init_app(routed_app, config={'CACHE_TYPE': 'SimpleCache'})
+    async_app = AsyncApp(routed_app)
+
+    async def scenario():
+        try:
+            return [json.loads(body) for _, _, body in await asyncio.gather(
+                asgi_request(async_app, 'GET', '/case/movies/1'),
+                asgi_request(async_app, 'GET', '/case/movies'),
+            )]
+        finally:
+            await async_app.close()
+
+    detail, listing = asyncio.run(scenario())
+    assert detail['name'] == 'Primary'
+    assert listing['items'][0]['name'] == 'Primary'
+
+
+def test_write_routes_use_primary(routed_app):
+    client = routed_app.test_client()
+    response = client.post('/case/users/1/movies/1/rent', json={'start_date': '2025-01-01', 'rent_days': 3})
+    assert response.status_code == 201
+    db.session.remove()
+
+    with db.Session(bind=db.engines[None]) as primary, db.Session(bind=db.engines['replica_1']) as replica:
+        assert primary.scalar(select(Rent).filter_by(user_id=1, movie_id=1)) is not None
+        assert replica.scalar(select(Rent)) is None
+
+
+def test_reads_after_write_stay_on_primary(routed_app):
+    with routed_app.test_request_context('/case/movies/1', method='GET'):
+        assert db.session.get(Movie, 1).name == 'Replica'
+
+        db.session.add(User(name='New', email='new@example.com', phone='9777777777'))
+        db.session.flush()
+
+        assert db.session.scalar(select(Movie.name).where(Movie.id == 1)) == 'Primary'
+        assert db.session.scalar(select(User.id).where(User.email == 'new@example.com')) is not None
+        db.session.rollback()
+        db.session.remove()
+
+
+def test_without_replicas_reads_use_primary(app, client, setup_sample_data):
+    _, movie, _, _ = setup_sample_data
+    assert client.get(f'/case/movies/{movie.id}').get_json()['name'] == 'Test Movie'
+
+
+def test_replica_binds_from_env():
+    assert replica_binds_from_env({}) == {}
+    assert replica_binds_from_env({'DATABASE_REPLICA_URLS': 'postgresql://r1/db, postgresql://r2/db'}) == {
+        'replica_1': 'postgresql://r1/db',
+        'replica_2': 'postgresql://r2/db',
+    }
@@ -0,0 +1,45 @@
+import json
+
+"""
+Testes da exportação em NDJSON.
+
+Cenários testados:
+- Exportação de aluguéis pela rota, uma linha JSON por registro
+- Tabela não exportável
+- Exportação pela linha de comando
+"""
+
+
+def test_export_rents_as_ndjson(client, setup_sample_data):
+    user, movie, _, rent = setup_sample_data
+
+    response = client.get('/export/rents')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == [{
+        'id': rent.id,
+        'user_id': user.id,
+        'movie_id': movie.id,
+        'start_date': '2025-01-01',
+        'rent_days': 3
+    }]
+
+
+def test_export_unknown_table(client):
+    response = client.get('/export/users')
+
+    assert response.status_code == 404
+    assert response.get_json()['error'] == 'Table users cannot be exported'
+
+
+def test_export_movies_command(app, setup_sample_data, tmp_path):
+    _, movie, _, _ = setup_sample_data
+    output = tmp_path / 'movies.ndjson'
+
+    result = app.test_cli_runner().invoke(args=['export', 'table', 'movies', '-o', str(output)])
+
+    assert result.exit_code == 0
+    exported = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [m['name'] for m in exported] == [movie.name]
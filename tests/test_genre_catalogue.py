@@ -0,0 +1,89 @@
+from flask import g
+from sqlalchemy import text
+
+from filmestop import db
+from filmestop.cache_tags import GENRES_TAG, tag_versions
+from filmestop.extensions import cache
+from filmestop.genre_catalogue import genre_catalogue
+from filmestop.models import Movie, Catalogue_Genre
+
+"""
+Testes do catálogo de gêneros em memória usado na serialização de filmes.
+
+Cenários testados:
+- Listar N filmes não dispara uma consulta de gênero por filme
+- Gênero novo ou renomeado é refletido na serialização
+- Gênero alterado por outro processo (nova versão de GENRES_TAG) recarrega o mapa
+- Escritas em catalogue_genre publicam uma nova versão de GENRES_TAG depois do commit
+"""
+
+
+def test_movie_listing_does_not_lazy_load_genres(client, app, capture_sql):
+    """A listagem custa uma consulta, independentemente do número de filmes"""
+    genres = Catalogue_Genre.query.all()
+    db.session.add_all([
+        Movie(name=f'Movie {i}', director='Dir', year=2000, genre_id=genres[i % len(genres)].id)
+        for i in range(20)
+    ])
+    db.session.commit()
+    genre_catalogue.load()
+    db.session.expunge_all()
+
+    with capture_sql() as statements:
+        response = client.get('/movies')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['items']) == 20
+    assert not [s for s in statements if 'catalogue_genre' in s.statement]
+
+
+def test_genre_changes_refresh_catalogue(client, app):
+    """Inserir ou renomear um gênero invalida o mapa em memória"""
+    genre = Catalogue_Genre(genre_name='Western')
+    db.session.add(genre)
+    db.session.commit()
+    movie = Movie(name='Django', director='Tarantino', year=2012, genre_id=genre.id)
+    db.session.add(movie)
+    db.session.commit()
+
+    assert client.get(f'/movies/{movie.id}').get_json()['genre'] == 'Western'
+
+    version = genre_catalogue.version
+    genre.genre_name = 'Faroeste'
+    db.session.commit()
+
+    assert client.get(f'/movies/{movie.id}').get_json()['genre'] == 'Faroeste'
+    assert genre_catalogue.version > version
+
+
+def test_genre_changes_from_other_processes_refresh_catalogue(cached_client, app):
+    """Cada processo recarrega o mapa quando a versão compartilhada dos gêneros muda"""
+    genre = Catalogue_Genre.query.filter_by(genre_name='Action').first()
+    movie = Movie(name='Heat', director='Mann', year=1995, genre_id=genre.id)
+    db.session.add(movie)
+    db.session.commit()
+    assert cached_client.get(f'/movies/{movie.id}').get_json()['genre'] == 'Action'
+
+    # Outro processo renomeia o gênero: as escritas desta aplicação não ficam sabendo
+    db.session.execute(text("UPDATE catalogue_genre SET genre_name = 'Ação' WHERE id = :id"), {'id': genre.id})
+    db.session.commit()
+    g.pop('tag_versions', None)
+    assert cached_client.get(f'/movies/{movie.id}').get_json()['genre'] == 'Action'
+
+    # ... e, depois do commit, publica uma nova versão da tag
+    cache.set('tag-version:' + GENRES_TAG, 'other-process', timeout=0)
+    g.pop('tag_versions', None)
+    assert cached_client.get(f'/movies/{movie.id}').get_json()['genre'] == 'Ação'
+
+
+def test_genre_writes_publish_new_version(cached_client, app):
+    """Escritas em catalogue_genre trocam a versão de GENRES_TAG depois do commit"""
+    version, = tag_versions([GENRES_TAG])
+
+    genre = Catalogue_Genre(genre_name='Western')
+    db.session.add(genre)
+    db.session.flush()
+    assert tag_versions([GENRES_TAG]) == [version]
+
+    db.session.commit()
+    assert tag_versions([GENRES_TAG]) != [version]
@@ -0,0 +1,84 @@
+from datetime import date
+
+from flask import g
+
+from filmestop import db
+from filmestop.models import User, Movie, Rent, Catalogue_Genre
+
+"""
+Testes das estatísticas por gênero (/case/genres/stats).
+
+Cenários testados:
+- Filmes, aluguéis, avaliações e nota média por gênero (gêneros vazios incluídos)
+- A resposta fica em cache e é invalidada por aluguel, avaliação e cadastro de filme
+- Renomear ou cadastrar um gênero invalida a resposta e o ETag
+"""
+
+
+def _stats_by_genre(client):
+    response = client.get('/case/genres/stats')
+    assert response.status_code == 200
+    return {row['genre']: row for row in response.get_json()}
+
+
+def test_genre_stats(client, setup_sample_data):
+    user, movie, _, _ = setup_sample_data
+    drama = Catalogue_Genre.query.filter_by(genre_name='Drama').first()
+    other = Movie(name='Other Action', director='Dir', year=2001, genre_id=movie.genre_id)
+    db.session.add_all([other, Movie(name='Drama', director='Dir', year=2002, genre_id=drama.id)])
+    db.session.flush()
+    db.session.add(Rent(user_id=user.id, movie_id=other.id, start_date=date(2025, 1, 2), rent_days=3))
+    db.session.commit()
+    client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 80})
+    client.post(f'/case/users/{user.id}/movies/{other.id}/review', json={'rate': 61})
+
+    stats = _stats_by_genre(client)
+
+    assert stats['Action'] == {
+        'genre_id': movie.genre_id, 'genre': 'Action', 'movie_count': 2,
+        'total_rentals': 2, 'review_count': 2, 'mean_rating': 70.5
+    }
+    assert stats['Drama']['movie_count'] == 1
+    assert stats['Drama']['mean_rating'] is None
+    assert stats['Comedy']['movie_count'] == 0
+    assert stats['Comedy']['total_rentals'] == 0
+
+
+def test_genre_stats_cache_is_invalidated_by_writes(cached_client, setup_sample_data):
+    user, movie, genre, _ = setup_sample_data
+    assert _stats_by_genre(cached_client)['Action']['total_rentals'] == 1
+
+    # Escrita fora da API: a resposta em cache continua sendo servida
+    db.session.add(Rent(user_id=user.id, movie_id=movie.id, start_date=date(2025, 2, 1), rent_days=1))
+    db.session.commit()
+    assert _stats_by_genre(cached_client)['Action']['total_rentals'] == 1
+
+    cached_client.post(f'/case/users/{user.id}/movies/{movie.id}/rent',
+                       json={'start_date': '2025-03-01', 'rent_days': 2})
+    assert _stats_by_genre(cached_client)['Action']['total_rentals'] == 3
+
+    cached_client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 90})
+    assert _stats_by_genre(cached_client)['Action']['mean_rating'] == 90
+
+    cached_client.post('/movies', json={'name': 'New', 'director': 'Dir', 'year': 2020, 'genre_id': genre.id})
+    assert _stats_by_genre(cached_client)['Action']['movie_count'] == 2
+
+
+def test_genre_stats_cache_is_invalidated_by_genre_changes(cached_client, setup_sample_data):
+    _, _, genre, _ = setup_sample_data
+    response = cached_client.get('/case/genres/stats')
+    etag = response.headers['ETag']
+
+    genre.genre_name = 'Ação'
+    db.session.add(Catalogue_Genre(genre_name='Western'))
+    db.session.commit()
+    # O app context dos testes é compartilhado entre as requisições
+    g.pop('tag_versions', None)
+
+    response = cached_client.get('/case/genres/stats', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    stats = {row['genre']: row for row in response.get_json()}
+    assert stats['Ação']['movie_count'] == 1
+    assert 'Action' not in stats
+    assert stats['Western']['movie_count'] == 0
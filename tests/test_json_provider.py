@@ -0,0 +1,64 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from filmestop import create_app, db
+from filmestop.json_provider import OrjsonProvider, StdlibJSONProvider
+
+"""
+Testes do provider JSON da aplicação.
+
+Cenários testados:
+- orjson é usado por padrão e JSON_PROVIDER='stdlib' volta ao json padrão
+- Os dois providers geram saída equivalente para datas, Decimal e linhas do SQLAlchemy
+- A rota de filmes alugados serializa as linhas da consulta diretamente
+"""
+
+
+def test_provider_selection():
+    assert isinstance(create_app('testing').json, OrjsonProvider)
+    assert type(create_app('testing', {'JSON_PROVIDER': 'stdlib'}).json) is StdlibJSONProvider
+
+
+@pytest.mark.parametrize('provider_class', [StdlibJSONProvider, OrjsonProvider])
+def test_providers_serialize_extended_types(app, provider_class):
+    provider = provider_class(app)
+    row = db.session.execute(text("SELECT 1 AS id, 'Titanic' AS name")).one()
+    payload = {
+        'day': date(2025, 1, 1),
+        'at': datetime(2025, 1, 1, 10, 30),
+        'price': Decimal('9.90'),
+        'row': row,
+    }
+
+    assert provider.loads(provider.dumps(payload)) == {
+        'day': '2025-01-01',
+        'at': '2025-01-01T10:30:00',
+        'price': '9.90',
+        'row': {'id': 1, 'name': 'Titanic'},
+    }
+
+
+def test_providers_produce_same_response(app):
+    payload = [{'b': 1, 'a': date(2025, 1, 1)}, {'name': 'Ação'}]
+    with app.test_request_context():
+        stdlib = StdlibJSONProvider(app).response(payload).get_data()
+        fast = OrjsonProvider(app).response(payload).get_data()
+    # orjson grava UTF-8 em vez de escapar caracteres não ASCII; o JSON é equivalente
+    assert json.loads(stdlib) == json.loads(fast)
+    assert stdlib.startswith(b'[{"a":"2025-01-01","b":1}') and fast.startswith(b'[{"a":"2025-01-01","b":1}')
+
+
+def test_rented_movies_serializes_rows(client, setup_sample_data):
+    user, movie, _, rent = setup_sample_data
+    response = client.get(f'/case/users/{user.id}/rented_movies')
+    assert response.status_code == 200
+    assert response.get_json() == [{
+        'rent_id': rent.id,
+        'movie_name': 'Test Movie',
+        'rent_start_date': '2025-01-01',
+        'movie_rating': None,
+    }]
@@ -0,0 +1,155 @@
+from datetime import date
+
+import fakeredis
+import pytest
+
+from filmestop import db
+from filmestop.leaderboard import RedisRanking, LocalRanking, bayesian_score, leaderboard
+from filmestop.models import User, Movie, Rent, Catalogue_Genre
+
+"""
+Testes do ranking dos filmes mais bem avaliados (/case/movies/top).
+
+Cenários testados:
+- Avaliações atualizam o ranking; a nota bayesiana favorece filmes com mais avaliações
+- Filtro por gênero e por mínimo de avaliações (um ranking por limiar)
+- Troca de gênero atualiza o ranking
+- O ranking é montado a partir do banco na primeira consulta; remover o filme o tira do ranking
+- Ranking no Redis (fakeredis): atualização, filtros e reconstrução
+- Atualizações fora de ordem (rating_version mais antiga) são ignoradas
+- Parâmetros inválidos retornam 400
+"""
+
+
+def _movie(name, genre_name):
+    genre = Catalogue_Genre.query.filter_by(genre_name=genre_name).first()
+    movie = Movie(name=name, director='Dir', year=2000, genre_id=genre.id)
+    db.session.add(movie)
+    db.session.commit()
+    return movie
+
+
+def _review(client, movie, rates):
+    """Cria um usuário por nota, aluga o filme e avalia pela rota."""
+    for rate in rates:
+        user = User(name='Reviewer', email=f'r{User.query.count()}@example.com', phone='9888888888')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Rent(user_id=user.id, movie_id=movie.id, start_date=date(2025, 1, 1), rent_days=3))
+        db.session.commit()
+        response = client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': rate})
+        assert response.status_code == 200
+
+
+def _top_names(client, query=''):
+    response = client.get('/case/movies/top' + query)
+    assert response.status_code == 200
+    return [movie['name'] for movie in response.get_json()]
+
+
+def test_reviews_update_bayesian_ranking(client):
+    single = _movie('Single perfect review', 'Action')
+    popular = _movie('Many good reviews', 'Action')
+    client.get('/case/movies/top')  # ranking montado antes das avaliações
+
+    _review(client, single, [100])
+    _review(client, popular, [90] * 20)
+
+    data = client.get('/case/movies/top').get_json()
+    assert [movie['name'] for movie in data] == ['Many good reviews', 'Single perfect review']
+    assert data[0]['score'] == round(bayesian_score(1800, 20, 50, 10), 2)
+    assert data[1]['count_review'] == 1
+
+
+def test_genre_and_min_reviews_filters(client):
+    action = _movie('Action movie', 'Action')
+    drama = _movie('Drama movie', 'Drama')
+    _review(client, action, [55] * 5)
+    _review(client, drama, [95])
+
+    drama_id = Catalogue_Genre.query.filter_by(genre_name='Drama').first().id
+    assert _top_names(client) == ['Drama movie', 'Action movie']
+    assert _top_names(client, f'?genre_id={drama_id}') == ['Drama movie']
+    assert _top_names(client, '?min_reviews=5') == ['Action movie']
+    assert _top_names(client, f'?genre_id={drama_id}&min_reviews=5') == []
+    assert _top_names(client, '?limit=1') == ['Drama movie']
+
+
+def test_genre_change_updates_ranking(client):
+    movie = _movie('Moving movie', 'Action')
+    _review(client, movie, [80])
+    action_id, drama_id = (Catalogue_Genre.query.filter_by(genre_name=name).first().id for name in ('Action', 'Drama'))
+
+    client.put(f'/movies/{movie.id}', json={'genre_id': drama_id})
+    assert _top_names(client, f'?genre_id={action_id}') == []
+    assert _top_names(client, f'?genre_id={drama_id}') == ['Moving movie']
+
+
+def test_ranking_is_built_from_database(client):
+    # Agregados gravados direto no banco (ex.: carga em massa), sem aluguéis
+    movie = _movie('Imported', 'Action')
+    movie.sum_rate, movie.count_review, movie.avg_rate = 240, 3, 80
+    db.session.commit()
+
+    assert _top_names(client) == ['Imported']
+
+    client.delete(f'/movies/{movie.id}')
+    assert _top_names(client) == []
+
+
+def test_redis_ranking():
+    ranking = RedisRanking(fakeredis.FakeRedis())
+    assert not ranking.is_built()
+
+    ranking.replace([(1, 10, 60.0, 5, 5), (2, 10, 70.0, 1, 1)])
+    ranking.update(3, 20, 80.0, 7, 7)
+    assert ranking.is_built()
+    assert ranking.top(10) == [(3, 80.0, 7), (2, 70.0, 1), (1, 60.0, 5)]
+    assert ranking.top(10, min_reviews=5) == [(3, 80.0, 7), (1, 60.0, 5)]
+    assert ranking.top(10, genre_id=10, min_reviews=5) == [(1, 60.0, 5)]
+
+    # Troca de gênero (sai dos rankings do gênero anterior em todos os limiares) e remoção
+    ranking.update(1, 20, 90.0, 6, 6)
+    assert ranking.top(10, genre_id=10) == [(2, 70.0, 1)]
+    assert ranking.top(10, genre_id=10, min_reviews=5) == []
+    assert ranking.top(1, genre_id=20) == [(1, 90.0, 6)]
+    ranking.remove(1)
+    assert ranking.top(10, genre_id=20) == [(3, 80.0, 7)]
+    assert ranking.top(10, min_reviews=5) == [(3, 80.0, 7)]
+
+    ranking.replace([])
+    assert ranking.top(10) == []
+
+
+@pytest.mark.parametrize('ranking', [lambda: RedisRanking(fakeredis.FakeRedis()), LocalRanking])
+def test_out_of_order_updates_are_ignored(ranking):
+    ranking = ranking()
+    ranking.replace([])
+
+    # Versão 3 chega antes da 2 (duas avaliações aplicadas depois dos commits)
+    assert ranking.update(1, 10, 75.0, 3, 3)
+    assert not ranking.update(1, 10, 60.0, 2, 2)
+    assert ranking.top(10) == [(1, 75.0, 3)]
+
+    # A mesma versão é reaplicada (ex.: troca de gênero sem nova avaliação)
+    assert ranking.update(1, 20, 75.0, 3, 3)
+    assert ranking.top(10, genre_id=20) == [(1, 75.0, 3)]
+
+
+def test_record_uses_rating_version(client):
+    movie = _movie('Versioned', 'Action')
+    _review(client, movie, [80, 90])
+    version = db.session.get(Movie, movie.id).rating_version
+    assert version == 2
+
+    # Um registro atrasado (agregados da primeira avaliação) não desfaz o atual
+    leaderboard.record(movie.id, movie.genre_id, 80, 1, version - 1)
+    assert client.get('/case/movies/top').get_json()[0]['score'] == round(bayesian_score(170, 2, 50, 10), 2)
+
+
+def test_invalid_parameters(client):
+    assert client.get('/case/movies/top?limit=0').status_code == 400
+    assert client.get('/case/movies/top?genre_id=abc').status_code == 400
+    response = client.get('/case/movies/top?min_reviews=3')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'min_reviews must be one of 1, 5, 10, 25, 50, 100'
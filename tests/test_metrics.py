@@ -0,0 +1,39 @@
+"""
+Testes das métricas expostas em /metrics.
+
+Cenários testados:
+- Latência, status e consultas SQL são registrados por endpoint
+- Acertos e falhas do cache das rotas são contabilizados
+"""
+
+
+def test_metrics_record_requests_and_queries(client, setup_sample_data, metric_value):
+    client.get('/movies')
+    client.get('/movies')
+    client.get('/movies/9999')
+
+    text = client.get('/metrics').get_data(as_text=True)
+
+    assert metric_value(
+        text, 'filmestop_responses_total{blueprint="movies",endpoint="movies.get_movies",method="GET",status="200"}'
+    ) == 2
+    assert metric_value(
+        text, 'filmestop_responses_total{blueprint="movies",endpoint="movies.get_movie",method="GET",status="404"}'
+    ) == 1
+    assert metric_value(
+        text, 'filmestop_request_duration_seconds_count{blueprint="movies",endpoint="movies.get_movies",method="GET"}'
+    ) == 2
+    assert metric_value(text, 'filmestop_db_queries_total{blueprint="movies",endpoint="movies.get_movies"}') >= 2
+    assert metric_value(text, 'filmestop_db_duration_seconds_total{blueprint="movies",endpoint="movies.get_movies"}') > 0
+
+
+def test_metrics_record_cache_hits_and_misses(cached_client, setup_sample_data, metric_value):
+    _, movie, _, _ = setup_sample_data
+    cached_client.get(f'/case/movies/{movie.id}')
+    cached_client.get(f'/case/movies/{movie.id}')
+
+    text = cached_client.get('/metrics').get_data(as_text=True)
+    labels = 'blueprint="main",endpoint="main.get_movie_by_id"'
+
+    assert metric_value(text, f'filmestop_cache_requests_total{{{labels},result="miss"}}') == 1
+    assert metric_value(text, f'filmestop_cache_requests_total{{{labels},result="hit"}}') == 1
@@ -0,0 +1,35 @@
+from flask_migrate import upgrade
+from sqlalchemy import text
+
+from filmestop import db
+
+"""
+Testes das migrations com dados.
+
+Cenários testados:
+- d8b5f0a3e914 remove avaliações duplicadas (mantém a mais recente) e
+  recalcula soma, contador e média dos filmes
+"""
+
+
+def test_dedup_reviews_recomputes_movie_aggregates(file_app):
+    upgrade(revision='c41e8b93d2a6')
+    with db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO catalogue_genre (id, genre_name) VALUES (1, 'Action')"))
+        conn.execute(text("INSERT INTO users (id, name) VALUES (1, 'A'), (2, 'B'), (3, 'C')"))
+        conn.execute(text(
+            "INSERT INTO movies (id, name, director, year, genre_id, sum_rate, count_review, avg_rate) VALUES "
+            "(1, 'Reviewed', 'Dir', 2000, 1, 999, 9, 99), (2, 'Not reviewed', 'Dir', 2000, 1, 10, 1, 10)"
+        ))
+        # O usuário 1 avaliou o filme 1 duas vezes; vale a avaliação mais recente (50)
+        conn.execute(text(
+            "INSERT INTO reviews (id, user_id, movie_id, rate) VALUES "
+            "(1, 1, 1, 90), (2, 2, 1, 70), (3, 3, 1, 61), (4, 1, 1, 50)"
+        ))
+
+    upgrade(revision='d8b5f0a3e914')
+
+    with db.engine.connect() as conn:
+        assert conn.execute(text('SELECT id FROM reviews ORDER BY id')).scalars().all() == [2, 3, 4]
+        movies = conn.execute(text('SELECT id, sum_rate, count_review, avg_rate FROM movies ORDER BY id')).all()
+    assert [tuple(movie) for movie in movies] == [(1, 181, 3, 60.33), (2, 0, 0, 0)]
@@ -0,0 +1,104 @@
+from filmestop import db
+from filmestop.models import User, Movie, Catalogue_Genre
+
+"""
+Testes da paginação por cursor nas listagens.
+
+Cenários testados:
+- Percorrer todas as páginas seguindo o next_cursor do corpo (igual ao cabeçalho X-Next-Cursor)
+- Filtro por gênero combinado com o cursor
+- Sem limit a página tem DEFAULT_PAGE_SIZE itens e informa o next_cursor
+- Parâmetros de paginação inválidos
+"""
+
+
+def _create_movies(total, genre_name='Action'):
+    genre = Catalogue_Genre.query.filter_by(genre_name=genre_name).first()
+    movies = [Movie(name=f'Movie {i}', director='Dir', year=2000, genre_id=genre.id) for i in range(total)]
+    db.session.add_all(movies)
+    db.session.commit()
+    return genre, movies
+
+
+def _collect_pages(client, url):
+    ids, pages, cursor = [], 0, None
+    while True:
+        separator = '&' if '?' in url else '?'
+        page_url = url if cursor is None else f'{url}{separator}after={cursor}'
+        response = client.get(page_url)
+        assert response.status_code == 200
+        page = response.get_json()
+        ids.extend(item['id'] for item in page['items'])
+        pages += 1
+        cursor = page['next_cursor']
+        assert response.headers.get('X-Next-Cursor') == (str(cursor) if cursor is not None else None)
+        if cursor is None:
+            return ids, pages
+
+
+def test_movies_pages_cover_whole_catalogue(client, app):
+    """Percorre /movies em páginas de 2 sem repetir nem perder filmes"""
+    _, movies = _create_movies(5)
+
+    ids, pages = _collect_pages(client, '/movies?limit=2')
+
+    assert ids == sorted(m.id for m in movies)
+    assert pages == 3
+
+
+def test_case_movies_pages_by_genre(client, app):
+    """O cursor respeita o filtro por gênero"""
+    genre, action_movies = _create_movies(3, 'Action')
+    _create_movies(2, 'Drama')
+
+    ids, _ = _collect_pages(client, f'/case/movies?genre_id={genre.id}&limit=2')
+
+    assert ids == [m.id for m in action_movies]
+
+
+def test_case_movies_last_page_after_cursor_is_empty(client, app):
+    """Um cursor além do último filme retorna lista vazia, não 404"""
+    genre, movies = _create_movies(1)
+
+    response = client.get(f'/case/movies?genre_id={genre.id}&after={movies[-1].id}')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'items': [], 'next_cursor': None}
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_listing_without_limit_uses_default_page_size(client, app):
+    """Sem limit a listagem continua limitada e o corpo indica a próxima página"""
+    app.config['DEFAULT_PAGE_SIZE'] = 2
+    _, movies = _create_movies(5)
+
+    for url in ('/case/movies', '/movies'):
+        page = client.get(url).get_json()
+        assert [item['id'] for item in page['items']] == [movie.id for movie in movies[:2]]
+        assert page['next_cursor'] == movies[1].id
+
+    page = client.get(f'/case/movies?after={movies[0].id}').get_json()
+    assert [item['id'] for item in page['items']] == [movie.id for movie in movies[1:3]]
+    assert page['next_cursor'] == movies[2].id
+
+
+def test_users_pages(client, app):
+    """A listagem de usuários também é paginada"""
+    db.session.add_all([User(name=f'User {i}', email=f'u{i}@example.com', phone='1') for i in range(3)])
+    db.session.commit()
+
+    ids, pages = _collect_pages(client, '/users?limit=1')
+
+    assert len(ids) == 3
+    assert pages == 3
+
+
+def test_invalid_pagination_args(client):
+    """Retorna 400 para limit fora do intervalo ou cursor não numérico"""
+    response = client.get('/movies?limit=0')
+    assert response.status_code == 400
+    assert 'limit must be an integer' in response.get_json()['error']
+
+    response = client.get('/users?after=abc')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'after must be an integer cursor'
@@ -0,0 +1,59 @@
+import logging
+
+import pytest
+from flask import jsonify
+
+from filmestop import db
+from filmestop.models import Movie, Catalogue_Genre
+from filmestop.query_budget import QueryBudgetExceeded, query_budget
+
+"""
+Testes do detector de N+1 e do orçamento de consultas por rota.
+
+Cenários testados:
+- Rota acima do orçamento declarado falha nos testes
+- Mesmo SELECT repetido por linha é apontado como N+1
+- Em modo 'warn' a violação é apenas registrada no log
+"""
+
+
+@pytest.fixture
+def n_plus_one_client(app):
+    """Registra rotas de teste: uma acima do orçamento e uma com N+1 (lazy-load do gênero)"""
+    @query_budget(1)
+    def over_budget():
+        Movie.query.count()
+        Catalogue_Genre.query.count()
+        return jsonify([])
+
+    def lazy_genres():
+        return jsonify([movie.genre.genre_name for movie in Movie.query.all()])
+
+    app.add_url_rule('/_test/over_budget', view_func=over_budget)
+    app.add_url_rule('/_test/lazy_genres', view_func=lazy_genres)
+
+    genres = Catalogue_Genre.query.all()
+    db.session.add_all([Movie(name=f'M{i}', director='D', year=2000, genre_id=genres[i].id) for i in range(6)])
+    db.session.commit()
+    db.session.expunge_all()
+    return app.test_client()
+
+
+def test_route_over_budget_fails(n_plus_one_client):
+    with pytest.raises(QueryBudgetExceeded, match='2 queries exceed the budget of 1'):
+        n_plus_one_client.get('/_test/over_budget')
+
+
+def test_repeated_statement_is_reported_as_n_plus_one(n_plus_one_client):
+    with pytest.raises(QueryBudgetExceeded, match='possible N\\+1: statement repeated 6 times'):
+        n_plus_one_client.get('/_test/lazy_genres')
+
+
+def test_warn_mode_only_logs(app, n_plus_one_client, caplog):
+    app.config['QUERY_BUDGET_MODE'] = 'warn'
+
+    with caplog.at_level(logging.WARNING, logger='filmestop.query_budget'):
+        response = n_plus_one_client.get('/_test/lazy_genres')
+
+    assert response.status_code == 200
+    assert 'possible N+1' in caplog.text
@@ -0,0 +1,67 @@
+import re
+
+import pytest
+
+from filmestop import db
+
+"""
+Testes dos planos de execução das consultas das rotas (SQLite).
+
+Cada rota é executada capturando os comandos SQL emitidos; em seguida cada
+comando passa por EXPLAIN QUERY PLAN. Nenhuma consulta pode fazer varredura
+completa (SCAN sem índice) de movies, rents ou reviews.
+"""
+
+HOT_TABLES = ('movies', 'rents', 'reviews')
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+def _full_scans(statement, parameters):
+    with db.engine.connect() as conn:
+        plan = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+
+    scans = []
+    for row in plan:
+        match = FULL_SCAN.match(row.detail)
+        if match and match.group(1) in HOT_TABLES:
+            scans.append(row.detail)
+    return scans
+
+
+def _assert_route_uses_indexes(capture_sql, func):
+    with capture_sql() as captured:
+        response = func()
+    selects = [s for s in captured if s.statement.lstrip().upper().startswith('SELECT') and not s.executemany]
+
+    assert response.status_code < 500
+    assert selects
+    for statement, parameters, _ in selects:
+        assert _full_scans(statement, parameters) == [], statement
+
+
+@pytest.mark.parametrize('route', [
+    lambda genre, user, movie: f'/case/movies?genre_id={genre.id}',
+    lambda genre, user, movie: f'/case/movies?after={movie.id}',
+    lambda genre, user, movie: f'/case/movies/{movie.id}',
+    lambda genre, user, movie: f'/case/users/{user.id}/rented_movies',
+])
+def test_read_routes_use_indexes(client, setup_sample_data, capture_sql, route):
+    user, movie, genre, _ = setup_sample_data
+
+    _assert_route_uses_indexes(capture_sql, lambda: client.get(route(genre, user, movie)))
+
+
+def test_review_route_uses_indexes(client, setup_sample_data, capture_sql):
+    user, movie, _, _ = setup_sample_data
+
+    _assert_route_uses_indexes(
+        capture_sql, lambda: client.post(f'/case/users/{user.id}/movies/{movie.id}/review', json={'rate': 80})
+    )
+
+
+def test_review_batch_uses_indexes(client, setup_sample_data, capture_sql):
+    user, movie, _, _ = setup_sample_data
+
+    _assert_route_uses_indexes(
+        capture_sql, lambda: client.post('/case/reviews/batch', json=[{'user_id': user.id, 'movie_id': movie.id, 'rate': 80}])
+    )
@@ -0,0 +1,62 @@
+from sqlalchemy import func
+
+from filmestop import db
+from filmestop.models import User, Movie, Rent, Review
+from seed_data import seed_bulk_data, seed_demo_data
+
+"""
+Testes da carga de dados.
+
+Cenários testados:
+- Carga em massa insere as quantidades pedidas e mantém os agregados consistentes
+- Mesma semente gera os mesmos dados
+- Carga de demonstração pode ser executada mais de uma vez
+"""
+
+
+def _snapshot():
+    rents = db.session.execute(
+        db.select(Rent.user_id, Rent.movie_id, Rent.start_date, Rent.rent_days).order_by(Rent.id)
+    ).all()
+    reviews = db.session.execute(db.select(Review.user_id, Review.movie_id, Review.rate).order_by(Review.id)).all()
+    return rents, reviews
+
+
+def test_seed_bulk_data_counts_and_aggregates(app):
+    counts = seed_bulk_data(users=20, movies=30, rents=300, reviews=60, seed=7)
+
+    assert counts['users'] == User.query.count() == 20
+    assert counts['movies'] == Movie.query.count() == 30
+    assert Rent.query.count() == 300
+    assert 0 < counts['reviews'] == Review.query.count() <= 60
+
+    # Toda avaliação corresponde a um aluguel e os agregados batem com as reviews
+    unrented = Review.query.filter(
+        ~db.session.query(Rent.id).filter(Rent.user_id == Review.user_id, Rent.movie_id == Review.movie_id).exists()
+    ).count()
+    assert unrented == 0
+    total_reviews = db.session.query(func.sum(Movie.count_review)).scalar()
+    assert total_reviews == counts['reviews']
+
+
+def test_seed_bulk_data_is_deterministic(app):
+    seed_bulk_data(users=10, movies=10, rents=100, reviews=20, seed=3)
+    first = _snapshot()
+
+    # Banco recriado do zero: a mesma semente produz exatamente os mesmos dados
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    seed_bulk_data(users=10, movies=10, rents=100, reviews=20, seed=3)
+
+    assert _snapshot() == first
+    assert first[0]
+
+
+def test_seed_demo_data_is_idempotent(app):
+    seed_demo_data()
+    seed_demo_data()
+
+    assert User.query.count() == 5
+    assert Movie.query.count() == 10
+    assert Review.query.count() == db.session.query(func.sum(Movie.count_review)).scalar()
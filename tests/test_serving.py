@@ -0,0 +1,93 @@
+import os
+import runpy
+
+import fakeredis
+import pytest
+
+from filmestop import create_app, db
+from filmestop.extensions import cache
+from filmestop.genre_catalogue import genre_catalogue
+from filmestop.models import Movie, Catalogue_Genre
+from filmestop.serving import warmup, dispose_engines
+from seed_data import seed_genres
+
+"""
+Testes da preparação para o servidor pre-fork (gunicorn.conf.py).
+
+Cenários testados:
+- O aquecimento carrega o mapa de gêneros e deixa a listagem no cache
+- O aquecimento fecha as conexões do mestre antes do fork
+- O aquecimento encerra a thread de invalidação do L1 e esvazia o L1 antes do fork
+- Após o fork, o worker troca o pool herdado por um novo
+- A configuração do gunicorn usa preload e reciclagem de workers
+"""
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def server_app(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'serving.db'}"})
+    cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+    with app.app_context():
+        db.create_all()
+        seed_genres()
+        genre = Catalogue_Genre.query.filter_by(genre_name='Action').first()
+        db.session.add(Movie(name='Warm', director='Dir', year=2000, genre_id=genre.id))
+        db.session.commit()
+        db.session.remove()
+    genre_catalogue.invalidate()
+    yield app
+    dispose_engines(app)
+
+
+def test_warmup_loads_genres_and_caches_listing(server_app, capture_sql):
+    warmup(server_app)
+    assert genre_catalogue.knows([1])
+
+    with server_app.app_context(), capture_sql() as statements:
+        response = server_app.test_client().get('/case/movies')
+
+    assert response.get_json()['items'][0]['name'] == 'Warm'
+    assert statements == []
+
+
+def test_warmup_stops_l1_listener_before_fork(server_app):
+    cache.init_app(server_app, config={
+        'CACHE_TYPE': 'filmestop.tiered_cache.TieredRedisCache',
+        'CACHE_REDIS_URL': None,
+        'CACHE_REDIS_HOST': fakeredis.FakeRedis(server=fakeredis.FakeServer()),
+    })
+    backend = server_app.extensions['cache'][cache]
+    assert backend._l1_enabled()
+    listener = backend._listener
+
+    warmup(server_app)
+
+    assert not listener.is_alive()
+    assert backend._listener is None
+    assert len(backend.l1) == 0
+
+
+def test_warmup_releases_master_connections(server_app):
+    warmup(server_app)
+    with server_app.app_context():
+        assert db.engine.pool.checkedout() == 0
+        assert db.engine.pool.checkedin() == 0
+
+
+def test_dispose_after_fork_replaces_pool(server_app):
+    with server_app.app_context():
+        inherited = db.engine.pool
+        dispose_engines(server_app, close=False)
+        assert db.engine.pool is not inherited
+
+
+def test_gunicorn_config(monkeypatch):
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    config = runpy.run_path(os.path.join(ROOT, 'gunicorn.conf.py'))
+
+    assert config['workers'] == 3
+    assert config['preload_app'] is True
+    assert config['max_requests'] > 0 and config['max_requests_jitter'] > 0
+    assert callable(config['when_ready']) and callable(config['post_fork'])
@@ -0,0 +1,75 @@
+import threading
+import time
+
+from filmestop import db, stampede
+from filmestop.extensions import cache
+from filmestop.models import Movie
+from filmestop.stampede import CacheEntry, get_or_compute
+
+"""
+Testes da proteção contra cache stampede (filmestop/stampede.py).
+
+Cenários testados:
+- Misses concorrentes da mesma chave executam a recomputação uma única vez
+- Uma entrada vencida continua sendo servida e é atualizada uma só vez em segundo plano
+- Se quem tem o lock não grava o resultado a tempo, a requisição recalcula sozinha
+- Rota cacheada serve a listagem vencida e a próxima leitura vem atualizada
+"""
+
+
+def test_concurrent_misses_compute_once(app, cached_client):
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'value'
+
+    def request():
+        with app.app_context():
+            results.append(get_or_compute('key', compute, 60))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [('value', False)] + [('value', True)] * 7
+
+
+def test_stale_entry_is_served_while_refreshed_once(app, cached_client, monkeypatch):
+    refreshes = []
+    monkeypatch.setattr(stampede, 'refresh_in_background', refreshes.append)
+    cache.set('key', CacheEntry('old', time.time() - 1), timeout=60)
+
+    assert get_or_compute('key', lambda: 'new', 60) == ('old', True)
+    assert get_or_compute('key', lambda: 'new', 60) == ('old', True)
+    assert len(refreshes) == 1
+
+    refreshes[0]()
+    assert get_or_compute('key', lambda: 'newer', 60) == ('new', True)
+
+
+def test_waiter_computes_when_lock_holder_is_slow(app, cached_client, monkeypatch):
+    monkeypatch.setattr(stampede, 'LOCK_WAIT', 0.1)
+    cache.add('lock/key', 'other-worker', timeout=30)
+
+    assert get_or_compute('key', lambda: 'value', 60) == ('value', False)
+
+
+def test_route_serves_stale_listing_and_refreshes(cached_client, setup_sample_data, monkeypatch):
+    _, _, genre, _ = setup_sample_data
+    monkeypatch.setattr(stampede, 'refresh_in_background', lambda refresh: refresh())
+    assert len(cached_client.get('/case/movies').get_json()['items']) == 1
+
+    # Escrita fora da API (sem invalidar tags) e TTL vencido
+    db.session.add(Movie(name='Other', director='Dir', year=2001, genre_id=genre.id))
+    db.session.commit()
+    now = time.time()
+    monkeypatch.setattr(stampede.time, 'time', lambda: now + stampede.STALE_GRACE / 2 + 6 * 60 * 60)
+
+    assert len(cached_client.get('/case/movies').get_json()['items']) == 1
+    assert len(cached_client.get('/case/movies').get_json()['items']) == 2
@@ -0,0 +1,143 @@
+import time
+
+import fakeredis
+import pytest
+from flask import g
+
+from filmestop import db
+from filmestop.cache_tags import TAG_KEY_PREFIX, movie_tag
+from filmestop.extensions import cache
+from filmestop.tiered_cache import TieredRedisCache
+
+"""
+Testes do cache em dois níveis (L1 em memória + Redis) com invalidação por pub/sub.
+
+Usa o fakeredis: cada TieredRedisCache ligado ao mesmo FakeServer faz o papel
+de um worker diferente compartilhando o mesmo Redis.
+
+Cenários testados:
+- Um acerto do L1 não vai ao Redis
+- O L1 é limitado em entradas (LRU) e em tempo de vida
+- Uma entrada lida do Redis não fica no L1 além do TTL restante no Redis
+- Uma escrita em um worker remove a chave do L1 dos outros
+- Invalidar uma tag em outro worker atualiza a rota cacheada deste
+- Sem inscrição no canal (Redis fora), o L1 não é usado
+"""
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def make_cache(server):
+    caches = []
+
+    def make(**kwargs):
+        kwargs.setdefault('key_prefix', 'flask_cache_')
+        tiered = TieredRedisCache(fakeredis.FakeRedis(server=server), **kwargs)
+        caches.append(tiered)
+        return tiered
+
+    yield make
+    for tiered in caches:
+        tiered.stop_listener()
+
+
+def _eventually(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_l1_hit_does_not_reach_redis(make_cache, server):
+    tiered = make_cache()
+    tiered.set('key', {'value': 1})
+
+    # Remove direto do Redis, sem publicar invalidação
+    fakeredis.FakeRedis(server=server).flushall()
+
+    assert tiered.get('key') == {'value': 1}
+    assert tiered.get_many('key', 'other') == [{'value': 1}, None]
+
+
+def test_l1_is_bounded_by_entries_and_ttl(make_cache):
+    tiered = make_cache(l1_max_entries=2, l1_timeout=0.2)
+    tiered.set_many({'a': 1, 'b': 2})
+    tiered.get('a')  # 'a' passa a ser a mais recente
+    tiered.set('c', 3)
+
+    assert len(tiered.l1) == 2
+    assert tiered.l1.get('b') == (False, None)
+    assert tiered.get('b') == 2  # continua no Redis
+
+    time.sleep(0.25)
+    assert tiered.l1.get('a') == (False, None)
+    assert tiered.get('a') == 1
+
+
+def test_l1_fill_respects_remaining_redis_ttl(make_cache, server):
+    writer = make_cache()
+    writer.set('short', 'value', timeout=1)
+    writer.set('forever', 'value', timeout=0)
+
+    reader = make_cache(l1_timeout=60)
+    assert reader.get_many('short', 'forever') == ['value', 'value']
+
+    time.sleep(1.1)
+    assert reader.l1.get('short') == (False, None)
+    assert reader.l1.get('forever') == (True, 'value')
+    assert reader.get('short') is None
+
+
+def test_write_evicts_key_from_other_workers(make_cache):
+    worker_a = make_cache()
+    worker_b = make_cache()
+    worker_b.set('key', 'old')
+    assert worker_a.get('key') == 'old'
+
+    worker_b.set('key', 'new')
+    assert _eventually(lambda: worker_a.get('key') == 'new')
+
+    worker_b.delete('key')
+    assert _eventually(lambda: worker_a.get('key') is None)
+
+
+def test_tag_invalidation_from_other_worker_refreshes_route(app, server, make_cache, setup_sample_data):
+    _, movie, _, _ = setup_sample_data
+    cache.init_app(app, config={
+        'CACHE_TYPE': 'filmestop.tiered_cache.TieredRedisCache',
+        'CACHE_REDIS_URL': None,
+        'CACHE_REDIS_HOST': fakeredis.FakeRedis(server=server),
+    })
+    client = app.test_client()
+    try:
+        assert client.get(f'/case/movies/{movie.id}').get_json()['name'] == 'Test Movie'
+
+        # Outro worker altera o filme e invalida a tag
+        movie.name = 'Renamed elsewhere'
+        db.session.commit()
+        make_cache().set(TAG_KEY_PREFIX + movie_tag(movie.id), 'new-version', timeout=0)
+
+        def refreshed():
+            # O app context dos testes é compartilhado entre as requisições
+            g.pop('tag_versions', None)
+            return client.get(f'/case/movies/{movie.id}').get_json()['name'] == 'Renamed elsewhere'
+
+        assert _eventually(refreshed)
+    finally:
+        app.extensions['cache'][cache].stop_listener()
+
+
+def test_l1_disabled_without_subscription(server):
+    server.connected = False
+    tiered = TieredRedisCache(fakeredis.FakeRedis(server=server))
+
+    assert not tiered._l1_enabled()
+    with pytest.raises(Exception):
+        tiered.get('key')
+    assert len(tiered.l1) == 0